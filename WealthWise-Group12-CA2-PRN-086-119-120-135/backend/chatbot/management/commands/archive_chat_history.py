@@ -0,0 +1,80 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from chatbot.models import Chat
+
+
+class Command(BaseCommand):
+    help = (
+        "Move chat messages older than the retention period to gzip-compressed "
+        "JSON Lines files (one per user per run) and delete them from the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CHATBOT_CHAT_RETENTION_DAYS,
+            help="Archive messages older than this many days.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Messages written and deleted per batch.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many messages would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        old_chats = Chat.objects.filter(created_at__lt=cutoff)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{old_chats.count()} messages older than {cutoff:%Y-%m-%d}.")
+            return
+
+        archive_dir = Path(settings.CHATBOT_CHAT_ARCHIVE_DIR)
+        run_stamp = timezone.now().strftime("%Y%m%dT%H%M%S")
+        archived = 0
+
+        user_ids = old_chats.values_list("user_id", flat=True).distinct()
+        for user_id in user_ids:
+            user_dir = archive_dir / f"user_{user_id}"
+            user_dir.mkdir(parents=True, exist_ok=True)
+            archive_path = user_dir / f"{run_stamp}.jsonl.gz"
+
+            # Append one gzip member per batch; gzip readers see the concatenation as one stream
+            while True:
+                batch = list(
+                    old_chats.filter(user_id=user_id)
+                    .order_by("created_at", "id")
+                    .values("id", "sender", "content", "created_at")[
+                        : options["batch_size"]
+                    ]
+                )
+                if not batch:
+                    break
+
+                with gzip.open(archive_path, "at", encoding="utf-8") as f:
+                    for chat in batch:
+                        f.write(json.dumps(chat, default=str) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                with transaction.atomic():
+                    Chat.objects.filter(id__in=[chat["id"] for chat in batch]).delete()
+                archived += len(batch)
+
+        self.stdout.write(f"Archived {archived} messages older than {cutoff:%Y-%m-%d}.")
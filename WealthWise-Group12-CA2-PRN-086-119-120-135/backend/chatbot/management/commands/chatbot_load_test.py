@@ -0,0 +1,263 @@
+import asyncio
+import json
+import resource
+import time
+import tracemalloc
+import uuid
+from unittest import mock
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chatbot import views
+from chatbot.metrics import STAGE_SECONDS
+from chatbot.utils.loadtest_utils import (
+    DEFAULT_SESSIONS,
+    LoadTestChatBot,
+    configure_fake_backends,
+    make_statement_pdf,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay chat sessions against the chat endpoint with fake LLM, embedding and "
+        "vector store backends, and report throughput, latency per stage and memory. "
+        "Everything runs in this process on one event loop, like a single ASGI worker, "
+        "against a private in-memory cache and inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sessions", type=int, default=20, help="Chat sessions to replay (cycles the corpus)."
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=10, help="Sessions running at the same time."
+        )
+        parser.add_argument(
+            "--corpus",
+            help='JSON file with a list of sessions, each a list of {"message", "pdf_pages"} turns.',
+        )
+        parser.add_argument("--stream", action="store_true", help="Request streamed answers.")
+        parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per LLM call.")
+        parser.add_argument(
+            "--token-latency", type=float, default=0.02, help="Seconds per streamed chunk."
+        )
+        parser.add_argument(
+            "--embedding-latency", type=float, default=0.1, help="Seconds per embedding call."
+        )
+        parser.add_argument(
+            "--vector-latency", type=float, default=0.05, help="Seconds per vector store call."
+        )
+        parser.add_argument(
+            "--trace-memory",
+            action="store_true",
+            help="Also report peak Python allocations (tracemalloc slows every allocation, "
+            "so latencies from such a run are inflated).",
+        )
+        parser.add_argument("--json", dest="json_path", help="Also write the report to this file.")
+
+    def handle(self, *args, **options):
+        corpus = DEFAULT_SESSIONS
+        if options["corpus"]:
+            with open(options["corpus"]) as f:
+                corpus = json.load(f)
+        sessions = [corpus[i % len(corpus)] for i in range(options["sessions"])]
+
+        configure_fake_backends(
+            llm_latency=options["llm_latency"],
+            token_latency=options["token_latency"],
+            embedding_latency=options["embedding_latency"],
+            vector_latency=options["vector_latency"],
+        )
+
+        run_id = uuid.uuid4().hex[:8]
+        # A private cache, so fake answers, resources and queries never reach the real one.
+        # Uploads are ingested inline so PDF parsing and embedding are part of the measurement.
+        isolated = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": f"chatbot-load-test-{run_id}",
+                }
+            },
+            CHATBOT_ASYNC_INGESTION=False,
+        )
+        peak_memory = None
+        with isolated, mock.patch.object(views, "ChatBot", LoadTestChatBot):
+            # Every row the run writes (users, chats, documents) is rolled back afterwards.
+            # async_to_sync runs the views' database calls on this thread, inside the transaction.
+            with transaction.atomic():
+                users = [
+                    User.objects.create_user(username=f"loadtest_{run_id}_{i}")
+                    for i in range(len(sessions))
+                ]
+                stages_before = _stage_snapshot()
+                if options["trace_memory"]:
+                    tracemalloc.start()
+                try:
+                    started = time.perf_counter()
+                    turns = async_to_sync(self._run)(
+                        sessions, users, options["concurrency"], options["stream"]
+                    )
+                    elapsed = time.perf_counter() - started
+                    if options["trace_memory"]:
+                        _, peak_memory = tracemalloc.get_traced_memory()
+                finally:
+                    if options["trace_memory"]:
+                        tracemalloc.stop()
+                    transaction.set_rollback(True)
+
+        report = _build_report(
+            turns, elapsed, peak_memory, _stage_snapshot(), stages_before, options
+        )
+        self._print_report(report)
+        if options["json_path"]:
+            with open(options["json_path"], "w") as f:
+                json.dump(report, f, indent=2)
+
+    async def _run(self, sessions, users, concurrency, stream):
+        client = AsyncClient()
+        url = reverse("chat_with_bot")
+        semaphore = asyncio.Semaphore(concurrency)
+        turns = []
+
+        async def run_session(index, session, user):
+            headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+            async with semaphore:
+                for turn in session:
+                    data = {"user_message": turn["message"]}
+                    if turn.get("pdf_pages"):
+                        data["files"] = SimpleUploadedFile(
+                            f"statement_{index}.pdf",
+                            make_statement_pdf(turn["pdf_pages"], seed=index),
+                            content_type="application/pdf",
+                        )
+                    if stream:
+                        data["stream"] = "true"
+
+                    started = time.perf_counter()
+                    first_byte = None
+                    response = await client.post(url, data, headers=headers)
+                    if response.streaming:
+                        async for _ in response.streaming_content:
+                            first_byte = first_byte or time.perf_counter() - started
+                    turns.append(
+                        {
+                            "status": response.status_code,
+                            "latency": time.perf_counter() - started,
+                            "first_byte": first_byte,
+                            "pdf_pages": turn.get("pdf_pages", 0),
+                        }
+                    )
+
+        await asyncio.gather(
+            *(
+                run_session(index, session, user)
+                for index, (session, user) in enumerate(zip(sessions, users))
+            )
+        )
+        return turns
+
+    def _print_report(self, report):
+        self.stdout.write(
+            f"{report['turns']} turns in {report['seconds']:.1f}s "
+            f"({report['turns_per_second']:.2f} turns/s, {report['errors']} errors, "
+            f"concurrency {report['concurrency']})"
+        )
+        for name, stats in report["latency"].items():
+            self.stdout.write(
+                f"  {name:<12} p50 {stats['p50']:.3f}s  p95 {stats['p95']:.3f}s  "
+                f"p99 {stats['p99']:.3f}s  max {stats['max']:.3f}s"
+            )
+        self.stdout.write("Stages (p95 is a histogram bucket upper bound):")
+        for stage, stats in report["stages"].items():
+            self.stdout.write(
+                f"  {stage:<24} {stats['count']:>6}  mean {stats['mean']:.3f}s  "
+                f"p95 <= {stats['p95']}s"
+            )
+        memory = f"Memory: max RSS {report['memory']['max_rss_mb']:.1f} MB"
+        if report["memory"]["peak_traced_mb"] is not None:
+            memory += f", peak Python allocations {report['memory']['peak_traced_mb']:.1f} MB"
+        self.stdout.write(memory)
+
+
+def _stage_snapshot():
+    """Cumulative per-stage counts, sums and bucket counts from the stage histogram."""
+    snapshot = {}
+    for metric in STAGE_SECONDS.collect():
+        for sample in metric.samples:
+            stage = snapshot.setdefault(
+                sample.labels["stage"], {"count": 0.0, "sum": 0.0, "buckets": {}}
+            )
+            if sample.name.endswith("_count"):
+                stage["count"] = sample.value
+            elif sample.name.endswith("_sum"):
+                stage["sum"] = sample.value
+            elif sample.name.endswith("_bucket"):
+                stage["buckets"][float(sample.labels["le"])] = sample.value
+    return snapshot
+
+
+def _percentiles(values):
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "max": max(values)}
+
+
+def _build_report(turns, elapsed, peak_memory, stages_after, stages_before, options):
+    stages = {}
+    for name, after in sorted(stages_after.items()):
+        before = stages_before.get(name, {"count": 0.0, "sum": 0.0, "buckets": {}})
+        count = after["count"] - before["count"]
+        if not count:
+            continue
+        p95 = next(
+            bound
+            for bound, cumulative in sorted(after["buckets"].items())
+            if cumulative - before["buckets"].get(bound, 0.0) >= 0.95 * count
+        )
+        stages[name] = {
+            "count": int(count),
+            "mean": (after["sum"] - before["sum"]) / count,
+            "p95": p95,
+        }
+
+    latency = {"turn": _percentiles([turn["latency"] for turn in turns])}
+    first_bytes = [turn["first_byte"] for turn in turns if turn["first_byte"] is not None]
+    if first_bytes:
+        latency["first_byte"] = _percentiles(first_bytes)
+    upload_turns = [turn["latency"] for turn in turns if turn["pdf_pages"]]
+    if upload_turns:
+        latency["pdf_upload"] = _percentiles(upload_turns)
+
+    return {
+        "turns": len(turns),
+        "errors": sum(1 for turn in turns if turn["status"] != 200),
+        "seconds": elapsed,
+        "turns_per_second": len(turns) / elapsed if elapsed else 0.0,
+        "concurrency": options["concurrency"],
+        "stream": options["stream"],
+        "latency": latency,
+        "stages": stages,
+        "memory": {
+            "peak_traced_mb": peak_memory / 2**20 if peak_memory is not None else None,
+            # ru_maxrss is in kilobytes on Linux
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        "fake_latency": {
+            "llm": options["llm_latency"],
+            "token": options["token_latency"],
+            "embedding": options["embedding_latency"],
+            "vector_store": options["vector_latency"],
+        },
+    }
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.utils.cache_utils import cache_is_shared, purge_answer_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Invalidate every cached answer to user-independent chatbot questions, "
+        "e.g. after pension rules or the answer prompt change."
+    )
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            # This command runs in its own process and can't reach the servers' caches
+            raise CommandError(
+                "The default cache is process-local (LocMemCache), so the running "
+                "servers' cached answers can't be purged from here. Configure a "
+                "shared cache (REDIS_URL), or restart the servers to clear them."
+            )
+
+        version = purge_answer_cache()
+        self.stdout.write(f"Purged the chatbot answer cache (now version {version}).")
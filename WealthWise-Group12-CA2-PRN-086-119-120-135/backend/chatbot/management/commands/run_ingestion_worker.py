@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from chatbot.utils.ingestion_utils import claim_next_job, run_ingestion_job
+
+
+class Command(BaseCommand):
+    help = "Process queued chatbot document ingestion jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue once and exit instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Ingestion worker started.")
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            job = run_ingestion_job(job)
+            self.stdout.write(f"Job {job.id} ({job.source}): {job.status}")
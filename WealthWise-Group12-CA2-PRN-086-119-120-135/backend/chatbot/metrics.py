@@ -0,0 +1,82 @@
+"""
+Prometheus metrics for the chatbot pipeline.
+
+They are registered on prometheus_client's default registry, which the
+django_prometheus ``/metrics`` route already exports.
+"""
+
+from prometheus_client import Counter, Histogram
+
+# LLM calls dominate, so the buckets reach well past the other stages
+STAGE_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 40.0,
+)
+
+STAGE_SECONDS = Histogram(
+    "chatbot_stage_duration_seconds",
+    "Time spent in each stage of a chatbot reply.",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+VECTOR_STORE_SECONDS = Histogram(
+    "chatbot_vector_store_duration_seconds",
+    "Vector store operation latency.",
+    ["backend", "operation"],
+    buckets=STAGE_BUCKETS,
+)
+
+LLM_TOKENS = Counter(
+    "chatbot_llm_tokens_total",
+    "Tokens sent to and received from the LLM.",
+    ["call", "direction"],
+)
+
+CACHE_REQUESTS = Counter(
+    "chatbot_cache_requests_total",
+    "Chatbot cache lookups by cache and result (hit/miss).",
+    ["cache", "result"],
+)
+
+REPLIES = Counter(
+    "chatbot_replies_total",
+    "Chatbot replies by classified intent.",
+    ["intent"],
+)
+
+
+# Categories the intent prompt can return; anything else the model writes is "other",
+# so the classifier's output can't grow the number of label values
+INTENT_LABELS = frozenset(
+    {
+        "INCOMPLETE_REQUEST",
+        "QUESTION",
+        "RESOURCE_REQUEST",
+        "EXTRACT_USER_INFO_FROM_DOCUMENT",
+        "GENERAL",
+    }
+)
+
+
+def record_reply(category) -> None:
+    REPLIES.labels(intent=category if category in INTENT_LABELS else "other").inc()
+
+
+def record_cache(cache_name: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache=cache_name, result="hit" if hit else "miss").inc()
+
+
+def record_llm_usage(call: str, message) -> None:
+    """
+    Count the tokens reported on a LangChain AI message (or message chunk).
+
+    Args:
+        call: Which chatbot LLM call produced the message (e.g. "answer", "intent")
+        message: The AIMessage/AIMessageChunk returned by the model
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    LLM_TOKENS.labels(call=call, direction="input").inc(usage.get("input_tokens", 0))
+    LLM_TOKENS.labels(call=call, direction="output").inc(usage.get("output_tokens", 0))
@@ -15,6 +15,79 @@ class Chat(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="chat_user_created_idx")
+        ]
 
     def __str__(self):
         return f"{self.user.username}"
+
+
+class IndexedDocument(models.Model):
+    """Manifest entry for a document that has been ingested into the vector index."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="indexed_documents"
+    )
+    content_hash = models.CharField(max_length=64)
+    source = models.CharField(max_length=255, blank=True, null=True)
+    chunk_ids = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "content_hash"], name="unique_user_document_hash"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.source or self.content_hash[:12]}"
+
+
+class IngestionJob(models.Model):
+    """Background job that ingests an uploaded document into the vector index."""
+
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    )
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="ingestion_jobs"
+    )
+    file = models.FileField(upload_to="chat_uploads/", blank=True, null=True)
+    source = models.CharField(max_length=255, blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    progress = models.PositiveSmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.source} ({self.status})"
+
+
+class ConversationSummary(models.Model):
+    """Rolling summary of a user's chat messages older than the raw history window."""
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="conversation_summary"
+    )
+    summary = models.TextField(blank=True, default="")
+    # ID of the newest Chat message folded into the summary
+    summarized_until = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} - summary until {self.summarized_until}"
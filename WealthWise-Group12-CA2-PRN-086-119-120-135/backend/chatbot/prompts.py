@@ -30,7 +30,8 @@ Carefully interpret the user_message and Classify the request into ONE of the fo
 Output your classification in JSON format as:
 {{
   "category": "<one_of_the_categories>",
-  "topic": "<if RESOURCE_REQUEST, extract the main topic they want to learn about>"
+  "topic": "<if RESOURCE_REQUEST, extract the main topic they want to learn about>",
+  "personalized": <false only if the answer is the same for every user, e.g. "What is EPS?" or "How is NPS taxed?"; true if it depends on the user's own details, documents or earlier conversation>
 }}
 
 Note: Do not reply anything other than the json.
@@ -162,3 +163,21 @@ Return your response as JSON:
   "additional_query": "optional additional specific query"
 }}
 """
+
+SUMMARIZE_CONVERSATION_PROMPT = """
+You maintain a running summary of a conversation between a user and the Wealthwise pension assistant.
+
+Current summary (may be empty):
+{summary}
+
+New messages to fold into the summary:
+{messages}
+
+Instructions:
+1. Update the summary so it covers both the current summary and the new messages
+2. Keep facts the user shared about themselves, their questions, and the key advice given
+3. Drop greetings, repetition and filler
+4. Keep it under {max_words} words
+
+Return only the updated summary text.
+"""
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from users.models import UserData, IncomeStatus, RetirementInfo
+from chatbot.models import Chat
+from chatbot.utils.context_utils import (
+    invalidate_profile_context,
+    invalidate_history_window,
+)
+
+
+@receiver([post_save, post_delete], sender=UserData)
+@receiver([post_save, post_delete], sender=IncomeStatus)
+@receiver([post_save, post_delete], sender=RetirementInfo)
+def clear_profile_context(sender, instance, **kwargs):
+    """Profile data changed: rebuild the chatbot's profile block on the next message."""
+    invalidate_profile_context(instance.user_id)
+
+
+@receiver(post_delete, sender=Chat)
+def clear_history_window(sender, instance, **kwargs):
+    """A chat message was removed: reload the history window from the DB."""
+    invalidate_history_window(instance.user_id)
@@ -1,3 +1,822 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chatbot.models import Chat, ConversationSummary, IndexedDocument, IngestionJob
+from chatbot.utils import document_utils
+from chatbot.utils.cache_utils import (
+    _embedding_bucket,
+    get_cached_answer,
+    get_cached_rag_matches,
+    set_cached_answer,
+    set_cached_rag_matches,
+)
+from chatbot.utils.context_utils import (
+    ChatHistoryWriter,
+    get_conversation_summary,
+    get_history_window,
+    get_profile_context,
+)
+from chatbot.utils.ingestion_utils import claim_next_job, run_ingestion_job
+from chatbot.utils.loadtest_utils import (
+    LoadTestChatBot,
+    configure_fake_backends,
+    make_statement_pdf,
+    make_text_pdf,
+)
+from chatbot.utils.extraction_utils import (
+    group_pages,
+    merge_extractions,
+    select_relevant_pages,
+)
+from chatbot.utils.prompt_utils import (
+    GENERAL_QUESTION_CONTEXT,
+    PromptBuilder,
+    estimate_tokens,
+)
+from chatbot.utils.vector_store_utils import LocalVectorStore
+from users.models import UserData
+
+
+class PdfParsingTests(SimpleTestCase):
+    def test_pages_are_parsed_in_memory(self):
+        content = make_text_pdf([["Salary 100"], ["Pension 200"]])
+        upload = SimpleUploadedFile("a.pdf", content, "application/pdf")
+
+        with mock.patch("tempfile.NamedTemporaryFile", side_effect=AssertionError):
+            content_hash, pages = document_utils.get_pdf_pages(upload)
+
+        self.assertEqual(content_hash, document_utils.hash_bytes(content))
+        self.assertEqual([page.strip() for page in pages], ["Salary 100", "Pension 200"])
+        # Left rewound for the next reader
+        self.assertEqual(upload.read(), content)
+
+    def test_page_text_cache_evicts_least_recently_used(self):
+        page_cache = document_utils._PageTextCache(max_chars=10)
+        page_cache.set("a", ["aaaa"])
+        page_cache.set("b", ["bbbb"])
+        page_cache.get("a")
+        page_cache.set("c", ["cccc"])
+        page_cache.set("huge", ["x" * 11])
+
+        self.assertEqual(page_cache.get("a"), ["aaaa"])
+        self.assertIsNone(page_cache.get("b"))
+        self.assertEqual(page_cache.get("c"), ["cccc"])
+        self.assertIsNone(page_cache.get("huge"))
+        self.assertEqual(page_cache.size, 8)
+
+
+class ExtractionUtilsTests(SimpleTestCase):
+    def test_relevant_pages_keep_the_first_page_and_document_order(self):
+        pages = [
+            "Cover page",
+            "Terms and conditions",
+            "Salary 100, employer contribution 12",
+            "Pension balance",
+            "",
+        ]
+
+        self.assertEqual(select_relevant_pages(pages, 10), [0, 2, 3])
+        # The best scoring pages survive the cap
+        self.assertEqual(select_relevant_pages(pages, 1), [2])
+
+    def test_pages_are_grouped_in_order_up_to_the_size(self):
+        pages = ["a" * 40, "b" * 40, "c" * 40, "d" * 10]
+
+        self.assertEqual(
+            group_pages(pages, [0, 1, 2, 3], max_chars=80),
+            ["a" * 40 + "\n" + "b" * 40, "c" * 40 + "\n" + "d" * 10],
+        )
+
+    def test_merge_prefers_the_most_common_then_the_earliest_value(self):
+        merged = merge_extractions(
+            [
+                {"name": "A. Kumar", "salary": 100, "city": None},
+                {"name": "Anil Kumar", "salary": 120, "city": "Pune"},
+                {"name": "Anil Kumar", "salary": "", "city": "Mumbai"},
+            ]
+        )
+
+        self.assertEqual(merged, {"name": "Anil Kumar", "salary": 100, "city": "Pune"})
+
+
+class DocumentIngestionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        configure_fake_backends(0, 0, 0, 0)
+        self.user = User.objects.create_user(username="documents", password="x")
+        self.bot = LoadTestChatBot(chat_id=1, user_id=self.user.id)
+
+    def upload(self, content, name="statement.pdf"):
+        return SimpleUploadedFile(name, content, "application/pdf")
+
+    def test_upload_is_read_and_parsed_once(self):
+        content = make_statement_pdf(3, seed=26)
+
+        with mock.patch(
+            "chatbot.utils.chatbot_utils.read_uploaded_file",
+            wraps=document_utils.read_uploaded_file,
+        ) as read, mock.patch(
+            "chatbot.utils.document_utils.extract_pdf_pages",
+            wraps=document_utils.extract_pdf_pages,
+        ) as parse:
+            self.assertIn("Processed", self.bot._process_pdf_file(self.upload(content)))
+            # Extraction of the same upload reuses the parsed pages
+            document_utils.get_pdf_pages(self.upload(content))
+
+        self.assertEqual(read.call_count, 1)
+        self.assertEqual(parse.call_count, 1)
+
+    @override_settings(CHATBOT_EXTRACTION_GROUP_CHARS=2000)
+    def test_large_document_is_extracted_per_page_group(self):
+        upload = self.upload(make_statement_pdf(12, seed=36))
+        groups = self.bot._get_extraction_page_groups(document_utils.get_pdf_pages(upload)[1])
+        self.assertGreater(len(groups), 1)
+
+        llm_class = type(self.bot._get_extraction_llm())
+        with mock.patch.object(
+            llm_class, "invoke", autospec=True, side_effect=llm_class.invoke
+        ) as invoke:
+            extracted = self.bot._extract_user_info_from_pdf(upload)
+
+        self.assertIsInstance(extracted, dict)
+        self.assertEqual(invoke.call_count, len(groups))
+
+    def test_same_document_is_ingested_once(self):
+        content = make_statement_pdf(2, seed=27)
+        vector_store = self.bot.vector_store
+
+        with mock.patch.object(vector_store, "upsert", wraps=vector_store.upsert) as upsert:
+            self.bot._process_pdf_file(self.upload(content))
+            result = self.bot._process_pdf_file(self.upload(content, name="copy.pdf"))
+
+        self.assertTrue(result.startswith("Document already in knowledge base"))
+        self.assertEqual(upsert.call_count, 1)
+        document = IndexedDocument.objects.get(user=self.user)
+        self.assertEqual(document.content_hash, document_utils.hash_bytes(content))
+        self.assertTrue(document.chunk_ids)
+
+
+def _near_duplicate_embeddings(seed, similarity=0.985):
+    """Two embeddings at ``similarity`` whose SimHash buckets differ in exactly one bit."""
+    rng = np.random.default_rng(seed)
+    embedding = rng.standard_normal(64)
+    scale = np.sqrt(1 / similarity**2 - 1)
+    while True:
+        noise = rng.standard_normal(64)
+        noise -= noise @ embedding / (embedding @ embedding) * embedding
+        paraphrase = embedding + noise / np.linalg.norm(noise) * np.linalg.norm(embedding) * scale
+        buckets = _embedding_bucket(embedding), _embedding_bucket(paraphrase)
+        if sum(a != b for a, b in zip(*buckets)) == 1:
+            return embedding.tolist(), paraphrase.tolist()
+
+
+class SemanticCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_rag_matches_are_found_in_a_neighbouring_bucket(self):
+        embedding, paraphrase = _near_duplicate_embeddings(seed=29)
+        matches = [{"id": "a", "score": 0.9, "metadata": {"content": "EPS"}}]
+        set_cached_rag_matches(1, 1, embedding, 5, matches)
+
+        self.assertEqual(get_cached_rag_matches(1, 1, paraphrase, 5), matches)
+        # Scoped to the user, index version and top_k
+        self.assertIsNone(get_cached_rag_matches(2, 1, paraphrase, 5))
+        self.assertIsNone(get_cached_rag_matches(1, 2, paraphrase, 5))
+        self.assertIsNone(get_cached_rag_matches(1, 1, paraphrase, 3))
+
+    def test_dissimilar_query_in_the_same_bucket_misses(self):
+        rng = np.random.default_rng(1)
+        embedding = rng.standard_normal(64)
+        set_cached_rag_matches(1, 1, embedding.tolist(), 5, [{"id": "a"}])
+
+        # An unrelated query that happens to share the cached query's bucket
+        other = rng.standard_normal(64)
+        while _embedding_bucket(other) != _embedding_bucket(embedding):
+            other = rng.standard_normal(64)
+        self.assertIsNone(get_cached_rag_matches(1, 1, other.tolist(), 5))
+
+
+class AnswerCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        configure_fake_backends(0, 0, 0, 0)
+
+    def test_paraphrased_question_gets_the_cached_answer(self):
+        embedding, paraphrase = _near_duplicate_embeddings(seed=38, similarity=0.96)
+        set_cached_answer("prompt", embedding, "What is EPS?", "Earnings per share.")
+
+        self.assertEqual(get_cached_answer("prompt", paraphrase), "Earnings per share.")
+        self.assertIsNone(get_cached_answer("other-prompt", paraphrase))
+
+    def test_prompt_key_follows_the_general_question_context(self):
+        bot = LoadTestChatBot(chat_id=1, user_id=1)
+        key = bot._get_answer_prompt_key()
+
+        with mock.patch(
+            "chatbot.utils.chatbot_utils.GENERAL_QUESTION_CONTEXT", "Answer briefly."
+        ):
+            self.assertNotEqual(bot._get_answer_prompt_key(), key)
+        with self.settings(CHATBOT_ANSWER_MODEL="another-model"):
+            self.assertNotEqual(bot._get_answer_prompt_key(), key)
+
+
+class RouteReplyTests(TestCase):
+    def setUp(self):
+        configure_fake_backends(0, 0, 0, 0)
+        self.user = User.objects.create_user(username="routes", password="x")
+        self.bot = LoadTestChatBot(chat_id=1, user_id=self.user.id)
+
+    def replies(self, intent):
+        return REGISTRY.get_sample_value("chatbot_replies_total", {"intent": intent}) or 0
+
+    def test_known_categories_are_routed_and_counted(self):
+        before = self.replies("RESOURCE_REQUEST")
+
+        self.assertEqual(
+            self.bot._route_reply({"category": "RESOURCE_REQUEST"}, None),
+            ("resources", None),
+        )
+        self.assertEqual(self.replies("RESOURCE_REQUEST"), before + 1)
+
+    def test_unknown_category_is_counted_as_other(self):
+        before = self.replies("other")
+
+        route, reply = self.bot._route_reply({"category": "Sure! Here is the JSON"}, None)
+
+        self.assertEqual(route, "reply")
+        self.assertTrue(reply)
+        self.assertEqual(self.replies("other"), before + 1)
+        self.assertIsNone(
+            REGISTRY.get_sample_value("chatbot_replies_total", {"intent": "Sure! Here is the JSON"})
+        )
+
+
+@mock.patch("chatbot.views.ChatBot", LoadTestChatBot)
+class ChatEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        configure_fake_backends(0, 0, 0, 0)
+        self.user = User.objects.create_user(username="endpoint", password="x")
+        self.url = reverse("chat_with_bot")
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    async def post(self, data, **headers):
+        return await self.async_client.post(self.url, data, headers={**self.headers, **headers})
+
+    async def read_events(self, response):
+        return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+    async def test_answer_streams_tokens_then_the_full_reply(self):
+        response = await self.post({"user_message": "What is EPS?", "stream": "true"})
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        events = [json.loads(line) for line in (await self.read_events(response)).splitlines()]
+        tokens = [event["content"] for event in events if event["type"] == "token"]
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual(events[-1]["type"], "done")
+        self.assertEqual(events[-1]["bot_reply"], "".join(tokens))
+
+        # The streamed answer is saved once the stream has finished
+        saved = [chat.content async for chat in Chat.objects.filter(user=self.user).order_by("id")]
+        self.assertEqual(saved, ["What is EPS?", "".join(tokens)])
+
+    async def test_event_stream_when_requested(self):
+        response = await self.post(
+            {"user_message": "Hello", "stream": "true"}, Accept="text/event-stream"
+        )
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        messages = (await self.read_events(response)).strip().split("\n\n")
+        self.assertTrue(all(message.startswith("data: ") for message in messages))
+        self.assertEqual(json.loads(messages[-1][len("data: "):])["type"], "done")
+
+    async def test_reply_without_streaming(self):
+        response = await self.post({"user_message": "What is EPS?"})
+
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(response.content)
+        self.assertTrue(body["success"])
+        self.assertTrue(body["bot_reply"])
+
+    async def test_requires_a_token(self):
+        response = await self.async_client.post(self.url, {"user_message": "Hello"})
+
+        self.assertEqual(response.status_code, 401)
+
+
+class AsyncPipelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        configure_fake_backends(0, 0, 0, 0)
+        self.sync_user = User.objects.create_user(username="sync", password="x")
+        self.async_user = User.objects.create_user(username="async", password="x")
+
+    def test_async_replies_match_sync_replies(self):
+        pdf = make_statement_pdf(2, seed=39)
+        turns = [
+            ("Hello", None),
+            ("How is NPS taxed at withdrawal?", None),
+            ("Show me videos about NPS vs EPF", None),
+            ("Extract my details from this document", pdf),
+        ]
+        sync_bot = LoadTestChatBot(chat_id=1, user_id=self.sync_user.id)
+        async_bot = LoadTestChatBot(chat_id=1, user_id=self.async_user.id)
+
+        for message, content in turns:
+            upload = SimpleUploadedFile("a.pdf", content, "application/pdf") if content else None
+            expected = sync_bot.reply(message, upload)
+            upload = SimpleUploadedFile("a.pdf", content, "application/pdf") if content else None
+            self.assertEqual(async_to_sync(async_bot.areply)(message, upload), expected, message)
+
+        self.assertEqual(
+            [chat.content for chat in Chat.objects.filter(user=self.async_user).order_by("id")],
+            [chat.content for chat in Chat.objects.filter(user=self.sync_user).order_by("id")],
+        )
+
+    async def test_concurrent_replies_share_the_event_loop(self):
+        configure_fake_backends(0.2, 0, 0, 0)
+        # One bot per request, as in the chat view
+        bots = [LoadTestChatBot(chat_id=1, user_id=self.async_user.id) for _ in range(5)]
+
+        started = time.perf_counter()
+        replies = await asyncio.gather(
+            *(
+                bot.areply(f"What does clause {i} of the EPF act say?", None)
+                for i, bot in enumerate(bots)
+            )
+        )
+
+        # Intent and answer calls take 0.4s per reply; run one after another they'd take 2s
+        self.assertLess(time.perf_counter() - started, 1.2)
+        self.assertTrue(all(isinstance(reply, str) and reply for reply in replies))
+
+
+class ResourceSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        configure_fake_backends(0, 0, 0, 0)
+        self.bot = LoadTestChatBot(chat_id=1, user_id=1)
+
+    def slow_search(self, results):
+        def search(query, max_results=5):
+            time.sleep(0.2)
+            return results
+
+        return search
+
+    def test_searches_run_concurrently(self):
+        self.bot._search_youtube = self.slow_search([{"title": "video"}])
+        self.bot._search_google_articles = self.slow_search([{"title": "article"}])
+
+        started = time.perf_counter()
+        resources = self.bot._search_external_resources("NPS vs EPF")
+
+        self.assertLess(time.perf_counter() - started, 0.35)
+        self.assertEqual(resources["youtube_videos"], [{"title": "video"}])
+        self.assertEqual(resources["blog_articles"], [{"title": "article"}])
+        self.assertEqual(resources["topic"], "NPS vs EPF")
+
+    def test_async_searches_run_concurrently(self):
+        async def slow_search(query, max_results=5):
+            await asyncio.sleep(0.2)
+            return [{"title": query}]
+
+        self.bot._asearch_youtube = slow_search
+        self.bot._asearch_google_articles = slow_search
+
+        started = time.perf_counter()
+        resources = async_to_sync(self.bot._asearch_external_resources)("NPS vs EPF")
+
+        self.assertLess(time.perf_counter() - started, 0.35)
+        self.assertTrue(resources["youtube_videos"])
+        self.assertTrue(resources["blog_articles"])
+
+    def test_results_are_cached_by_normalized_topic(self):
+        self.bot._search_external_resources("NPS vs EPF")
+
+        with mock.patch.object(self.bot, "_search_youtube") as youtube, mock.patch.object(
+            self.bot, "_generate_search_queries"
+        ) as queries:
+            resources = self.bot._search_external_resources("  nps VS epf ")
+
+        youtube.assert_not_called()
+        queries.assert_not_called()
+        self.assertTrue(resources["youtube_videos"])
+        # The reply still names the topic as asked
+        self.assertEqual(resources["topic"], "  nps VS epf ")
+
+    def test_empty_results_are_not_cached(self):
+        self.bot._search_youtube = self.slow_search([])
+        self.bot._search_google_articles = self.slow_search([])
+        self.bot._search_external_resources("annuity")
+
+        self.assertIsNone(cache.get(self.bot._get_resources_cache_key("annuity")))
+
+
+class LoadTestCommandTests(TestCase):
+    def test_run_leaves_no_rows_or_cache_entries(self):
+        cache.clear()
+        users = User.objects.count()
+
+        with mock.patch.dict(
+            "os.environ",
+            {"YOUTUBE_API_KEY": "key", "GOOGLE_SEARCH_API_KEY": "key", "GOOGLE_CSE_ID": "cse"},
+        ), mock.patch(
+            "chatbot.utils.chatbot_utils.get_http_session", side_effect=AssertionError
+        ), mock.patch(
+            "chatbot.utils.chatbot_utils.get_async_http_client", side_effect=AssertionError
+        ):
+            call_command(
+                "chatbot_load_test",
+                sessions=5,
+                llm_latency=0,
+                token_latency=0,
+                embedding_latency=0,
+                vector_latency=0,
+                stdout=StringIO(),
+            )
+
+        self.assertEqual(User.objects.count(), users)
+        self.assertFalse(Chat.objects.exists())
+        self.assertFalse(caches["default"]._cache)
+
+
+class HistoryWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="history", password="x")
+
+    def add_chat(self, content, sender="user"):
+        return Chat.objects.create(user=self.user, sender=sender, content=content)
+
+    def test_window_is_oldest_first_and_capped(self):
+        chats = [self.add_chat(f"message {i}") for i in range(25)]
+
+        with self.settings(CHATBOT_HISTORY_WINDOW_SIZE=20):
+            window = get_history_window(self.user.id, 20)
+
+        self.assertEqual([message[0] for message in window], [c.id for c in chats[-20:]])
+        self.assertEqual(get_history_window(self.user.id, 0), [])
+
+    def test_window_picks_up_messages_written_by_another_process(self):
+        self.add_chat("first")
+        get_history_window(self.user.id, 10)
+
+        # Written without touching this process's cached window
+        second = self.add_chat("second", sender="assistant")
+
+        window = get_history_window(self.user.id, 10)
+        self.assertEqual(window[-1], (second.id, "assistant", "second"))
+
+    def test_window_drops_deleted_messages(self):
+        first = self.add_chat("first")
+        second = self.add_chat("second")
+        get_history_window(self.user.id, 10)
+
+        # Deleted by another process: its delete signal clears only that process's local cache
+        with mock.patch("chatbot.signals.invalidate_history_window"):
+            Chat.objects.filter(id=first.id).delete()
+
+        self.assertEqual(
+            get_history_window(self.user.id, 10), [(second.id, "user", "second")]
+        )
+
+    def test_writer_flushes_a_turn_in_one_insert(self):
+        get_history_window(self.user.id, 10)
+        writer = ChatHistoryWriter(self.user.id)
+        writer.add("user", "question")
+        writer.add("assistant", "answer")
+
+        with self.assertNumQueries(1):
+            writer.flush()
+
+        window = get_history_window(self.user.id, 10)
+        self.assertEqual(
+            [(sender, content) for _, sender, content in window],
+            [("user", "question"), ("assistant", "answer")],
+        )
+        self.assertEqual(writer.pending, [])
+
+    @mock.patch("chatbot.utils.context_utils._HISTORY_LOCK_ATTEMPTS", 1)
+    def test_locked_append_falls_back_to_the_database(self):
+        get_history_window(self.user.id, 10)
+        # Another writer holds the window's append lock
+        cache.add(f"chat_history_window:{self.user.id}:lock", 1)
+
+        writer = ChatHistoryWriter(self.user.id)
+        writer.add("user", "question")
+        writer.flush()
+
+        window = get_history_window(self.user.id, 10)
+        self.assertEqual([content for _, _, content in window], ["question"])
+
+
+@mock.patch("chatbot.utils.context_utils.cache_is_shared", return_value=True)
+class SharedHistoryWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="shared", password="x")
+
+    def write(self, *contents):
+        writer = ChatHistoryWriter(self.user.id)
+        for content in contents:
+            writer.add("user", content)
+        writer.flush()
+
+    def contents(self):
+        return [content for _, _, content in get_history_window(self.user.id, 10)]
+
+    def test_warm_window_is_read_without_queries(self, shared):
+        self.write("first")
+        self.assertEqual(self.contents(), ["first"])
+        self.write("second")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.contents(), ["first", "second"])
+
+    @mock.patch("chatbot.utils.context_utils._HISTORY_LOCK_ATTEMPTS", 1)
+    def test_missed_append_lock_drops_the_cached_window(self, shared):
+        self.write("first")
+        self.contents()
+        cache.add(f"chat_history_window:{self.user.id}:lock", 1)
+
+        self.write("second")
+        cache.delete(f"chat_history_window:{self.user.id}:lock")
+
+        self.assertEqual(self.contents(), ["first", "second"])
+
+    def test_deleted_message_clears_the_window(self, shared):
+        self.write("first", "second")
+        self.contents()
+
+        Chat.objects.filter(user=self.user, content="first").delete()
+
+        self.assertEqual(self.contents(), ["second"])
+
+
+class ProfileContextTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="profile", password="x")
+        UserData.objects.create(user=self.user, name="Profile", numberOfDependants=1)
+
+    def test_profile_is_cached_in_process_until_it_changes(self):
+        self.assertIn("Number of Dependents: 1", get_profile_context(self.user.id))
+
+        with self.assertNumQueries(0):
+            get_profile_context(self.user.id)
+
+        user_data = UserData.objects.get(user=self.user)
+        user_data.numberOfDependants = 3
+        user_data.save()
+
+        self.assertIn("Number of Dependents: 3", get_profile_context(self.user.id))
+
+
+def _match(content, score, page=1):
+    return {"score": score, "metadata": {"content": content, "source": "a.pdf", "page": page}}
+
+
+class PromptBuilderTests(SimpleTestCase):
+    def setUp(self):
+        self.builder = PromptBuilder(
+            {"profile": 10, "summary": 10, "history": 30, "documents": 40}
+        )
+
+    def test_history_keeps_the_newest_messages_that_fit(self):
+        messages = [(i, "user", "x" * 40) for i in range(10)]
+
+        # 40 chars is 10 tokens plus 2 for the sender label: two messages fit in 30
+        self.assertEqual(
+            [message[0] for message in self.builder.select_history(messages, 10)], [8, 9]
+        )
+        self.assertEqual(
+            [message[0] for message in self.builder.select_history(messages, 1)], [9]
+        )
+        self.assertEqual(self.builder.select_history(messages, 0), [])
+
+    def test_documents_are_added_best_first_while_they_fit(self):
+        context = self.builder.format_documents(
+            [_match("low " * 10, 0.2), _match("best " * 10, 0.9), _match("mid " * 10, 0.5)]
+        )
+
+        self.assertTrue(context.startswith("From a.pdf (Page 1):\nbest"))
+        self.assertNotIn("low", context)
+        self.assertLessEqual(estimate_tokens(context), 40)
+
+    def test_oversized_best_document_is_truncated(self):
+        context = self.builder.format_documents([_match("word " * 200, 0.9)])
+
+        self.assertTrue(context.endswith("..."))
+        self.assertLessEqual(estimate_tokens(context), 40)
+
+    def test_sections_are_truncated_to_their_budgets(self):
+        prompt = self.builder.build(
+            "What is my balance?",
+            profile_context="P" * 400,
+            summary="S" * 400,
+            history=[(1, "assistant", "Hi there")],
+            rag_matches=[_match("balance 100", 0.9)],
+        )
+
+        self.assertIn("P" * 37 + "...", prompt)
+        self.assertNotIn("P" * 41, prompt)
+        self.assertIn("Earlier Conversation Summary:\n" + "S" * 37 + "...", prompt)
+        self.assertIn("Recent Conversation History:\nAssistant: Hi there", prompt)
+        self.assertIn("Relevant Document Information:\nFrom a.pdf (Page 1):\nbalance 100", prompt)
+
+    def test_empty_context_and_general_questions(self):
+        self.assertIn(
+            "No user income or retirement information available.", self.builder.build("Hi")
+        )
+        self.assertIn(GENERAL_QUESTION_CONTEXT, self.builder.build_general("What is EPS?"))
+
+
+class ConversationSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        configure_fake_backends(0, 0, 0, 0)
+        self.user = User.objects.create_user(username="summary", password="x")
+        self.bot = LoadTestChatBot(chat_id=1, user_id=self.user.id)
+
+    def make_window(self, count):
+        for i in range(count):
+            Chat.objects.create(
+                user=self.user, sender="user" if i % 2 == 0 else "assistant", content=f"m{i}"
+            )
+        return get_history_window(self.user.id, 20)
+
+    @override_settings(CHATBOT_SUMMARY_BATCH_SIZE=6)
+    def test_messages_are_summarized_in_batches(self):
+        window = self.make_window(9)
+
+        # Five messages older than the raw history: below the batch size
+        self.assertEqual(self.bot._get_messages_to_summarize(window, window[5:], 0), [])
+        self.assertEqual(self.bot._update_conversation_summary(window, window[5:]), "")
+        self.assertFalse(ConversationSummary.objects.filter(user=self.user).exists())
+
+        summary = self.bot._update_conversation_summary(window, window[6:])
+
+        self.assertTrue(summary)
+        self.assertEqual(get_conversation_summary(self.user.id), (summary, window[5][0]))
+
+    @override_settings(CHATBOT_SUMMARY_BATCH_SIZE=2)
+    def test_summarized_messages_are_not_summarized_again(self):
+        window = self.make_window(6)
+        self.bot._update_conversation_summary(window, window[4:])
+        _, summarized_until = get_conversation_summary(self.user.id)
+
+        self.assertEqual(summarized_until, window[3][0])
+        self.assertEqual(
+            self.bot._get_messages_to_summarize(window, window[4:], summarized_until), []
+        )
+
+
+class IngestionJobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        cache.clear()
+        configure_fake_backends(0, 0, 0, 0)
+        self.user = User.objects.create_user(username="ingestion", password="x")
+        self.bot = LoadTestChatBot(chat_id=1, user_id=self.user.id)
+
+    def enqueue(self, content):
+        upload = SimpleUploadedFile("statement.pdf", content, "application/pdf")
+        return IngestionJob.objects.get(id=self.bot._enqueue_ingestion_job(upload))
+
+    def test_enqueued_job_is_claimed_once(self):
+        job = self.enqueue(make_statement_pdf(2, seed=1))
+        self.assertEqual(job.status, "pending")
+
+        claimed = claim_next_job()
+
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.status, "running")
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNotNone(claimed.started_at)
+        self.assertIsNone(claim_next_job())
+
+    @override_settings(CHATBOT_INGESTION_LEASE_SECONDS=60)
+    def test_running_job_is_reclaimed_after_its_lease_expires(self):
+        job = self.enqueue(make_statement_pdf(2, seed=1))
+        claim_next_job()
+        self.assertIsNone(claim_next_job())
+
+        # Its worker crashed: no heartbeat for longer than the lease
+        IngestionJob.objects.filter(id=job.id).update(
+            updated_at=timezone.now() - timedelta(seconds=120)
+        )
+
+        self.assertEqual(claim_next_job().id, job.id)
+
+    @override_settings(CHATBOT_INGESTION_LEASE_SECONDS=60, CHATBOT_INGESTION_MAX_ATTEMPTS=2)
+    def test_job_fails_once_its_attempts_are_used_up(self):
+        job = self.enqueue(make_statement_pdf(2, seed=1))
+        expired = timezone.now() - timedelta(seconds=120)
+
+        # Its worker crashes on every attempt
+        for _ in range(2):
+            self.assertEqual(claim_next_job().id, job.id)
+            IngestionJob.objects.filter(id=job.id).update(updated_at=expired)
+
+        self.assertIsNone(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(job.file)
+
+    def test_completed_job_records_the_document(self):
+        job = self.enqueue(make_statement_pdf(3, seed=2))
+
+        with mock.patch("chatbot.utils.chatbot_utils.ChatBot", LoadTestChatBot):
+            job = run_ingestion_job(claim_next_job())
+
+        self.assertEqual(job.status, "completed")
+        self.assertEqual(job.progress, 100)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(job.file)
+        self.assertTrue(IndexedDocument.objects.filter(user=self.user).exists())
+
+    def test_unreadable_pdf_fails_the_job(self):
+        job = self.enqueue(b"not a pdf")
+
+        with mock.patch("chatbot.utils.chatbot_utils.ChatBot", LoadTestChatBot):
+            job = run_ingestion_job(claim_next_job())
+
+        self.assertEqual(job.status, "failed")
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim_next_job())
+
+
+class LocalVectorStoreTests(TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir, ignore_errors=True)
+        self.store = LocalVectorStore(self.base_dir)
+
+    def test_query_returns_the_closest_vectors_first(self):
+        self.store.upsert(
+            1,
+            [
+                {"id": "x", "values": [1, 0, 0], "metadata": {"content": "x"}},
+                {"id": "y", "values": [0, 1, 0], "metadata": {"content": "y"}},
+                {"id": "xy", "values": [1, 1, 0], "metadata": {"content": "xy"}},
+            ],
+        )
+
+        matches = self.store.query(1, [2, 0.1, 0], top_k=2)
+
+        self.assertEqual([match["id"] for match in matches], ["x", "xy"])
+        self.assertAlmostEqual(matches[0]["score"], 0.9988, places=3)
+        self.assertEqual(matches[0]["metadata"], {"content": "x"})
+
+    def test_upsert_replaces_existing_ids(self):
+        self.store.upsert(1, [{"id": "a", "values": [1, 0], "metadata": {"v": 1}}])
+        self.store.upsert(
+            1,
+            [
+                {"id": "a", "values": [0, 1], "metadata": {"v": 2}},
+                {"id": "b", "values": [1, 0], "metadata": {"v": 1}},
+            ],
+        )
+
+        matches = self.store.query(1, [0, 1], top_k=5)
+
+        self.assertEqual(len(matches), 2)
+        self.assertEqual(matches[0]["id"], "a")
+        self.assertEqual(matches[0]["metadata"], {"v": 2})
+
+    def test_partitions_are_per_user_and_persisted(self):
+        self.store.upsert(1, [{"id": "a", "values": [1, 0]}])
+
+        self.assertEqual(self.store.query(2, [1, 0]), [])
+        # A new instance (another worker process) reads the same files
+        self.assertEqual(
+            [match["id"] for match in LocalVectorStore(self.base_dir).query(1, [1, 0])],
+            ["a"],
+        )
@@ -3,4 +3,9 @@ from . import views
 
 urlpatterns = [
     path("answer/", views.chat_with_bot, name="chat_with_bot"),
+    path(
+        "ingestion/<int:job_id>/",
+        views.ingestion_job_status,
+        name="ingestion_job_status",
+    ),
 ]
@@ -0,0 +1,288 @@
+import hashlib
+import re
+import time
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from chatbot.metrics import STAGE_SECONDS, record_cache
+
+# Random hyperplanes for the SimHash bucket of a query embedding. Seeded so every
+# worker process computes the same bucket for the same embedding. Buckets are coarse
+# and lookups also probe the buckets one bit away: each bit of two embeddings with
+# cosine 0.95 differs with probability ~0.1, so they share a probed bucket ~89% of the time.
+_BUCKET_BITS = 6
+_hyperplanes = {}
+
+
+def cache_is_shared() -> bool:
+    """Whether cache writes (and deletes) are seen by every worker process."""
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop surrounding punctuation from a query."""
+    normalized = " ".join(query.lower().split())
+    return re.sub(r"^[^\w]+|[^\w]+$", "", normalized)
+
+
+def _embedding_bucket(embedding: List[float]) -> str:
+    """SimHash of the embedding: near-identical queries land in the same bucket."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    planes = _hyperplanes.get(len(vector))
+    if planes is None:
+        planes = np.random.default_rng(0).standard_normal((_BUCKET_BITS, len(vector)))
+        _hyperplanes[len(vector)] = planes.astype(np.float32)
+    bits = (planes @ vector) > 0
+    return "".join("1" if bit else "0" for bit in bits)
+
+
+def _probe_buckets(embedding: List[float]) -> List[str]:
+    """The embedding's own bucket followed by every bucket one bit away from it."""
+    bucket = _embedding_bucket(embedding)
+    neighbours = [
+        bucket[:i] + ("0" if bucket[i] == "1" else "1") + bucket[i + 1:]
+        for i in range(len(bucket))
+    ]
+    return [bucket] + neighbours
+
+
+def _find_similar_entry(
+    key_prefix: str, embedding: List[float], min_similarity: float, timeout: int
+) -> Optional[Dict[str, Any]]:
+    """
+    Scan the entries of the embedding's probed buckets for the most similar one.
+
+    Args:
+        key_prefix: Cache key up to (not including) the bucket
+        embedding: Embedding of the current query
+        min_similarity: Lowest cosine similarity that counts as a hit
+        timeout: Entries older than this many seconds are ignored
+
+    Returns:
+        The most similar entry at or above ``min_similarity``, or None
+    """
+    keys = [f"{key_prefix}:{bucket}" for bucket in _probe_buckets(embedding)]
+    vector = np.asarray(embedding, dtype=np.float32)
+    vector_norm = np.linalg.norm(vector)
+    oldest = time.time() - timeout
+
+    best_entry, best_similarity = None, min_similarity
+    for entries in cache.get_many(keys).values():
+        for entry in entries:
+            if entry["created"] < oldest:
+                continue
+            cached_vector = np.asarray(entry["embedding"], dtype=np.float32)
+            denominator = np.linalg.norm(cached_vector) * vector_norm
+            if not denominator:
+                continue
+            similarity = float(cached_vector @ vector / denominator)
+            if similarity >= best_similarity:
+                best_entry, best_similarity = entry, similarity
+    return best_entry
+
+
+def _add_entry(
+    key_prefix: str, embedding: List[float], entry: Dict[str, Any], max_entries: int, timeout: int
+) -> None:
+    """Add an entry to the embedding's own bucket, keeping its newest ``max_entries``."""
+    key = f"{key_prefix}:{_embedding_bucket(embedding)}"
+    oldest = time.time() - timeout
+    entries = [cached for cached in cache.get(key) or [] if cached["created"] >= oldest]
+    entries.insert(0, {**entry, "embedding": list(embedding), "created": time.time()})
+    cache.set(key, entries[:max_entries], timeout=timeout)
+
+
+def get_query_embedding(query: str, embeddings, model_name: str) -> List[float]:
+    """
+    Level one: return the embedding for a query, calling the model only on a cache miss.
+
+    Args:
+        query: The user's query
+        embeddings: LangChain embeddings object exposing ``embed_query``
+        model_name: Embedding model name, part of the cache key
+
+    Returns:
+        The query embedding
+    """
+    normalized = normalize_query(query)
+    key = _query_embedding_key(model_name, normalized)
+
+    embedding = cache.get(key)
+    record_cache("query_embedding", embedding is not None)
+    if embedding is None:
+        with STAGE_SECONDS.labels(stage="embedding").time():
+            embedding = embeddings.embed_query(normalized or query)
+        cache.set(key, embedding, timeout=settings.CHATBOT_QUERY_CACHE_TIMEOUT)
+    return embedding
+
+
+async def aget_query_embedding(query: str, embeddings, model_name: str) -> List[float]:
+    """Async ``get_query_embedding``: awaits ``aembed_query`` on a cache miss."""
+    normalized = normalize_query(query)
+    key = _query_embedding_key(model_name, normalized)
+
+    embedding = await cache.aget(key)
+    record_cache("query_embedding", embedding is not None)
+    if embedding is None:
+        with STAGE_SECONDS.labels(stage="embedding").time():
+            embedding = await embeddings.aembed_query(normalized or query)
+        await cache.aset(key, embedding, timeout=settings.CHATBOT_QUERY_CACHE_TIMEOUT)
+    return embedding
+
+
+def _query_embedding_key(model_name: str, normalized_query: str) -> str:
+    return "chat_query_embedding:" + hashlib.sha256(
+        f"{model_name}:{normalized_query}".encode("utf-8")
+    ).hexdigest()
+
+
+def _index_version_key(user_id) -> str:
+    return f"chat_index_version:{user_id}"
+
+
+def get_index_version(user_id, load_version) -> int:
+    """
+    Return the user's cached index version, calling ``load_version()`` only on a miss.
+
+    Args:
+        user_id: Owner of the indexed documents
+        load_version: Callable that reads the current version from the database
+
+    Returns:
+        The index version
+    """
+    key = _index_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = load_version()
+        cache.set(key, version, timeout=settings.CHATBOT_INDEX_VERSION_TIMEOUT)
+    return version
+
+
+def invalidate_index_version(user_id) -> None:
+    """Drop the user's cached index version once new content becomes searchable."""
+    cache.delete(_index_version_key(user_id))
+
+
+def _rag_matches_prefix(user_id, index_version, top_k) -> str:
+    return f"chat_rag_matches:{user_id}:{index_version}:{top_k}"
+
+
+def get_cached_rag_matches(
+    user_id, index_version, embedding: List[float], top_k: int
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Level two: return cached vector-store matches for a (user, index version) and a similar query.
+
+    A bucket holds different queries, so a cached entry is only used when its query
+    embedding is nearly identical to this one (CHATBOT_QUERY_CACHE_MIN_SIMILARITY).
+
+    Returns:
+        The cached matches, or None on a miss
+    """
+    entry = _find_similar_entry(
+        _rag_matches_prefix(user_id, index_version, top_k),
+        embedding,
+        settings.CHATBOT_QUERY_CACHE_MIN_SIMILARITY,
+        settings.CHATBOT_QUERY_CACHE_TIMEOUT,
+    )
+    matches = entry["matches"] if entry is not None else None
+    record_cache("rag_matches", matches is not None)
+    return matches
+
+
+def set_cached_rag_matches(
+    user_id, index_version, embedding: List[float], top_k: int, matches
+) -> None:
+    """Store vector-store matches for the embedding's bucket under the current index version."""
+    _add_entry(
+        _rag_matches_prefix(user_id, index_version, top_k),
+        embedding,
+        {"matches": matches},
+        settings.CHATBOT_QUERY_CACHE_BUCKET_SIZE,
+        settings.CHATBOT_QUERY_CACHE_TIMEOUT,
+    )
+
+
+# First-person words mean the question is about the user, so its answer can't be shared
+_PERSONAL_PATTERN = re.compile(
+    r"\b(?:i|i'm|i've|i'd|i'll|me|my|mine|myself|we|our|ours|us)\b", re.IGNORECASE
+)
+_ANSWER_VERSION_KEY = "chat_answer_cache_version"
+
+
+def is_user_independent(query: str, intent: Dict[str, Any]) -> bool:
+    """
+    Whether a question's answer is the same for every user (e.g. "What is EPS?").
+
+    Both the intent classifier (its ``personalized`` flag) and a first-person word
+    check have to agree; a missing flag counts as personalized.
+    """
+    if intent.get("personalized") is not False:
+        return False
+    return not _PERSONAL_PATTERN.search(query)
+
+
+def _answer_cache_version() -> int:
+    version = cache.get(_ANSWER_VERSION_KEY)
+    if version is None:
+        cache.add(_ANSWER_VERSION_KEY, 1, timeout=None)
+        version = cache.get(_ANSWER_VERSION_KEY, 1)
+    return version
+
+
+def _answer_prefix(prompt_key: str) -> str:
+    return f"chat_answer:{_answer_cache_version()}:{prompt_key}"
+
+
+def get_cached_answer(prompt_key: str, embedding: List[float]) -> Optional[str]:
+    """
+    Return a cached answer to a previously asked, semantically equivalent question.
+
+    Args:
+        prompt_key: Identifies the model and prompt that produced the answers
+        embedding: Embedding of the current question
+
+    Returns:
+        The most similar cached answer above CHATBOT_ANSWER_CACHE_MIN_SIMILARITY, or None
+    """
+    entry = _find_similar_entry(
+        _answer_prefix(prompt_key),
+        embedding,
+        settings.CHATBOT_ANSWER_CACHE_MIN_SIMILARITY,
+        settings.CHATBOT_ANSWER_CACHE_TIMEOUT,
+    )
+    answer = entry["answer"] if entry is not None else None
+    record_cache("answer", answer is not None)
+    return answer
+
+
+def set_cached_answer(
+    prompt_key: str, embedding: List[float], question: str, answer: str
+) -> None:
+    """Add an answer to its embedding bucket, keeping the newest CHATBOT_ANSWER_CACHE_BUCKET_SIZE entries."""
+    _add_entry(
+        _answer_prefix(prompt_key),
+        embedding,
+        {"question": question, "answer": answer},
+        settings.CHATBOT_ANSWER_CACHE_BUCKET_SIZE,
+        settings.CHATBOT_ANSWER_CACHE_TIMEOUT,
+    )
+
+
+def purge_answer_cache() -> int:
+    """
+    Drop every cached answer by moving to a new key version (old entries expire on their own).
+
+    Returns:
+        The new answer cache version
+    """
+    try:
+        return cache.incr(_ANSWER_VERSION_KEY)
+    except ValueError:
+        cache.set(_ANSWER_VERSION_KEY, 2, timeout=None)
+        return 2
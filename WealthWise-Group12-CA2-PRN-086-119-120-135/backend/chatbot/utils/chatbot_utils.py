@@ -1,61 +1,141 @@
 import os
 import asyncio
+import inspect
 import json
-import tempfile
-import uuid
-import requests
+import hashlib
 import re
-from typing import List, Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from langchain_core.runnables import RunnableSequence
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from pinecone import Pinecone, ServerlessSpec
-
-from users.models import UserData, IncomeStatus, RetirementInfo
-from chatbot.models import Chat
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from chatbot.metrics import (
+    STAGE_SECONDS,
+    VECTOR_STORE_SECONDS,
+    record_cache,
+    record_llm_usage,
+    record_reply,
+)
+from chatbot.models import IndexedDocument, IngestionJob
 from chatbot.prompts import (
-    ANSWER_USER_QUERY_PROMPT,
     INTERPRETER_USER_REQUEST,
+    ANSWER_USER_QUERY_PROMPT,
     EXTRACT_USER_INFO_PROMPT,
     SEARCH_QUERY_GENERATOR_PROMPT,
+    SUMMARIZE_CONVERSATION_PROMPT,
 )
 from chatbot.utils.text_utils import extract_json_from_text
+from chatbot.utils.document_utils import (
+    read_uploaded_file,
+    hash_bytes,
+    hash_text,
+    make_chunk_id,
+    get_pdf_pages,
+    get_pdf_pages_from_bytes,
+)
+from chatbot.utils.vector_store_utils import get_vector_store
+from chatbot.utils.cache_utils import (
+    normalize_query,
+    get_query_embedding,
+    aget_query_embedding,
+    get_cached_rag_matches,
+    set_cached_rag_matches,
+    get_index_version,
+    invalidate_index_version,
+    is_user_independent,
+    get_cached_answer,
+    set_cached_answer,
+)
+from chatbot.utils.context_utils import (
+    ChatHistoryWriter,
+    get_profile_context,
+    get_history_window,
+    get_conversation_summary,
+    save_conversation_summary,
+)
+from chatbot.utils.prompt_utils import GENERAL_QUESTION_CONTEXT, PromptBuilder
+from chatbot.utils.extraction_utils import (
+    select_relevant_pages,
+    group_pages,
+    merge_extractions,
+)
+from chatbot.utils.http_utils import get_http_session, get_async_http_client
 
 from config import GOOGLE_API_KEY
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Fixed replies, shared by the sync and async pipelines
+_INCOMPLETE_REQUEST_REPLY = "Can you elaborate on it or try rephrasing it?"
+_MISSING_PDF_REPLY = "Please upload a PDF document to extract your information."
+_REPHRASE_REPLY = "Can you rephrase your question properly."
+_PDF_FAILED_REPLY = "I encountered an issue processing your PDF, but I'll try to answer your question with available information."
+_NO_ANSWER_REPLY = "Sorry, I couldn't come up with an answer."
+_ANSWER_ERROR_REPLY = "An error occurred while generating a response"
+_EXTRACTION_ERROR_REPLY = "Sorry, I encountered an error while processing your document. Please make sure it's a valid PDF file."
+
+
+class _AnswerStream:
+    """Collects a streamed answer's chunks and records its latency metrics."""
+
+    def __init__(self):
+        self.parts = []
+        self.started = time.perf_counter()
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+
+    def add(self, chunk) -> Optional[str]:
+        """Record an LLM chunk; returns its text, or None if it has none to send."""
+        record_llm_usage("answer", chunk)
+        if not chunk.content:
+            return None
+        if not self.parts:
+            STAGE_SECONDS.labels(stage="answer_llm_first_token").observe(
+                time.perf_counter() - self.started
+            )
+        self.parts.append(chunk.content)
+        return chunk.content
+
+    def finish(self) -> Optional[str]:
+        """Record the answer latency; returns a fallback to send if the LLM produced no text."""
+        STAGE_SECONDS.labels(stage="answer_llm").observe(time.perf_counter() - self.started)
+        if self.parts:
+            return None
+        self.parts.append(_NO_ANSWER_REPLY)
+        return self.parts[-1]
+
+    def fail(self, error: Exception) -> str:
+        print("An error occurred while streaming a response: ", error)
+        self.parts.append(_ANSWER_ERROR_REPLY)
+        return self.parts[-1]
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
 
 class ChatBot:
     def __init__(self, chat_id: int, user_id: int):
         # self.chat = Chat.objects.get(id=chat_id)
         self.user_id = user_id
+        self.ingestion_job_id = None
+        self.history_writer = ChatHistoryWriter(user_id)
 
-        # Initialize Pinecone and embeddings
-        self.pinecone_api_key = os.getenv("PINECONE_API_KEY")
-        self.pinecone_environment = os.getenv("PINECONE_ENVIRONMENT", "us-east-1")
-        self.index_name = os.getenv("PINECONE_INDEX_NAME", "pension-chatbot")
-
-        # Initialize Pinecone client
-        if self.pinecone_api_key:
-            self.pc = Pinecone(api_key=self.pinecone_api_key)
-            self._initialize_pinecone_index()
-        else:
-            self.pc = None
-            print(
-                "Warning: Pinecone API key not found. RAG functionality will be disabled."
-            )
+        # Vector store for RAG (Pinecone or the local on-disk index)
+        self.vector_store = self._get_vector_store()
+        if not self.vector_store:
+            print("Warning: vector store unavailable. RAG functionality will be disabled.")
 
         # Initialize embeddings model
-        try:
-            asyncio.get_running_loop()
-        except RuntimeError:
-            asyncio.set_event_loop(asyncio.new_event_loop())
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/embedding-001", google_api_key=GOOGLE_API_KEY
-        )
+        self.embeddings = self._get_embeddings()
 
         # Text splitter for chunking documents
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -64,81 +144,118 @@ class ChatBot:
             length_function=len,
         )
 
-    def _initialize_pinecone_index(self):
-        """Initialize Pinecone index if it doesn't exist."""
-        try:
-            # Check if index exists
-            existing_indexes = [index.name for index in self.pc.list_indexes()]
+    def _get_vector_store(self):
+        return get_vector_store()
 
-            if self.index_name not in existing_indexes:
-                # Create index with appropriate dimensions for Google embeddings
-                self.pc.create_index(
-                    name=self.index_name,
-                    dimension=768,  # Google embedding-001 dimension
-                    metric="cosine",
-                    spec=ServerlessSpec(cloud="aws", region=self.pinecone_environment),
-                )
-                print(f"Created Pinecone index: {self.index_name}")
+    def _get_embeddings(self):
+        return GoogleGenerativeAIEmbeddings(
+            model="models/embedding-001", google_api_key=GOOGLE_API_KEY
+        )
 
-            # Connect to the index
-            self.index = self.pc.Index(self.index_name)
-        except Exception as e:
-            print(f"Error initializing Pinecone index: {e}")
-            self.index = None
+    def reply(self, user_message, file, stream=False):
+        """
+        Answer a chat message.
 
-    def reply(self, user_message, file):
-        has_uploaded_document = True if file else False
+        With ``stream=True`` answers to questions are returned as a generator of
+        text chunks (saved to history once the stream closes); other intents
+        still return their complete response.
+
+        The turn's messages are written to chat history together once the reply is ready.
+        """
+        response = None
+        try:
+            with STAGE_SECONDS.labels(stage="reply").time():
+                response = self._reply(user_message, file, stream)
+            return response
+        finally:
+            # A streamed answer flushes the history when its generator closes
+            if not inspect.isgenerator(response):
+                self._flush_history()
 
+    def _reply(self, user_message, file, stream=False):
         # Save user message to chat history
         self._save_message_to_history(user_message, "user")
 
         # First, determine user intent before processing any files
-        intent = self._get_message_intent(user_message, has_uploaded_document)
-
-        if intent.get("category") == "INCOMPLETE_REQUEST":
-            response = "Can you elaborate on it or try rephrasing it?"
-            self._save_message_to_history(response, "assistant")
+        intent = self._get_message_intent(user_message, bool(file))
+        route, response = self._route_reply(intent, file)
+        if route == "reply":
             return response
 
         # Handle extraction request - process PDF for extraction only
-        if intent.get("category") == "EXTRACT_USER_INFO_FROM_DOCUMENT":
-            if file and self._is_pdf_file(file):
-                extraction_result = self._extract_user_info_from_pdf(file)
-                # self._save_message_to_history(f"{extraction_result}", "assistant")
-                return extraction_result
-            response = "Please upload a PDF document to extract your information."
-            self._save_message_to_history(response, "assistant")
-            return response
+        if route == "extract":
+            return self._extract_user_info_from_pdf(file)
 
         # Handle resource requests - search for external resources
-        if intent.get("category") == "RESOURCE_REQUEST":
+        if route == "resources":
             topic = intent.get("topic", user_message)
             resources = self._search_external_resources(topic)
             self._save_message_to_history(f"Found resources for: {topic}", "assistant")
             return resources
 
-        # Handle questions or general queries - process PDF for RAG if needed
-        if intent.get("category") in ["QUESTION", "GENERAL"]:
-            # Process PDF for RAG only if it's a question/general query and file is uploaded
+        # Questions or general queries: index an uploaded PDF for RAG first
+        if file and self._is_pdf_file(file):
+            if settings.CHATBOT_ASYNC_INGESTION:
+                # Hand ingestion to the background worker; the answer uses what is already indexed
+                self.ingestion_job_id = self._enqueue_ingestion_job(file)
+            elif not self._process_pdf_file(file):
+                self._save_message_to_history(_PDF_FAILED_REPLY, "assistant")
+
+        # User-independent questions are answered without user context, and
+        # semantically equivalent ones share a cached answer
+        shared_embedding = self._get_shared_answer_embedding(user_message, intent, file)
+        if shared_embedding is not None:
+            cached_answer = get_cached_answer(
+                self._get_answer_prompt_key(), shared_embedding
+            )
+            if cached_answer:
+                self._save_message_to_history(cached_answer, "assistant")
+                return cached_answer
+
+        if stream:
+            return self._stream_user_query(
+                user_message, file, shared_embedding=shared_embedding
+            )
+
+        answer = self._answer_user_query(
+            user_message, file, shared_embedding=shared_embedding
+        )
+        self._save_message_to_history(answer, "assistant")
+        return answer
+
+    def _route_reply(self, intent: Dict[str, Any], file) -> Tuple[str, Optional[str]]:
+        """
+        Decide how to handle a classified message; shared by ``_reply`` and ``_areply``.
+
+        Returns:
+            (route, reply): route is "extract", "resources" or "answer"; or "reply"
+            with a fixed reply, which has already been queued for the history
+        """
+        category = intent.get("category")
+        record_reply(category)
+
+        if category == "EXTRACT_USER_INFO_FROM_DOCUMENT":
             if file and self._is_pdf_file(file):
-                pdf_processing_result = self._process_pdf_file(file)
-                if pdf_processing_result:
-                    # Continue to answer the question using the processed PDF
-                    pass
-                else:
-                    response = "I encountered an issue processing your PDF, but I'll try to answer your question with available information."
-                    self._save_message_to_history(response, "assistant")
-
-            answer = self._answer_user_query(user_message, file)
-            self._save_message_to_history(answer, "assistant")
-            return answer
-
-        response = "Can you rephrase your question properly."
-        self._save_message_to_history(response, "assistant")
-        return response
+                return "extract", None
+            reply = _MISSING_PDF_REPLY
+        elif category == "RESOURCE_REQUEST":
+            return "resources", None
+        elif category in ["QUESTION", "GENERAL"]:
+            return "answer", None
+        elif category == "INCOMPLETE_REQUEST":
+            reply = _INCOMPLETE_REQUEST_REPLY
+        else:
+            reply = _REPHRASE_REPLY
+
+        self._save_message_to_history(reply, "assistant")
+        return "reply", reply
 
     def _answer_user_query(
-        self, user_message: str, file=None, max_history_messages=10
+        self,
+        user_message: str,
+        file=None,
+        max_history_messages=10,
+        shared_embedding: Optional[List[float]] = None,
     ) -> str:
         """
         Answers a user query by providing context from IncomeStatus, RetirementInfo, conversation history, and RAG.
@@ -148,105 +265,196 @@ class ChatBot:
             user_message: The current user message
             file: Optional file attachment
             max_history_messages: Maximum number of previous messages to include in context
+            shared_embedding: Query embedding of a user-independent question; the question is
+                answered without user context and the answer is added to the shared cache
         """
-        llm = ChatGoogleGenerativeAI(
-            google_api_key=GOOGLE_API_KEY,
-            model="gemini-2.5-flash",
-            temperature=0.6,
+        llm = self._get_answer_llm()
+        prompt = self._get_answer_prompt(
+            user_message, max_history_messages, shared_embedding
         )
 
-        # Build context from DB
-        context_parts = []
-        try:
-            basic_data = UserData.objects.filter(user_id=self.user_id).first()
-            if basic_data:
-                context_parts.append(
-                    f"""
-                    User Info:
-                    - Date of Birth: {basic_data.dateOfBirth}
-                    - Gender: {basic_data.gender}
-                    - Location: {basic_data.location}
-                    - Marital Status: {basic_data.maritalStatus}
-                    - Number of Dependents: {basic_data.numberOfDependants}
-                    """
-                )
-            income_status = IncomeStatus.objects.filter(user_id=self.user_id).first()
-            if income_status:
-                context_parts.append(
-                    f"""
-                    Income Information:
-                    - Current Salary: {income_status.currentSalary}
-                    - Years of Service: {income_status.yearsOfService}
-                    - Employer Type: {income_status.employerType}
-                    - Pension Scheme: {income_status.pensionScheme}
-                    - Pension Balance: {income_status.pensionBalance}
-                    - Employer Contribution: {income_status.employerContribution or "Not provided"}
-                    """
+        try:
+            with STAGE_SECONDS.labels(stage="answer_llm").time():
+                response = llm.invoke(prompt)
+            record_llm_usage("answer", response)
+            if response and response.content and shared_embedding is not None:
+                self._cache_shared_answer(
+                    shared_embedding, user_message, response.content
                 )
+            return response.content if response else _NO_ANSWER_REPLY
+        except Exception as e:
+            print("An error occurred while generating a response: ", e)
+            return _ANSWER_ERROR_REPLY
+
+    def _stream_user_query(
+        self,
+        user_message: str,
+        file=None,
+        max_history_messages=10,
+        shared_embedding: Optional[List[float]] = None,
+    ):
+        """
+        Streaming variant of ``_answer_user_query``: yields answer text as the LLM produces it.
 
-            retirement_info = RetirementInfo.objects.filter(
-                user_id=self.user_id
-            ).first()
-            if retirement_info:
-                context_parts.append(
-                    f"""
-                    Retirement Plan:
-                    - Planned Retirement Age: {retirement_info.plannedRetirementAge}
-                    - Lifestyle Goal: {retirement_info.retirementLifestyle}
-                    - Estimated Monthly Expenses in Retirement: {retirement_info.monthlyRetirementExpense}
-                    - Legacy Goal: {retirement_info.legacyGoal}
-                    - Plan Created At: {retirement_info.created_at}
-                    """
-                )
+        The full answer is saved to chat history when the stream closes, including
+        when the client disconnects part-way through.
 
+        Args:
+            user_message: The current user message
+            file: Optional file attachment
+            max_history_messages: Maximum number of previous messages to include in context
+            shared_embedding: See ``_answer_user_query``; only complete answers are cached
+        """
+        llm = self._get_answer_llm()
+        answer = _AnswerStream()
+        try:
+            prompt = self._get_answer_prompt(
+                user_message, max_history_messages, shared_embedding
+            )
+            answer.start()
+            for chunk in llm.stream(prompt):
+                text = answer.add(chunk)
+                if text:
+                    yield text
+            fallback = answer.finish()
+            if fallback:
+                yield fallback
+            elif shared_embedding is not None:
+                self._cache_shared_answer(shared_embedding, user_message, answer.text)
         except Exception as e:
-            print("Error while fetching user context:", e)
+            yield answer.fail(e)
+        finally:
+            self._save_message_to_history(answer.text, "assistant")
+            self._flush_history()
 
-        # Build conversation history context
-        history_context = self._get_conversation_history(max_history_messages)
-        if history_context:
-            context_parts.append(f"Recent Conversation History:\n{history_context}")
-
-        # Get relevant context from RAG (Pinecone)
-        rag_context = self._get_rag_context(user_message)
-        if rag_context:
-            context_parts.append(f"Relevant Document Information:\n{rag_context}")
-
-        # Merge context
-        context = (
-            "\n".join(context_parts)
-            if context_parts
-            else "No user income or retirement information available."
+    def _get_answer_llm(self):
+        return ChatGoogleGenerativeAI(
+            google_api_key=GOOGLE_API_KEY,
+            model=settings.CHATBOT_ANSWER_MODEL,
+            temperature=0.6,
         )
 
-        prompt = ANSWER_USER_QUERY_PROMPT.format(
-            user_query=user_message.strip(), context=context
+    def _get_answer_prompt_key(self) -> str:
+        """Namespace for shared answers; changes with the answer model, prompt or general context."""
+        signature = (
+            f"{settings.CHATBOT_ANSWER_MODEL}:{ANSWER_USER_QUERY_PROMPT}:{GENERAL_QUESTION_CONTEXT}"
+        )
+        return hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
+
+    def _get_shared_answer_embedding(
+        self, user_message: str, intent: Dict[str, Any], file=None
+    ) -> Optional[List[float]]:
+        """
+        Embedding used to look up and store a shared answer for this message.
+
+        Returns:
+            The query embedding if the message is a user-independent question that can
+            use the shared answer cache, otherwise None
+        """
+        if not self._uses_shared_answer(user_message, intent, file):
+            return None
+
+        try:
+            return get_query_embedding(
+                user_message, self.embeddings, self.embeddings.model
+            )
+        except Exception as e:
+            print(f"Error embedding query for the answer cache: {e}")
+            return None
+
+    def _uses_shared_answer(self, user_message: str, intent: Dict[str, Any], file) -> bool:
+        return (
+            settings.CHATBOT_ANSWER_CACHE
+            and not file
+            and is_user_independent(user_message, intent)
         )
 
+    def _cache_shared_answer(
+        self, embedding: List[float], user_message: str, answer: str
+    ) -> None:
         try:
-            response = llm.invoke(prompt)
-            print(response)
-            return (
-                response.content
-                if response
-                else "Sorry, I couldn't come up with an answer."
+            set_cached_answer(
+                self._get_answer_prompt_key(), embedding, user_message, answer
             )
         except Exception as e:
-            print("An error occurred while generating a response: ", e)
-            return "An error occurred while generating a response"
+            print(f"Error caching shared answer: {e}")
+
+    def _get_answer_prompt(
+        self,
+        user_message: str,
+        max_history_messages=10,
+        shared_embedding: Optional[List[float]] = None,
+    ) -> str:
+        """User-independent questions get the general prompt, others the full user context."""
+        if shared_embedding is not None:
+            return PromptBuilder().build_general(user_message)
+        return self._build_answer_prompt(user_message, max_history_messages)
+
+    def _build_answer_prompt(self, user_message: str, max_history_messages=10) -> str:
+        """
+        Builds the answer prompt from IncomeStatus, RetirementInfo, conversation history, and RAG context,
+        keeping each section within its token budget (settings.CHATBOT_PROMPT_BUDGETS).
+
+        Args:
+            user_message: The current user message
+            max_history_messages: Maximum number of previous messages to include in context
+
+        Returns:
+            The formatted ANSWER_USER_QUERY_PROMPT
+        """
+        prompt_builder = PromptBuilder()
+
+        # Profile context (cached per user, invalidated when the profile models change)
+        profile_context = self._get_profile_context()
+
+        # Recent raw messages that fit the history budget; older ones live in the summary
+        with STAGE_SECONDS.labels(stage="history").time():
+            window = self._get_history_window()
+            history = prompt_builder.select_history(window, max_history_messages)
+        summary = self._update_conversation_summary(window, history)
+
+        # Get relevant context from RAG (vector store)
+        with STAGE_SECONDS.labels(stage="rag").time():
+            rag_matches = self._get_rag_matches(user_message)
+
+        return prompt_builder.build(
+            user_message,
+            profile_context=profile_context,
+            summary=summary,
+            history=history,
+            rag_matches=rag_matches,
+        )
+
+    def _get_profile_context(self) -> str:
+        try:
+            with STAGE_SECONDS.labels(stage="profile_context").time():
+                return get_profile_context(self.user_id)
+        except Exception as e:
+            print("Error while fetching user context:", e)
+            return ""
 
     def _get_message_intent(self, user_message, has_uploaded_document=False):
-        prompt = INTERPRETER_USER_REQUEST.format(
+        prompt = self._build_intent_prompt(user_message, has_uploaded_document)
+        interpreter_llm = self._get_interpreter_llm()
+        with STAGE_SECONDS.labels(stage="intent_llm").time():
+            message = interpreter_llm.invoke(prompt)
+        record_llm_usage("intent", message)
+        return self._parse_message_intent(message.content)
+
+    def _build_intent_prompt(self, user_message: str, has_uploaded_document: bool) -> str:
+        return INTERPRETER_USER_REQUEST.format(
             user_message=user_message.strip(),
             has_uploaded_document=has_uploaded_document,
         )
-        interpreter_llm = ChatGoogleGenerativeAI(
+
+    def _get_interpreter_llm(self):
+        return ChatGoogleGenerativeAI(
             google_api_key=GOOGLE_API_KEY,
             model="gemini-2.5-flash",
             temperature=0.7,
         )
-        response = interpreter_llm.predict(prompt)
 
+    def _parse_message_intent(self, response: str) -> Dict[str, Any]:
         try:
             data = extract_json_from_text(response)
 
@@ -259,49 +467,106 @@ class ChatBot:
             print(f"An error occurred: {e}")
             return {"category": "INCOMPLETE", "error": str(e)}
 
-    def _get_conversation_history(self, max_messages=10) -> str:
+    def _get_history_window(self) -> List[tuple]:
         """
-        Retrieves recent conversation history for the user.
-
-        Args:
-            max_messages: Maximum number of messages to retrieve
+        Retrieves the recent conversation window for the user.
 
         Returns:
-            Formatted conversation history string
+            (chat_id, sender, content) tuples in chronological order (oldest first)
         """
         try:
-            # Get recent chat messages for this user, ordered by creation time (newest first)
-            recent_chats = Chat.objects.filter(user_id=self.user_id).order_by(
-                "-created_at"
-            )[:max_messages]
+            return get_history_window(
+                self.user_id, settings.CHATBOT_HISTORY_WINDOW_SIZE
+            )
+        except Exception as e:
+            print(f"Error retrieving conversation history: {e}")
+            return []
 
-            if not recent_chats:
-                return ""
+    def _update_conversation_summary(self, window: List[tuple], history: List[tuple]) -> str:
+        """
+        Fold messages that no longer fit the raw history into the rolling summary.
 
-            # Reverse to get chronological order (oldest first)
-            recent_chats = list(reversed(recent_chats))
+        Messages are summarized in batches of CHATBOT_SUMMARY_BATCH_SIZE so the
+        summarization LLM runs every few turns rather than on every message.
 
-            history_parts = []
-            for chat in recent_chats:
-                sender_label = "User" if chat.sender == "user" else "Assistant"
-                history_parts.append(f"{sender_label}: {chat.content}")
+        Args:
+            window: Recent (chat_id, sender, content) tuples, oldest first
+            history: The tail of ``window`` that goes into the prompt verbatim
 
-            return "\n".join(history_parts)
+        Returns:
+            The current summary text
+        """
+        try:
+            summary, summarized_until = get_conversation_summary(self.user_id)
+            pending = self._get_messages_to_summarize(window, history, summarized_until)
+            if not pending:
+                return summary
+
+            llm = self._get_summary_llm()
+            prompt = self._build_summary_prompt(summary, pending)
+            with STAGE_SECONDS.labels(stage="summary_llm").time():
+                response = llm.invoke(prompt)
+            new_summary = self._parse_summary(response)
+            if not new_summary:
+                return summary
+            save_conversation_summary(self.user_id, new_summary, pending[-1][0])
+            return new_summary
 
         except Exception as e:
-            print(f"Error retrieving conversation history: {e}")
+            print(f"Error updating conversation summary: {e}")
             return ""
 
+    def _get_messages_to_summarize(
+        self, window: List[tuple], history: List[tuple], summarized_until: int
+    ) -> List[tuple]:
+        """
+        Messages in ``window`` newer than the summary but older than the raw history.
+
+        Returns:
+            The messages to fold into the summary, or an empty list until there are
+            at least CHATBOT_SUMMARY_BATCH_SIZE of them
+        """
+        first_raw_id = history[0][0] if history else None
+        pending = [
+            message
+            for message in window
+            if message[0] > summarized_until
+            and (first_raw_id is None or message[0] < first_raw_id)
+        ]
+        return pending if len(pending) >= settings.CHATBOT_SUMMARY_BATCH_SIZE else []
+
+    def _parse_summary(self, response) -> str:
+        record_llm_usage("summary", response)
+        return response.content.strip() if response and response.content else ""
+
+    def _get_summary_llm(self):
+        return ChatGoogleGenerativeAI(
+            google_api_key=GOOGLE_API_KEY,
+            model="gemini-2.5-flash",
+            temperature=0.2,
+        )
+
+    def _build_summary_prompt(self, summary: str, pending: List[tuple]) -> str:
+        return SUMMARIZE_CONVERSATION_PROMPT.format(
+            summary=summary or "(empty)",
+            messages=PromptBuilder().format_history(pending),
+            max_words=settings.CHATBOT_PROMPT_BUDGETS["summary"] // 2,
+        )
+
     def _save_message_to_history(self, message: str, sender: str):
         """
-        Saves a message to the chat history.
+        Queues a message for the chat history; it is written by ``_flush_history``.
 
         Args:
             message: The message content to save
             sender: Either 'user' or 'assistant'
         """
+        self.history_writer.add(sender, message)
+
+    def _flush_history(self):
+        """Writes the queued chat messages in one batch."""
         try:
-            Chat.objects.create(user_id=self.user_id, sender=sender, content=message)
+            self.history_writer.flush()
         except Exception as e:
             print(f"Error saving message to history: {e}")
 
@@ -313,61 +578,130 @@ class ChatBot:
             return file.content_type == "application/pdf"
         return False
 
-    def _process_pdf_file(self, file) -> Optional[str]:
+    def _enqueue_ingestion_job(self, file) -> Optional[int]:
         """
-        Process PDF file: extract text, create embeddings, and store in Pinecone.
+        Store the uploaded PDF and queue it for the background ingestion worker.
 
         Args:
             file: The uploaded PDF file
 
+        Returns:
+            ID of the created IngestionJob or None if it could not be queued
+        """
+        try:
+            source = getattr(file, "name", "uploaded_pdf")[:255]
+            job = IngestionJob(user_id=self.user_id, source=source)
+            job.file.save(source, file, save=False)
+            job.save()
+            return job.id
+        except Exception as e:
+            print(f"Error queuing ingestion job: {e}")
+            return None
+
+    def _process_pdf_file(
+        self, file, source: Optional[str] = None, progress_callback=None
+    ) -> Optional[str]:
+        """
+        Process PDF file: extract text, create embeddings, and store in the vector store.
+
+        Args:
+            file: The uploaded PDF file
+            source: Display name stored with each chunk (defaults to the file name)
+            progress_callback: Optional callable receiving (processed_chunks, total_chunks)
+
         Returns:
             Success message or None if failed
         """
-        if not self.pc or not self.index:
-            return "RAG functionality is not available (Pinecone not configured)."
+        source = source or getattr(file, "name", "uploaded_pdf")
+        if not self.vector_store:
+            return "RAG functionality is not available (vector store not configured)."
 
         try:
-            # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-                for chunk in file.chunks():
-                    temp_file.write(chunk)
-                temp_file_path = temp_file.name
+            # Read the upload once: its hash is both the dedup key and the page-text cache key
+            data = read_uploaded_file(file)
+            document_hash = hash_bytes(data)
+
+            # Skip documents this user has already ingested
+            existing_document = IndexedDocument.objects.filter(
+                user_id=self.user_id, content_hash=document_hash
+            ).first()
+            if existing_document:
+                return f"Document already in knowledge base ({len(existing_document.chunk_ids)} chunks)."
 
-            # Load and process PDF
-            loader = PyPDFLoader(temp_file_path)
-            documents = loader.load()
+            # Parse the PDF in memory (shared with extraction via the page-text cache)
+            pages = get_pdf_pages_from_bytes(data, document_hash)
+            documents = [
+                Document(page_content=text, metadata={"source": source, "page": page})
+                for page, text in enumerate(pages)
+            ]
 
             # Split documents into chunks
             chunks = self.text_splitter.split_documents(documents)
 
-            # Process chunks and store in Pinecone
+            # Chunks already stored for this user (from other documents) are not re-embedded
+            indexed_chunk_ids = set()
+            for chunk_ids in IndexedDocument.objects.filter(
+                user_id=self.user_id
+            ).values_list("chunk_ids", flat=True):
+                indexed_chunk_ids.update(chunk_ids)
+
+            # Process chunks and store in the vector store
+            document_chunk_ids = []
+            seen_chunk_ids = set()
             vectors_to_upsert = []
+            embedding_started = time.perf_counter()
             for i, chunk in enumerate(chunks):
+                # Content-addressed ID for this chunk
+                chunk_hash = hash_text(chunk.page_content)
+                chunk_id = make_chunk_id(self.user_id, chunk_hash)
+                if chunk_id in seen_chunk_ids:
+                    continue
+                seen_chunk_ids.add(chunk_id)
+                document_chunk_ids.append(chunk_id)
+                if chunk_id in indexed_chunk_ids:
+                    continue
+
                 # Generate embedding
                 embedding = self.embeddings.embed_query(chunk.page_content)
 
-                # Create unique ID for this chunk
-                chunk_id = f"user_{self.user_id}_pdf_{uuid.uuid4().hex[:8]}_{i}"
-
                 # Prepare metadata
                 metadata = {
                     "user_id": str(self.user_id),
                     "content": chunk.page_content,
-                    "source": getattr(file, "name", "uploaded_pdf"),
+                    "source": source,
                     "page": chunk.metadata.get("page", 0),
                     "chunk_index": i,
+                    "content_hash": chunk_hash,
+                    "document_hash": document_hash,
                 }
 
                 vectors_to_upsert.append(
                     {"id": chunk_id, "values": embedding, "metadata": metadata}
                 )
 
-            # Batch upsert to Pinecone
-            if vectors_to_upsert:
-                self.index.upsert(vectors=vectors_to_upsert)
+                if progress_callback:
+                    progress_callback(i + 1, len(chunks))
 
-            # Clean up temporary file
-            os.unlink(temp_file_path)
+            # Batch upsert to the vector store
+            if vectors_to_upsert:
+                STAGE_SECONDS.labels(stage="document_embedding").observe(
+                    time.perf_counter() - embedding_started
+                )
+                with VECTOR_STORE_SECONDS.labels(
+                    backend=self.vector_store.backend, operation="upsert"
+                ).time():
+                    self.vector_store.upsert(self.user_id, vectors_to_upsert)
+
+            # Record the document in the user's manifest
+            IndexedDocument.objects.get_or_create(
+                user_id=self.user_id,
+                content_hash=document_hash,
+                defaults={
+                    "source": source[:255],
+                    "chunk_ids": document_chunk_ids,
+                },
+            )
+            invalidate_index_version(self.user_id)
 
             return (
                 f"Processed {len(chunks)} chunks from PDF and stored in knowledge base."
@@ -375,58 +709,75 @@ class ChatBot:
 
         except Exception as e:
             print(f"Error processing PDF file: {e}")
-            # Clean up temporary file if it exists
-            try:
-                if "temp_file_path" in locals():
-                    os.unlink(temp_file_path)
-            except (OSError, FileNotFoundError):
-                pass
             return None
 
-    def _get_rag_context(self, query: str, top_k: int = 5) -> str:
+    def _get_index_version(self) -> int:
+        """
+        Version of the user's indexed documents, used to invalidate cached RAG results.
+
+        The manifest row is written after a document's vectors are upserted, so the
+        latest manifest ID changes exactly when new content becomes searchable. The
+        version is cached and cleared when ingestion records a new document.
         """
-        Retrieve relevant context from Pinecone based on the query.
+        return get_index_version(
+            self.user_id,
+            lambda: IndexedDocument.objects.filter(user_id=self.user_id)
+            .order_by("-id")
+            .values_list("id", flat=True)
+            .first()
+            or 0,
+        )
+
+    def _get_rag_matches(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Retrieve relevant document chunks from the vector store based on the query.
 
         Args:
             query: The user's query
             top_k: Number of top similar chunks to retrieve
 
         Returns:
-            Formatted context string from retrieved documents
+            High-confidence matches ({"id", "score", "metadata"}), best first
         """
-        if not self.pc or not self.index:
-            return ""
+        if not self.vector_store:
+            return []
 
         try:
-            # Generate embedding for the query
-            query_embedding = self.embeddings.embed_query(query)
-
-            # Search in Pinecone with user filter
-            search_results = self.index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True,
-                filter={"user_id": str(self.user_id)},
+            # Generate embedding for the query (cached by normalized query text)
+            query_embedding = get_query_embedding(
+                query, self.embeddings, self.embeddings.model
             )
 
-            if not search_results.matches:
-                return ""
-
-            # Format retrieved context
-            context_parts = []
-            for match in search_results.matches:
-                if match.score > 0.7:  # Only include high-confidence matches
-                    content = match.metadata.get("content", "")
-                    source = match.metadata.get("source", "document")
-                    page = match.metadata.get("page", "unknown")
-
-                    context_parts.append(f"From {source} (Page {page}):\n{content}\n")
+            # Search the user's partition of the vector store, reusing results for
+            # near-identical queries until the user ingests another document
+            index_version = self._get_index_version()
+            matches = get_cached_rag_matches(
+                self.user_id, index_version, query_embedding, top_k
+            )
+            if matches is None:
+                with VECTOR_STORE_SECONDS.labels(
+                    backend=self.vector_store.backend, operation="query"
+                ).time():
+                    matches = self.vector_store.query(
+                        self.user_id, query_embedding, top_k
+                    )
+                set_cached_rag_matches(
+                    self.user_id, index_version, query_embedding, top_k, matches
+                )
 
-            return "\n".join(context_parts) if context_parts else ""
+            return self._filter_rag_matches(matches)
 
         except Exception as e:
             print(f"Error retrieving RAG context: {e}")
-            return ""
+            return []
+
+    def _filter_rag_matches(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Only include high-confidence matches
+        return sorted(
+            (match for match in matches if match["score"] > 0.7),
+            key=lambda match: match["score"],
+            reverse=True,
+        )
 
     def _extract_user_info_from_pdf(self, file) -> str:
         """
@@ -439,54 +790,95 @@ class ChatBot:
             JSON string with extracted user information or error message
         """
         try:
-            # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-                for chunk in file.chunks():
-                    temp_file.write(chunk)
-                temp_file_path = temp_file.name
+            # Extract text from the PDF in memory
+            _, pages = get_pdf_pages(file)
 
-            # Load and extract text from PDF
-            loader = PyPDFLoader(temp_file_path)
-            documents = loader.load()
+            # Use LLM to extract structured information
+            llm = self._get_extraction_llm()
+
+            # Large documents: extract from groups of relevant pages concurrently, then merge
+            page_groups = self._get_extraction_page_groups(pages)
+            if len(page_groups) > 1:
+                return self._extract_user_info_map_reduce(llm, page_groups)
 
             # Combine all pages into one text
-            full_text = "\n".join([doc.page_content for doc in documents])
+            prompt = EXTRACT_USER_INFO_PROMPT.format(document_text="\n".join(pages))
 
-            # Clean up temporary file
-            os.unlink(temp_file_path)
+            with STAGE_SECONDS.labels(stage="extraction_llm").time():
+                response = llm.invoke(prompt)
+            record_llm_usage("extraction", response)
+            return self._parse_extracted_user_info(response.content if response else "")
 
-            # Use LLM to extract structured information
-            llm = ChatGoogleGenerativeAI(
-                google_api_key=GOOGLE_API_KEY,
-                model="gemini-2.5-flash",
-                temperature=0.1,  # Low temperature for consistent extraction
-            )
+        except Exception as e:
+            print(f"Error extracting user info from PDF: {e}")
+            return _EXTRACTION_ERROR_REPLY
+
+    def _get_extraction_llm(self):
+        return ChatGoogleGenerativeAI(
+            google_api_key=GOOGLE_API_KEY,
+            model="gemini-2.5-flash",
+            temperature=0.1,  # Low temperature for consistent extraction
+        )
 
-            prompt = EXTRACT_USER_INFO_PROMPT.format(document_text=full_text)
+    def _get_extraction_page_groups(self, pages: List[str]) -> List[str]:
+        return group_pages(
+            pages,
+            select_relevant_pages(pages, settings.CHATBOT_EXTRACTION_MAX_PAGES),
+            settings.CHATBOT_EXTRACTION_GROUP_CHARS,
+        )
 
-            response = llm.invoke(prompt)
-            extracted_text = response.content if response else ""
+    def _parse_extracted_user_info(self, extracted_text: str):
+        # Try to extract JSON from the response
+        try:
+            extracted_data = extract_json_from_text(extracted_text)
+            if extracted_data:
+                return extracted_data
+            else:
+                return "I couldn't extract structured information from the document. The document might not contain the expected personal/financial information."
+        except Exception as json_error:
+            print(f"Error parsing extracted JSON: {json_error}")
+            return f"I found some information in the document but couldn't format it properly. Raw response: {extracted_text}"
 
-            # Try to extract JSON from the response
-            try:
-                extracted_data = extract_json_from_text(extracted_text)
-                if extracted_data:
-                    return extracted_data
-                else:
-                    return "I couldn't extract structured information from the document. The document might not contain the expected personal/financial information."
-            except Exception as json_error:
-                print(f"Error parsing extracted JSON: {json_error}")
-                return f"I found some information in the document but couldn't format it properly. Raw response: {extracted_text}"
+    def _extract_user_info_map_reduce(self, llm, page_groups: List[str]):
+        """
+        Extract user information from each page group in parallel and merge the results.
 
-        except Exception as e:
-            print(f"Error extracting user info from PDF: {e}")
-            # Clean up temporary file if it exists
+        Args:
+            llm: The extraction LLM
+            page_groups: Texts of consecutive relevant pages, in document order
+
+        Returns:
+            Merged extracted data, or an error message if nothing was extracted
+        """
+
+        def extract(document_text: str) -> Dict[str, Any]:
             try:
-                if "temp_file_path" in locals():
-                    os.unlink(temp_file_path)
-            except (OSError, FileNotFoundError):
-                pass
-            return "Sorry, I encountered an error while processing your document. Please make sure it's a valid PDF file."
+                with STAGE_SECONDS.labels(stage="extraction_llm").time():
+                    response = llm.invoke(
+                        EXTRACT_USER_INFO_PROMPT.format(document_text=document_text)
+                    )
+                return self._parse_partial_extraction(response)
+            except Exception as e:
+                print(f"Error extracting user info from page group: {e}")
+                return {}
+
+        with ThreadPoolExecutor(
+            max_workers=min(len(page_groups), settings.CHATBOT_EXTRACTION_MAX_WORKERS)
+        ) as executor:
+            partials = list(executor.map(extract, page_groups))
+
+        return self._merge_extracted_user_info(partials)
+
+    def _parse_partial_extraction(self, response) -> Dict[str, Any]:
+        record_llm_usage("extraction", response)
+        extracted = extract_json_from_text(response.content if response else "")
+        return extracted if isinstance(extracted, dict) else {}
+
+    def _merge_extracted_user_info(self, partials: List[Dict[str, Any]]):
+        extracted_data = merge_extractions(partials)
+        if extracted_data:
+            return extracted_data
+        return "I couldn't extract structured information from the document. The document might not contain the expected personal/financial information."
 
     def _search_external_resources(self, topic: str) -> Dict[str, Any]:
         """
@@ -499,39 +891,76 @@ class ChatBot:
             Dictionary containing search results with videos and articles
         """
         try:
+            cache_key = self._get_resources_cache_key(topic)
+            cached_resources = cache.get(cache_key)
+            record_cache("resources", cached_resources is not None)
+            if cached_resources is not None:
+                return self._new_resources(topic, cached_resources)
+
             # Generate optimized search queries
             search_queries = self._generate_search_queries(topic)
 
-            resources = {
-                "topic": topic,
-                "youtube_videos": [],
-                "blog_articles": [],
-                "message": f"Here are some educational resources about {topic}:",
-            }
+            resources = self._new_resources(topic)
 
-            # Search YouTube videos
-            if search_queries.get("youtube_query"):
-                youtube_results = self._search_youtube(search_queries["youtube_query"])
-                resources["youtube_videos"] = youtube_results
+            # Search YouTube videos and blog articles concurrently
+            with STAGE_SECONDS.labels(stage="resource_search").time(), ThreadPoolExecutor(
+                max_workers=2
+            ) as executor:
+                youtube_future = (
+                    executor.submit(self._search_youtube, search_queries["youtube_query"])
+                    if search_queries.get("youtube_query")
+                    else None
+                )
+                blog_future = (
+                    executor.submit(
+                        self._search_google_articles, search_queries["blog_query"]
+                    )
+                    if search_queries.get("blog_query")
+                    else None
+                )
 
-            # Search for blog articles
-            if search_queries.get("blog_query"):
-                blog_results = self._search_google_articles(
-                    search_queries["blog_query"]
+                if youtube_future:
+                    resources["youtube_videos"] = youtube_future.result()
+                if blog_future:
+                    resources["blog_articles"] = blog_future.result()
+
+            # Only cache searches that found something
+            if resources["youtube_videos"] or resources["blog_articles"]:
+                cache.set(
+                    cache_key,
+                    resources,
+                    timeout=settings.CHATBOT_RESOURCE_CACHE_TIMEOUT,
                 )
-                resources["blog_articles"] = blog_results
 
             return resources
 
         except Exception as e:
             print(f"Error searching external resources: {e}")
-            return {
-                "topic": topic,
-                "youtube_videos": [],
-                "blog_articles": [],
-                "message": "I encountered an issue while searching for resources. Please try again later.",
-                "error": str(e),
-            }
+            return self._get_resources_error(topic, e)
+
+    def _new_resources(self, topic: str, found: Optional[Dict[str, Any]] = None):
+        """The resources reply for ``topic``, starting from ``found`` (e.g. a cached search)."""
+        return {
+            "youtube_videos": [],
+            "blog_articles": [],
+            **(found or {}),
+            "topic": topic,
+            "message": f"Here are some educational resources about {topic}:",
+        }
+
+    def _get_resources_cache_key(self, topic: str) -> str:
+        return "chat_resources:" + hashlib.sha256(
+            normalize_query(topic).encode("utf-8")
+        ).hexdigest()
+
+    def _get_resources_error(self, topic: str, error: Exception) -> Dict[str, Any]:
+        return {
+            "topic": topic,
+            "youtube_videos": [],
+            "blog_articles": [],
+            "message": "I encountered an issue while searching for resources. Please try again later.",
+            "error": str(error),
+        }
 
     def _generate_search_queries(self, topic: str) -> Dict[str, str]:
         """
@@ -544,31 +973,52 @@ class ChatBot:
             Dictionary with optimized search queries
         """
         try:
-            llm = ChatGoogleGenerativeAI(
-                google_api_key=GOOGLE_API_KEY,
-                model="gemini-2.5-flash",
-                temperature=0.3,
-            )
+            cache_key = self._get_search_queries_cache_key(topic)
+            queries = cache.get(cache_key)
+            record_cache("search_queries", queries is not None)
+            if queries is not None:
+                return queries
+
+            llm = self._get_search_query_llm()
 
             prompt = SEARCH_QUERY_GENERATOR_PROMPT.format(topic=topic)
-            response = llm.invoke(prompt)
+            with STAGE_SECONDS.labels(stage="search_queries_llm").time():
+                response = llm.invoke(prompt)
 
-            queries = extract_json_from_text(response.content)
-            return (
-                queries
-                if queries
-                else {
-                    "youtube_query": f"{topic} explained",
-                    "blog_query": f"{topic} guide tutorial",
-                }
+            queries = self._parse_search_queries(response)
+            if not queries:
+                return self._get_default_search_queries(topic)
+
+            cache.set(
+                cache_key, queries, timeout=settings.CHATBOT_RESOURCE_CACHE_TIMEOUT
             )
+            return queries
 
         except Exception as e:
             print(f"Error generating search queries: {e}")
-            return {
-                "youtube_query": f"{topic} explained",
-                "blog_query": f"{topic} guide tutorial",
-            }
+            return self._get_default_search_queries(topic)
+
+    def _parse_search_queries(self, response) -> Optional[Dict[str, str]]:
+        record_llm_usage("search_queries", response)
+        return extract_json_from_text(response.content) or None
+
+    def _get_search_queries_cache_key(self, topic: str) -> str:
+        return "chat_search_queries:" + hashlib.sha256(
+            normalize_query(topic).encode("utf-8")
+        ).hexdigest()
+
+    def _get_search_query_llm(self):
+        return ChatGoogleGenerativeAI(
+            google_api_key=GOOGLE_API_KEY,
+            model="gemini-2.5-flash",
+            temperature=0.3,
+        )
+
+    def _get_default_search_queries(self, topic: str) -> Dict[str, str]:
+        return {
+            "youtube_query": f"{topic} explained",
+            "blog_query": f"{topic} guide tutorial",
+        }
 
     def _search_youtube(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
         """
@@ -610,43 +1060,49 @@ class ChatBot:
             List of video information
         """
         try:
-            url = "https://www.googleapis.com/youtube/v3/search"
-            params = {
-                "part": "snippet",
-                "q": query,
-                "type": "video",
-                "maxResults": max_results,
-                "key": api_key,
-                "order": "relevance",
-            }
+            url, params = self._get_youtube_search_request(query, api_key, max_results)
 
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_session().get(url, params=params, timeout=10)
             response.raise_for_status()
 
-            data = response.json()
-            videos = []
-
-            for item in data.get("items", []):
-                video_info = {
-                    "title": item["snippet"]["title"],
-                    "description": (
-                        item["snippet"]["description"][:200] + "..."
-                        if len(item["snippet"]["description"]) > 200
-                        else item["snippet"]["description"]
-                    ),
-                    "video_id": item["id"]["videoId"],
-                    "url": f"https://www.youtube.com/watch?v={item['id']['videoId']}",
-                    "thumbnail": item["snippet"]["thumbnails"]["medium"]["url"],
-                    "channel": item["snippet"]["channelTitle"],
-                }
-                videos.append(video_info)
-
-            return videos
+            return self._parse_youtube_results(response.json())
 
         except Exception as e:
             print(f"Error with YouTube API search: {e}")
             return []
 
+    def _get_youtube_search_request(self, query: str, api_key: str, max_results: int):
+        url = "https://www.googleapis.com/youtube/v3/search"
+        params = {
+            "part": "snippet",
+            "q": query,
+            "type": "video",
+            "maxResults": max_results,
+            "key": api_key,
+            "order": "relevance",
+        }
+        return url, params
+
+    def _parse_youtube_results(self, data: Dict[str, Any]) -> List[Dict[str, str]]:
+        videos = []
+
+        for item in data.get("items", []):
+            video_info = {
+                "title": item["snippet"]["title"],
+                "description": (
+                    item["snippet"]["description"][:200] + "..."
+                    if len(item["snippet"]["description"]) > 200
+                    else item["snippet"]["description"]
+                ),
+                "video_id": item["id"]["videoId"],
+                "url": f"https://www.youtube.com/watch?v={item['id']['videoId']}",
+                "thumbnail": item["snippet"]["thumbnails"]["medium"]["url"],
+                "channel": item["snippet"]["channelTitle"],
+            }
+            videos.append(video_info)
+
+        return videos
+
     def _generate_youtube_suggestions(
         self, query: str, max_results: int
     ) -> List[Dict[str, str]]:
@@ -715,34 +1171,44 @@ class ChatBot:
             List of search results
         """
         try:
-            url = "https://www.googleapis.com/customsearch/v1"
-            params = {"key": api_key, "cx": cse_id, "q": query, "num": max_results}
+            url, params = self._get_google_search_request(
+                query, api_key, cse_id, max_results
+            )
 
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_session().get(url, params=params, timeout=10)
             response.raise_for_status()
 
-            data = response.json()
-            articles = []
-
-            for item in data.get("items", []):
-                article_info = {
-                    "title": item["title"],
-                    "description": (
-                        item.get("snippet", "")[:300] + "..."
-                        if len(item.get("snippet", "")) > 300
-                        else item.get("snippet", "")
-                    ),
-                    "url": item["link"],
-                    "source": self._extract_domain(item["link"]),
-                }
-                articles.append(article_info)
-
-            return articles
+            return self._parse_google_results(response.json())
 
         except Exception as e:
             print(f"Error with Google API search: {e}")
             return []
 
+    def _get_google_search_request(
+        self, query: str, api_key: str, cse_id: str, max_results: int
+    ):
+        url = "https://www.googleapis.com/customsearch/v1"
+        params = {"key": api_key, "cx": cse_id, "q": query, "num": max_results}
+        return url, params
+
+    def _parse_google_results(self, data: Dict[str, Any]) -> List[Dict[str, str]]:
+        articles = []
+
+        for item in data.get("items", []):
+            article_info = {
+                "title": item["title"],
+                "description": (
+                    item.get("snippet", "")[:300] + "..."
+                    if len(item.get("snippet", "")) > 300
+                    else item.get("snippet", "")
+                ),
+                "url": item["link"],
+                "source": self._extract_domain(item["link"]),
+            }
+            articles.append(article_info)
+
+        return articles
+
     def _generate_google_suggestions(
         self, query: str, max_results: int
     ) -> List[Dict[str, str]]:
@@ -784,3 +1250,412 @@ class ChatBot:
             return domain_match.group(1) if domain_match else "Unknown"
         except Exception:
             return "Unknown"
+
+    # Async pipeline, used by the chat view under ASGI. LLM, embedding and HTTP
+    # calls are awaited on the event loop; ORM, cache and vector store calls run
+    # in threads through sync_to_async.
+
+    async def areply(self, user_message, file, stream=False):
+        """
+        Async counterpart of ``reply``: one worker process can serve many chats while
+        they wait on Gemini.
+
+        With ``stream=True``, answers to questions are returned as an async generator
+        of text chunks; other intents still return their complete response.
+        """
+        response = None
+        try:
+            with STAGE_SECONDS.labels(stage="reply").time():
+                response = await self._areply(user_message, file, stream)
+            return response
+        finally:
+            # A streamed answer flushes the history when its generator closes
+            if not inspect.isasyncgen(response):
+                await self._aflush_history()
+
+    async def _areply(self, user_message, file, stream=False):
+        self._save_message_to_history(user_message, "user")
+
+        intent = await self._aget_message_intent(user_message, bool(file))
+        route, response = self._route_reply(intent, file)
+        if route == "reply":
+            return response
+
+        if route == "extract":
+            return await self._aextract_user_info_from_pdf(file)
+
+        if route == "resources":
+            topic = intent.get("topic", user_message)
+            resources = await self._asearch_external_resources(topic)
+            self._save_message_to_history(f"Found resources for: {topic}", "assistant")
+            return resources
+
+        if file and self._is_pdf_file(file):
+            if settings.CHATBOT_ASYNC_INGESTION:
+                self.ingestion_job_id = await sync_to_async(self._enqueue_ingestion_job)(
+                    file
+                )
+            # Inline ingestion is blocking (embeds chunk by chunk), so it gets a thread
+            elif not await sync_to_async(self._process_pdf_file)(file):
+                self._save_message_to_history(_PDF_FAILED_REPLY, "assistant")
+
+        shared_embedding = await self._aget_shared_answer_embedding(
+            user_message, intent, file
+        )
+        if shared_embedding is not None:
+            cached_answer = await sync_to_async(get_cached_answer)(
+                self._get_answer_prompt_key(), shared_embedding
+            )
+            if cached_answer:
+                self._save_message_to_history(cached_answer, "assistant")
+                return cached_answer
+
+        if stream:
+            return self._astream_user_query(
+                user_message, file, shared_embedding=shared_embedding
+            )
+
+        answer = await self._aanswer_user_query(
+            user_message, file, shared_embedding=shared_embedding
+        )
+        self._save_message_to_history(answer, "assistant")
+        return answer
+
+    async def _aflush_history(self):
+        await sync_to_async(self._flush_history)()
+
+    async def _aget_message_intent(self, user_message, has_uploaded_document=False):
+        prompt = self._build_intent_prompt(user_message, has_uploaded_document)
+        interpreter_llm = self._get_interpreter_llm()
+        with STAGE_SECONDS.labels(stage="intent_llm").time():
+            message = await interpreter_llm.ainvoke(prompt)
+        record_llm_usage("intent", message)
+        return self._parse_message_intent(message.content)
+
+    async def _aget_shared_answer_embedding(
+        self, user_message: str, intent: Dict[str, Any], file=None
+    ) -> Optional[List[float]]:
+        """Async ``_get_shared_answer_embedding``."""
+        if not self._uses_shared_answer(user_message, intent, file):
+            return None
+
+        try:
+            return await aget_query_embedding(
+                user_message, self.embeddings, self.embeddings.model
+            )
+        except Exception as e:
+            print(f"Error embedding query for the answer cache: {e}")
+            return None
+
+    async def _aanswer_user_query(
+        self,
+        user_message: str,
+        file=None,
+        max_history_messages=10,
+        shared_embedding: Optional[List[float]] = None,
+    ) -> str:
+        """Async ``_answer_user_query``."""
+        llm = self._get_answer_llm()
+        prompt = await self._aget_answer_prompt(
+            user_message, max_history_messages, shared_embedding
+        )
+
+        try:
+            with STAGE_SECONDS.labels(stage="answer_llm").time():
+                response = await llm.ainvoke(prompt)
+            record_llm_usage("answer", response)
+            if response and response.content and shared_embedding is not None:
+                await sync_to_async(self._cache_shared_answer)(
+                    shared_embedding, user_message, response.content
+                )
+            return response.content if response else _NO_ANSWER_REPLY
+        except Exception as e:
+            print("An error occurred while generating a response: ", e)
+            return _ANSWER_ERROR_REPLY
+
+    async def _astream_user_query(
+        self,
+        user_message: str,
+        file=None,
+        max_history_messages=10,
+        shared_embedding: Optional[List[float]] = None,
+    ):
+        """Async ``_stream_user_query``: an async generator of answer text chunks."""
+        llm = self._get_answer_llm()
+        answer = _AnswerStream()
+        try:
+            prompt = await self._aget_answer_prompt(
+                user_message, max_history_messages, shared_embedding
+            )
+            answer.start()
+            async for chunk in llm.astream(prompt):
+                text = answer.add(chunk)
+                if text:
+                    yield text
+            fallback = answer.finish()
+            if fallback:
+                yield fallback
+            elif shared_embedding is not None:
+                await sync_to_async(self._cache_shared_answer)(
+                    shared_embedding, user_message, answer.text
+                )
+        except Exception as e:
+            yield answer.fail(e)
+        finally:
+            self._save_message_to_history(answer.text, "assistant")
+            await self._aflush_history()
+
+    async def _aget_answer_prompt(
+        self,
+        user_message: str,
+        max_history_messages=10,
+        shared_embedding: Optional[List[float]] = None,
+    ) -> str:
+        """Async ``_get_answer_prompt``."""
+        if shared_embedding is not None:
+            return PromptBuilder().build_general(user_message)
+        return await self._abuild_answer_prompt(user_message, max_history_messages)
+
+    async def _abuild_answer_prompt(
+        self, user_message: str, max_history_messages=10
+    ) -> str:
+        """
+        Async ``_build_answer_prompt``. The conversation summary and the RAG lookup
+        don't depend on each other, so their LLM and embedding calls run concurrently.
+        """
+        prompt_builder = PromptBuilder()
+        profile_context = await sync_to_async(self._get_profile_context)()
+
+        with STAGE_SECONDS.labels(stage="history").time():
+            window = await sync_to_async(self._get_history_window)()
+            history = prompt_builder.select_history(window, max_history_messages)
+
+        summary, rag_matches = await asyncio.gather(
+            self._aupdate_conversation_summary(window, history),
+            self._aget_rag_matches(user_message),
+        )
+
+        return prompt_builder.build(
+            user_message,
+            profile_context=profile_context,
+            summary=summary,
+            history=history,
+            rag_matches=rag_matches,
+        )
+
+    async def _aupdate_conversation_summary(
+        self, window: List[tuple], history: List[tuple]
+    ) -> str:
+        """Async ``_update_conversation_summary``."""
+        try:
+            summary, summarized_until = await sync_to_async(get_conversation_summary)(
+                self.user_id
+            )
+            pending = self._get_messages_to_summarize(window, history, summarized_until)
+            if not pending:
+                return summary
+
+            llm = self._get_summary_llm()
+            prompt = self._build_summary_prompt(summary, pending)
+            with STAGE_SECONDS.labels(stage="summary_llm").time():
+                response = await llm.ainvoke(prompt)
+            new_summary = self._parse_summary(response)
+            if not new_summary:
+                return summary
+            await sync_to_async(save_conversation_summary)(
+                self.user_id, new_summary, pending[-1][0]
+            )
+            return new_summary
+
+        except Exception as e:
+            print(f"Error updating conversation summary: {e}")
+            return ""
+
+    async def _aget_rag_matches(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Async ``_get_rag_matches``."""
+        if not self.vector_store:
+            return []
+
+        try:
+            with STAGE_SECONDS.labels(stage="rag").time():
+                query_embedding = await aget_query_embedding(
+                    query, self.embeddings, self.embeddings.model
+                )
+
+                index_version = await sync_to_async(self._get_index_version)()
+                matches = await sync_to_async(get_cached_rag_matches)(
+                    self.user_id, index_version, query_embedding, top_k
+                )
+                if matches is None:
+                    # Vector store clients are blocking but thread-safe
+                    with VECTOR_STORE_SECONDS.labels(
+                        backend=self.vector_store.backend, operation="query"
+                    ).time():
+                        matches = await sync_to_async(
+                            self.vector_store.query, thread_sensitive=False
+                        )(self.user_id, query_embedding, top_k)
+                    await sync_to_async(set_cached_rag_matches)(
+                        self.user_id, index_version, query_embedding, top_k, matches
+                    )
+
+            return self._filter_rag_matches(matches)
+
+        except Exception as e:
+            print(f"Error retrieving RAG context: {e}")
+            return []
+
+    async def _aextract_user_info_from_pdf(self, file):
+        """Async ``_extract_user_info_from_pdf``."""
+        try:
+            # PDF parsing is CPU-bound; keep it off the event loop
+            _, pages = await sync_to_async(get_pdf_pages, thread_sensitive=False)(file)
+
+            llm = self._get_extraction_llm()
+
+            # Large documents: extract from groups of relevant pages concurrently, then merge
+            page_groups = self._get_extraction_page_groups(pages)
+            if len(page_groups) > 1:
+                return await self._aextract_user_info_map_reduce(llm, page_groups)
+
+            prompt = EXTRACT_USER_INFO_PROMPT.format(document_text="\n".join(pages))
+
+            with STAGE_SECONDS.labels(stage="extraction_llm").time():
+                response = await llm.ainvoke(prompt)
+            record_llm_usage("extraction", response)
+            return self._parse_extracted_user_info(response.content if response else "")
+
+        except Exception as e:
+            print(f"Error extracting user info from PDF: {e}")
+            return _EXTRACTION_ERROR_REPLY
+
+    async def _aextract_user_info_map_reduce(self, llm, page_groups: List[str]):
+        """Async ``_extract_user_info_map_reduce``, at most CHATBOT_EXTRACTION_MAX_WORKERS calls at a time."""
+        semaphore = asyncio.Semaphore(settings.CHATBOT_EXTRACTION_MAX_WORKERS)
+
+        async def extract(document_text: str) -> Dict[str, Any]:
+            try:
+                async with semaphore:
+                    with STAGE_SECONDS.labels(stage="extraction_llm").time():
+                        response = await llm.ainvoke(
+                            EXTRACT_USER_INFO_PROMPT.format(document_text=document_text)
+                        )
+                return self._parse_partial_extraction(response)
+            except Exception as e:
+                print(f"Error extracting user info from page group: {e}")
+                return {}
+
+        partials = await asyncio.gather(*(extract(group) for group in page_groups))
+        return self._merge_extracted_user_info(list(partials))
+
+    async def _asearch_external_resources(self, topic: str) -> Dict[str, Any]:
+        """Async ``_search_external_resources``: both searches run concurrently on the event loop."""
+        try:
+            cache_key = self._get_resources_cache_key(topic)
+            cached_resources = await cache.aget(cache_key)
+            record_cache("resources", cached_resources is not None)
+            if cached_resources is not None:
+                return self._new_resources(topic, cached_resources)
+
+            search_queries = await self._agenerate_search_queries(topic)
+
+            resources = self._new_resources(topic)
+
+            youtube_query = search_queries.get("youtube_query")
+            blog_query = search_queries.get("blog_query")
+            with STAGE_SECONDS.labels(stage="resource_search").time():
+                (
+                    resources["youtube_videos"],
+                    resources["blog_articles"],
+                ) = await asyncio.gather(
+                    self._asearch_youtube(youtube_query)
+                    if youtube_query
+                    else asyncio.sleep(0, result=[]),
+                    self._asearch_google_articles(blog_query)
+                    if blog_query
+                    else asyncio.sleep(0, result=[]),
+                )
+
+            # Only cache searches that found something
+            if resources["youtube_videos"] or resources["blog_articles"]:
+                await cache.aset(
+                    cache_key,
+                    resources,
+                    timeout=settings.CHATBOT_RESOURCE_CACHE_TIMEOUT,
+                )
+
+            return resources
+
+        except Exception as e:
+            print(f"Error searching external resources: {e}")
+            return self._get_resources_error(topic, e)
+
+    async def _agenerate_search_queries(self, topic: str) -> Dict[str, str]:
+        """Async ``_generate_search_queries``."""
+        try:
+            cache_key = self._get_search_queries_cache_key(topic)
+            queries = await cache.aget(cache_key)
+            record_cache("search_queries", queries is not None)
+            if queries is not None:
+                return queries
+
+            llm = self._get_search_query_llm()
+
+            prompt = SEARCH_QUERY_GENERATOR_PROMPT.format(topic=topic)
+            with STAGE_SECONDS.labels(stage="search_queries_llm").time():
+                response = await llm.ainvoke(prompt)
+
+            queries = self._parse_search_queries(response)
+            if not queries:
+                return self._get_default_search_queries(topic)
+
+            await cache.aset(
+                cache_key, queries, timeout=settings.CHATBOT_RESOURCE_CACHE_TIMEOUT
+            )
+            return queries
+
+        except Exception as e:
+            print(f"Error generating search queries: {e}")
+            return self._get_default_search_queries(topic)
+
+    async def _asearch_youtube(
+        self, query: str, max_results: int = 5
+    ) -> List[Dict[str, str]]:
+        """Async ``_search_youtube``."""
+        try:
+            youtube_api_key = os.getenv("YOUTUBE_API_KEY")
+            if not youtube_api_key:
+                return self._generate_youtube_suggestions(query, max_results)
+
+            url, params = self._get_youtube_search_request(
+                query, youtube_api_key, max_results
+            )
+            response = await get_async_http_client().get(url, params=params, timeout=10)
+            response.raise_for_status()
+
+            return self._parse_youtube_results(response.json())
+
+        except Exception as e:
+            print(f"Error searching YouTube: {e}")
+            return []
+
+    async def _asearch_google_articles(
+        self, query: str, max_results: int = 5
+    ) -> List[Dict[str, str]]:
+        """Async ``_search_google_articles``."""
+        try:
+            google_api_key = os.getenv("GOOGLE_SEARCH_API_KEY")
+            google_cse_id = os.getenv("GOOGLE_CSE_ID")
+            if not (google_api_key and google_cse_id):
+                return self._generate_google_suggestions(query, max_results)
+
+            url, params = self._get_google_search_request(
+                query, google_api_key, google_cse_id, max_results
+            )
+            response = await get_async_http_client().get(url, params=params, timeout=10)
+            response.raise_for_status()
+
+            return self._parse_google_results(response.json())
+
+        except Exception as e:
+            print(f"Error searching Google articles: {e}")
+            return []
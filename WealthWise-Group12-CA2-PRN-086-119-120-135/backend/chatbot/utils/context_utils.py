@@ -0,0 +1,293 @@
+import time
+from typing import List, Tuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from chatbot.metrics import record_cache
+from chatbot.utils.cache_utils import cache_is_shared
+from chatbot.models import Chat, ConversationSummary
+
+
+def _profile_key(user_id) -> str:
+    return f"chat_profile_context:{user_id}"
+
+
+def _history_key(user_id) -> str:
+    return f"chat_history_window:{user_id}"
+
+
+def _summary_key(user_id) -> str:
+    return f"chat_conversation_summary:{user_id}"
+
+
+def build_profile_context(user_id) -> str:
+    """
+    Build the user's profile block (UserData, IncomeStatus, RetirementInfo) for the answer prompt.
+
+    Args:
+        user_id: The user whose profile to describe
+
+    Returns:
+        The formatted profile sections, or an empty string if none exist
+    """
+    user = (
+        User.objects.select_related("user_data", "income_status", "retirement_info")
+        .filter(id=user_id)
+        .first()
+    )
+    if not user:
+        return ""
+
+    context_parts = []
+    basic_data = user.user_data if hasattr(user, "user_data") else None
+    if basic_data:
+        context_parts.append(
+            f"""
+                    User Info:
+                    - Date of Birth: {basic_data.dateOfBirth}
+                    - Gender: {basic_data.gender}
+                    - Location: {basic_data.location}
+                    - Marital Status: {basic_data.maritalStatus}
+                    - Number of Dependents: {basic_data.numberOfDependants}
+                    """
+        )
+
+    income_status = user.income_status if hasattr(user, "income_status") else None
+    if income_status:
+        context_parts.append(
+            f"""
+                    Income Information:
+                    - Current Salary: {income_status.currentSalary}
+                    - Years of Service: {income_status.yearsOfService}
+                    - Employer Type: {income_status.employerType}
+                    - Pension Scheme: {income_status.pensionScheme}
+                    - Pension Balance: {income_status.pensionBalance}
+                    - Employer Contribution: {income_status.employerContribution or "Not provided"}
+                    """
+        )
+
+    retirement_info = user.retirement_info if hasattr(user, "retirement_info") else None
+    if retirement_info:
+        context_parts.append(
+            f"""
+                    Retirement Plan:
+                    - Planned Retirement Age: {retirement_info.plannedRetirementAge}
+                    - Lifestyle Goal: {retirement_info.retirementLifestyle}
+                    - Estimated Monthly Expenses in Retirement: {retirement_info.monthlyRetirementExpense}
+                    - Legacy Goal: {retirement_info.legacyGoal}
+                    - Plan Created At: {retirement_info.created_at}
+                    """
+        )
+
+    return "\n".join(context_parts)
+
+
+def _context_cache_timeout() -> int:
+    # Profile writes clear the block through signals, but only in the writing process's
+    # local cache; the shorter timeout bounds how stale other processes' copies get
+    if cache_is_shared():
+        return settings.CHATBOT_CONTEXT_CACHE_TIMEOUT
+    return settings.CHATBOT_LOCAL_CONTEXT_CACHE_TIMEOUT
+
+
+def get_profile_context(user_id) -> str:
+    """
+    Return the cached profile block for a user, building it from the DB on a miss.
+
+    Profile writes invalidate the block (see chatbot.signals).
+    """
+    profile_context = cache.get(_profile_key(user_id))
+    record_cache("profile", profile_context is not None)
+    if profile_context is None:
+        profile_context = build_profile_context(user_id)
+        cache.set(_profile_key(user_id), profile_context, timeout=_context_cache_timeout())
+    return profile_context
+
+
+def invalidate_profile_context(user_id) -> None:
+    cache.delete(_profile_key(user_id))
+
+
+# Waiting up to half a second for the history window's append lock
+_HISTORY_LOCK_ATTEMPTS = 50
+_HISTORY_LOCK_WAIT_SECONDS = 0.01
+
+
+def _load_history_window(user_id) -> List[Tuple[int, str, str]]:
+    chats = (
+        Chat.objects.filter(user_id=user_id)
+        .order_by("-created_at", "-id")
+        .only("id", "sender", "content")[: settings.CHATBOT_HISTORY_WINDOW_SIZE]
+    )
+    return [(chat.id, chat.sender, chat.content) for chat in reversed(chats)]
+
+
+def _acquire_history_lock(lock_key: str) -> bool:
+    """Take the window's lock, waiting briefly (it is only held for a cache read and write)."""
+    for _ in range(_HISTORY_LOCK_ATTEMPTS):
+        if cache.add(lock_key, 1, timeout=5):
+            return True
+        time.sleep(_HISTORY_LOCK_WAIT_SECONDS)
+    return False
+
+
+def get_history_window(user_id, max_messages: int) -> List[Tuple[int, str, str]]:
+    """
+    Return the user's most recent messages as (chat_id, sender, content) tuples, oldest first.
+
+    The window holds the last ``CHATBOT_HISTORY_WINDOW_SIZE`` messages. With a
+    shared cache every write appends to the cached window (ChatHistoryWriter) and
+    every delete clears it (chatbot.signals), so a cached window is used as is; a
+    miss loads it under the append lock, so a message saved meanwhile is appended
+    after the load rather than lost.
+
+    With a process-local cache other workers' writes are invisible, so each read
+    checks the cached copy against the IDs of the user's latest messages (an
+    index-only query) and loads just the messages it is missing.
+    """
+    if not max_messages:
+        return []
+    if cache_is_shared():
+        return _get_shared_history_window(user_id)[-max_messages:]
+
+    key = _history_key(user_id)
+    latest_ids = list(
+        Chat.objects.filter(user_id=user_id)
+        .order_by("-created_at", "-id")
+        .values_list("id", flat=True)[: settings.CHATBOT_HISTORY_WINDOW_SIZE]
+    )
+    latest_ids.reverse()
+
+    cached = {message[0]: message for message in cache.get(key) or []}
+    missing_ids = [chat_id for chat_id in latest_ids if chat_id not in cached]
+    record_cache("history_window", not missing_ids)
+    if missing_ids:
+        for chat in Chat.objects.filter(id__in=missing_ids).only(
+            "id", "sender", "content"
+        ):
+            cached[chat.id] = (chat.id, chat.sender, chat.content)
+
+    window = [cached[chat_id] for chat_id in latest_ids if chat_id in cached]
+    if missing_ids or len(cached) != len(window):
+        cache.set(key, window, timeout=settings.CHATBOT_CONTEXT_CACHE_TIMEOUT)
+    return window[-max_messages:]
+
+
+def _get_shared_history_window(user_id) -> List[Tuple[int, str, str]]:
+    key = _history_key(user_id)
+    window = cache.get(key)
+    record_cache("history_window", window is not None)
+    if window is not None:
+        return window
+
+    lock_key = f"{key}:lock"
+    if not _acquire_history_lock(lock_key):
+        # A writer is stuck holding the lock; don't cache a window it may overwrite
+        return _load_history_window(user_id)
+    try:
+        window = _load_history_window(user_id)
+        cache.set(key, window, timeout=settings.CHATBOT_CONTEXT_CACHE_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+    return window
+
+
+def append_history_messages(user_id, messages: List[Tuple[int, str, str]]) -> None:
+    """
+    Append just-saved (chat_id, sender, content) messages to the user's cached window, if one is cached.
+
+    The read-modify-write holds a per-user lock taken with ``cache.add`` (atomic on
+    every backend). If the lock can't be taken the cached window is dropped, so the
+    next ``get_history_window`` loads the messages from the DB instead.
+    """
+    key = _history_key(user_id)
+    lock_key = f"{key}:lock"
+    if not _acquire_history_lock(lock_key):
+        invalidate_history_window(user_id)
+        return
+
+    try:
+        window = cache.get(key)
+        if window is None:
+            # Nothing cached: the next read loads the window, including these messages, from the DB
+            return
+
+        cached_ids = {message[0] for message in window}
+        window.extend(message for message in messages if message[0] not in cached_ids)
+        cache.set(
+            key,
+            window[-settings.CHATBOT_HISTORY_WINDOW_SIZE :],
+            timeout=settings.CHATBOT_CONTEXT_CACHE_TIMEOUT,
+        )
+    finally:
+        cache.delete(lock_key)
+
+
+def invalidate_history_window(user_id) -> None:
+    cache.delete(_history_key(user_id))
+
+
+class ChatHistoryWriter:
+    """
+    Buffers a turn's chat messages and writes them with a single bulk INSERT.
+
+    ``flush`` also appends the written messages to the user's cached history window
+    in one locked update.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.pending = []
+
+    def add(self, sender: str, content: str) -> None:
+        self.pending.append(Chat(user_id=self.user_id, sender=sender, content=content))
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+
+        pending, self.pending = self.pending, []
+        chats = Chat.objects.bulk_create(pending)
+        if any(chat.id is None for chat in chats):
+            # Backend didn't return primary keys; reload the window from the DB instead
+            invalidate_history_window(self.user_id)
+            return
+        append_history_messages(
+            self.user_id, [(chat.id, chat.sender, chat.content) for chat in chats]
+        )
+
+
+def get_conversation_summary(user_id) -> Tuple[str, int]:
+    """
+    Return the user's rolling conversation summary.
+
+    Returns:
+        (summary text, ID of the newest Chat message it covers)
+    """
+    if not cache_is_shared():
+        # Another worker may have saved a newer summary; read the single row instead
+        summary = ConversationSummary.objects.filter(user_id=user_id).first()
+        return (summary.summary, summary.summarized_until) if summary else ("", 0)
+
+    entry = cache.get(_summary_key(user_id))
+    if entry is None:
+        summary = ConversationSummary.objects.filter(user_id=user_id).first()
+        entry = (summary.summary, summary.summarized_until) if summary else ("", 0)
+        cache.set(
+            _summary_key(user_id), entry, timeout=settings.CHATBOT_CONTEXT_CACHE_TIMEOUT
+        )
+    return entry
+
+
+def save_conversation_summary(user_id, summary: str, summarized_until: int) -> None:
+    ConversationSummary.objects.update_or_create(
+        user_id=user_id,
+        defaults={"summary": summary, "summarized_until": summarized_until},
+    )
+    cache.set(
+        _summary_key(user_id),
+        (summary, summarized_until),
+        timeout=settings.CHATBOT_CONTEXT_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,126 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from django.conf import settings
+from pypdf import PdfReader
+
+from chatbot.metrics import STAGE_SECONDS, record_cache
+
+
+def read_uploaded_file(file) -> bytes:
+    """
+    Read an uploaded file's contents into memory.
+
+    Args:
+        file: A Django UploadedFile/FieldFile (or any object exposing ``chunks()`` or ``read()``)
+
+    Returns:
+        The file contents
+    """
+    if hasattr(file, "seek"):
+        file.seek(0)
+    if hasattr(file, "chunks"):
+        data = b"".join(file.chunks())
+    else:
+        data = file.read()
+
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return data
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return the SHA-256 hex digest of a file's contents (its content address)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """Return the SHA-256 hex digest of a text chunk (whitespace-normalized)."""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def make_chunk_id(user_id, chunk_hash: str) -> str:
+    """Deterministic vector ID for a chunk, so re-ingesting it overwrites instead of duplicating."""
+    return f"user_{user_id}_chunk_{chunk_hash[:32]}"
+
+
+def extract_pdf_pages(data: bytes) -> List[str]:
+    """Extract the text of each page of an in-memory PDF."""
+    reader = PdfReader(io.BytesIO(data))
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+class _PageTextCache:
+    """LRU cache of parsed PDF page texts keyed by content hash, bounded by total text size."""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, content_hash: str):
+        with self.lock:
+            pages = self.entries.get(content_hash)
+            if pages is not None:
+                self.entries.move_to_end(content_hash)
+            return pages
+
+    def set(self, content_hash: str, pages: List[str]) -> None:
+        entry_size = sum(len(page) for page in pages)
+        if entry_size > self.max_chars:
+            return
+
+        with self.lock:
+            if content_hash in self.entries:
+                return
+            self.entries[content_hash] = pages
+            self.size += entry_size
+            while self.size > self.max_chars:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= sum(len(page) for page in evicted)
+
+
+_page_text_cache = _PageTextCache(settings.CHATBOT_PDF_TEXT_CACHE_MAX_CHARS)
+
+
+def get_pdf_pages(file) -> Tuple[str, List[str]]:
+    """
+    Parse an uploaded PDF in memory, once per distinct content.
+
+    Extraction and RAG ingestion both call this, so a document that is uploaded
+    again (or extracted and then asked about) is not parsed a second time.
+
+    Args:
+        file: The uploaded PDF file
+
+    Returns:
+        (SHA-256 hex digest of the file, list of page texts)
+    """
+    data = read_uploaded_file(file)
+    content_hash = hash_bytes(data)
+    return content_hash, get_pdf_pages_from_bytes(data, content_hash)
+
+
+def get_pdf_pages_from_bytes(data: bytes, content_hash: str) -> List[str]:
+    """
+    ``get_pdf_pages`` for contents the caller has already read and hashed.
+
+    Args:
+        data: The PDF file contents
+        content_hash: ``hash_bytes(data)``
+
+    Returns:
+        List of page texts
+    """
+    pages = _page_text_cache.get(content_hash)
+    record_cache("pdf_text", pages is not None)
+    if pages is None:
+        with STAGE_SECONDS.labels(stage="pdf_parse").time():
+            pages = extract_pdf_pages(data)
+        _page_text_cache.set(content_hash, pages)
+    return pages
@@ -0,0 +1,93 @@
+import re
+from collections import Counter
+from typing import List, Dict, Any
+
+# Terms that signal a page carries fields requested by EXTRACT_USER_INFO_PROMPT
+EXTRACTION_KEYWORDS = [
+    "name", "age", "date of birth", "dob", "gender", "male", "female", "address",
+    "city", "state", "marital", "married", "single", "dependant", "dependent",
+    "salary", "income", "ctc", "basic pay", "employer", "employee", "service",
+    "pension", "nps", "epf", "eps", "ppf", "provident", "contribution", "balance",
+    "retirement", "retire", "expense", "legacy", "nominee",
+    "fixed deposit", "mutual fund", "stock", "equity", "portfolio", "holding",
+    "height", "weight", "bmi", "smok", "alcohol", "diet", "blood pressure",
+    "cholesterol", "asthma", "diabetes", "heart", "hypertension",
+]
+
+_KEYWORD_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(keyword) for keyword in EXTRACTION_KEYWORDS) + r")",
+    re.IGNORECASE,
+)
+
+
+def score_page(text: str) -> int:
+    """Cheap relevance score for extraction: number of keyword hits on the page."""
+    return len(_KEYWORD_PATTERN.findall(text))
+
+
+def select_relevant_pages(pages: List[str], max_pages: int) -> List[int]:
+    """
+    Pick the pages worth sending to the extraction LLM.
+
+    Pages without any keyword hit are dropped (the first page is always kept,
+    since personal details usually sit there), then the ``max_pages`` best
+    scoring pages are kept.
+
+    Returns:
+        Indices of the selected pages, in document order
+    """
+    scores = [score_page(text) for text in pages]
+    scored = [
+        (scores[index], index)
+        for index, text in enumerate(pages)
+        if text.strip() and (index == 0 or scores[index] > 0)
+    ]
+    best = sorted(scored, key=lambda item: (-item[0], item[1]))[:max_pages]
+    return sorted(index for _, index in best)
+
+
+def group_pages(pages: List[str], indices: List[int], max_chars: int) -> List[str]:
+    """Concatenate the selected pages, in order, into texts of at most ~``max_chars`` each."""
+    groups = []
+    current = []
+    current_size = 0
+    for index in indices:
+        text = pages[index]
+        if current and current_size + len(text) > max_chars:
+            groups.append("\n".join(current))
+            current, current_size = [], 0
+        current.append(text)
+        current_size += len(text)
+    if current:
+        groups.append("\n".join(current))
+    return groups
+
+
+def merge_extractions(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-group extraction results into one record.
+
+    For each field the most frequently extracted value wins; ties go to the value
+    from the earliest group, so the result doesn't depend on completion order.
+
+    Args:
+        partials: Extraction dictionaries in document order
+
+    Returns:
+        The merged extraction
+    """
+    values = {}
+    for partial in partials:
+        for field, value in partial.items():
+            if value in (None, "", [], {}):
+                continue
+            values.setdefault(field, []).append(value)
+
+    merged = {}
+    for field, candidates in values.items():
+        counts = Counter(repr(candidate) for candidate in candidates)
+        best_count = max(counts.values())
+        merged[field] = next(
+            candidate for candidate in candidates if counts[repr(candidate)] == best_count
+        )
+    return merged
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+_session = None
+_session_lock = threading.Lock()
+
+# httpx clients are bound to the event loop they were first used on
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Return the process-wide requests session used for external API calls.
+
+    Reusing one session keeps TLS connections to the Google/YouTube APIs alive
+    between chat turns instead of reconnecting for every search.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Return the pooled httpx client for the running event loop.
+
+    Used by the async chatbot pipeline; under ASGI there is one loop per worker
+    process, so connections are kept alive across chats just like the requests session.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+            timeout=10,
+        )
+        _async_clients[loop] = client
+    return client
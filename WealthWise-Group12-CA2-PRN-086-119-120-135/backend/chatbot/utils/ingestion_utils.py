@@ -0,0 +1,135 @@
+import threading
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from chatbot.models import IngestionJob
+
+
+def _claimable_jobs():
+    """Pending jobs, plus running jobs whose worker stopped sending heartbeats (crashed)."""
+    lease_expired = timezone.now() - timedelta(seconds=settings.CHATBOT_INGESTION_LEASE_SECONDS)
+    return IngestionJob.objects.filter(
+        Q(status="pending") | Q(status="running", updated_at__lt=lease_expired)
+    )
+
+
+def _fail_exhausted_jobs():
+    """Fail abandoned jobs that already used up their attempts instead of claiming them again."""
+    exhausted = _claimable_jobs().filter(attempts__gte=settings.CHATBOT_INGESTION_MAX_ATTEMPTS)
+    for job in exhausted[:10]:
+        job.status = "failed"
+        job.message = "Ingestion was interrupted too many times; please upload the PDF again."
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "message", "finished_at", "updated_at"])
+        if job.file:
+            job.file.delete(save=True)
+
+
+def claim_next_job() -> Optional[IngestionJob]:
+    """
+    Claim the oldest pending (or abandoned) ingestion job for this worker.
+
+    The claim is a conditional UPDATE on the job's status and lease, so several
+    workers can poll the same table without processing a job twice. A running job
+    holds its lease while its worker keeps updating ``updated_at`` (see
+    run_ingestion_job); once that is older than CHATBOT_INGESTION_LEASE_SECONDS
+    the job is claimed again, up to CHATBOT_INGESTION_MAX_ATTEMPTS claims in
+    total, after which it is marked failed.
+
+    Returns:
+        The claimed job, or None if the queue is empty
+    """
+    _fail_exhausted_jobs()
+
+    claimable = _claimable_jobs().filter(attempts__lt=settings.CHATBOT_INGESTION_MAX_ATTEMPTS)
+    for job_id in claimable.values_list("id", flat=True)[:10]:
+        now = timezone.now()
+        claimed = claimable.filter(id=job_id).update(
+            status="running", started_at=now, updated_at=now, attempts=F("attempts") + 1
+        )
+        if claimed:
+            return IngestionJob.objects.get(id=job_id)
+    return None
+
+
+class _Heartbeat:
+    """Refreshes a running job's ``updated_at`` in the background so its lease doesn't expire."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.interval = max(settings.CHATBOT_INGESTION_LEASE_SECONDS / 3, 1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"ingestion-heartbeat-{job_id}", daemon=True
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                IngestionJob.objects.filter(id=self.job_id, status="running").update(
+                    updated_at=timezone.now()
+                )
+        finally:
+            # This thread's own database connection
+            connection.close()
+
+
+def run_ingestion_job(job: IngestionJob) -> IngestionJob:
+    """
+    Ingest the job's stored PDF into the vector index, recording progress as it goes.
+
+    Args:
+        job: A job already claimed by this worker (status "running")
+
+    Returns:
+        The job with its final status saved
+    """
+    # Imported here so the worker only pays for the LLM/Pinecone clients when it has work
+    from chatbot.utils.chatbot_utils import ChatBot
+
+    def report_progress(processed: int, total: int):
+        progress = int(processed * 100 / total) if total else 100
+        IngestionJob.objects.filter(id=job.id).update(
+            progress=min(progress, 99), updated_at=timezone.now()
+        )
+
+    try:
+        bot = ChatBot(chat_id=1, user_id=job.user_id)
+        with _Heartbeat(job.id), job.file.open("rb") as file:
+            result = bot._process_pdf_file(
+                file, source=job.source, progress_callback=report_progress
+            )
+
+        if result:
+            job.status = "completed"
+            job.progress = 100
+            job.message = result
+        else:
+            job.status = "failed"
+            job.message = "I encountered an issue processing your PDF."
+    except Exception as e:
+        print(f"Error running ingestion job {job.id}: {e}")
+        job.status = "failed"
+        job.message = str(e)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "progress", "message", "finished_at", "updated_at"])
+
+    # The stored upload is only needed until it has been ingested
+    if job.file:
+        job.file.delete(save=True)
+
+    return job
@@ -0,0 +1,358 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from chatbot.prompts import (
+    INTERPRETER_USER_REQUEST,
+    EXTRACT_USER_INFO_PROMPT,
+    SEARCH_QUERY_GENERATOR_PROMPT,
+    SUMMARIZE_CONVERSATION_PROMPT,
+)
+from chatbot.utils.chatbot_utils import ChatBot
+from chatbot.utils.vector_store_utils import VectorStore
+
+# Realistic chat sessions replayed by manage.py chatbot_load_test. A turn with
+# "pdf_pages" uploads a generated payslip/pension statement with that many pages.
+DEFAULT_SESSIONS = [
+    [
+        {"message": "Hello"},
+        {"message": "What is EPS?"},
+        {"message": "How is NPS taxed at withdrawal?"},
+        {"message": "Should I take a lump sum or an annuity when I retire?"},
+    ],
+    [
+        {"message": "Extract my details from this document", "pdf_pages": 3},
+        {"message": "Based on my salary, how much should I contribute to NPS?"},
+        {"message": "What happens to my pension if I retire at 58 instead of 60?"},
+    ],
+    [
+        {"message": "Show me videos about NPS vs EPF"},
+        {"message": "What is the difference between EPF and PPF?"},
+        {"message": "Can you give me resources about retirement planning?"},
+    ],
+    [
+        {"message": "Here is my pension statement, what is my balance?", "pdf_pages": 12},
+        {"message": "Is my employer contribution normal?"},
+        {"message": "How much will my pension balance be at 60?"},
+        {"message": "What is EPS?"},
+    ],
+    [
+        {"message": "Extract my details from this document", "pdf_pages": 40},
+        {"message": "What lifestyle can I afford in retirement?"},
+    ],
+]
+
+_WORDS = (
+    "pension retirement contribution balance annuity corpus employer scheme "
+    "withdrawal tax benefit monthly planning savings allocation return"
+).split()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for ChatGoogleGenerativeAI.
+
+    Recognises which chatbot prompt it was given and returns a well-formed reply
+    for it (intent JSON, extraction JSON, search queries, summary or answer) after
+    ``latency`` seconds; streamed answers add ``token_latency`` per chunk.
+    """
+
+    model: str = "fake-chat"
+    latency: float = 0.5
+    token_latency: float = 0.02
+    answer_words: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _respond(self, prompt: str) -> str:
+        if prompt.startswith(INTERPRETER_USER_REQUEST.split("{")[0]):
+            match = re.search(r'user_message: "(.*)"', prompt)
+            return json.dumps(_classify(match.group(1) if match else ""))
+        if prompt.startswith(EXTRACT_USER_INFO_PROMPT.split("{")[0]):
+            return json.dumps(
+                {
+                    "name": "Test User",
+                    "age": 45,
+                    "currentSalary": 1800000,
+                    "pensionScheme": "NPS",
+                    "pensionBalance": 2450000,
+                }
+            )
+        if prompt.startswith(SEARCH_QUERY_GENERATOR_PROMPT.split("{")[0]):
+            return json.dumps(
+                {
+                    "youtube_query": "NPS explained",
+                    "blog_query": "NPS guide tutorial",
+                }
+            )
+        if prompt.startswith(SUMMARIZE_CONVERSATION_PROMPT.split("{")[0]):
+            return _words(prompt, 60)
+        return _words(prompt, self.answer_words)
+
+    def _message(self, prompt: str, content: str) -> AIMessage:
+        input_tokens = len(prompt) // 4
+        output_tokens = len(content) // 4
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = messages[-1].content
+        time.sleep(self.latency)
+        message = self._message(prompt, self._respond(prompt))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        prompt = messages[-1].content
+        await asyncio.sleep(self.latency)
+        message = self._message(prompt, self._respond(prompt))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, prompt: str) -> List[str]:
+        content = self._respond(prompt)
+        return [word + " " for word in content.split()]
+
+    def _stream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for chunk in self._chunks(messages[-1].content):
+            time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(messages[-1].content):
+            await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic unit vectors seeded by the text, returned after ``latency`` seconds."""
+
+    def __init__(self, latency: float = 0.1, dimension: int = 768):
+        self.model = "fake-embedding"
+        self.latency = latency
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self._embed(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return self._embed(text)
+
+
+class FakeVectorStore(VectorStore):
+    """In-memory exact-search vector store with a fixed per-call latency."""
+
+    backend = "fake"
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self._lock = threading.Lock()
+        # user_id -> {vector_id: (normalized vector, metadata)}
+        self._partitions = {}
+
+    def upsert(self, user_id, vectors: List[Dict[str, Any]]) -> None:
+        time.sleep(self.latency)
+        with self._lock:
+            partition = self._partitions.setdefault(str(user_id), {})
+            for vector in vectors:
+                values = np.asarray(vector["values"], dtype=np.float32)
+                values = values / (np.linalg.norm(values) or 1.0)
+                partition[vector["id"]] = (values, vector.get("metadata", {}))
+
+    def query(self, user_id, vector: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+        time.sleep(self.latency)
+        with self._lock:
+            items = list(self._partitions.get(str(user_id), {}).items())
+        if not items:
+            return []
+
+        query_vector = np.asarray(vector, dtype=np.float32)
+        query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+        scores = np.vstack([values for _, (values, _) in items]) @ query_vector
+        best = np.argsort(-scores)[:top_k]
+        return [
+            {"id": items[i][0], "score": float(scores[i]), "metadata": items[i][1][1]}
+            for i in best
+        ]
+
+
+class LoadTestChatBot(ChatBot):
+    """
+    ChatBot wired to the fake backends configured with ``configure_fake_backends``.
+
+    Resource searches return the offline search suggestions, so no YouTube or
+    Google request is made even when their API keys are set.
+    """
+
+    backends: Dict[str, Any] = {}
+
+    def _get_vector_store(self):
+        return self.backends["vector_store"]
+
+    def _get_embeddings(self):
+        return self.backends["embeddings"]
+
+    def _get_answer_llm(self):
+        return self.backends["llm"]
+
+    def _get_interpreter_llm(self):
+        return self.backends["llm"]
+
+    def _get_summary_llm(self):
+        return self.backends["llm"]
+
+    def _get_extraction_llm(self):
+        return self.backends["llm"]
+
+    def _get_search_query_llm(self):
+        return self.backends["llm"]
+
+    def _search_youtube(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+        return self._generate_youtube_suggestions(query, max_results)
+
+    async def _asearch_youtube(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+        return self._generate_youtube_suggestions(query, max_results)
+
+    def _search_google_articles(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+        return self._generate_google_suggestions(query, max_results)
+
+    async def _asearch_google_articles(
+        self, query: str, max_results: int = 5
+    ) -> List[Dict[str, str]]:
+        return self._generate_google_suggestions(query, max_results)
+
+
+def configure_fake_backends(
+    llm_latency: float = 0.5,
+    token_latency: float = 0.02,
+    embedding_latency: float = 0.1,
+    vector_latency: float = 0.05,
+) -> None:
+    """Create the fake LLM, embedding and vector store backends shared by every LoadTestChatBot."""
+    LoadTestChatBot.backends = {
+        "llm": FakeChatModel(latency=llm_latency, token_latency=token_latency),
+        "embeddings": FakeEmbeddings(latency=embedding_latency),
+        "vector_store": FakeVectorStore(latency=vector_latency),
+    }
+
+
+def _classify(user_message: str) -> Dict[str, Any]:
+    """Keyword version of the intent classifier, including the ``personalized`` flag."""
+    message = user_message.lower()
+    if "extract" in message:
+        category = "EXTRACT_USER_INFO_FROM_DOCUMENT"
+    elif any(word in message for word in ("video", "resource", "blog", "learn")):
+        category = "RESOURCE_REQUEST"
+    elif message.strip(" !.") in ("hello", "hi", "hey", "thanks"):
+        category = "GENERAL"
+    else:
+        category = "QUESTION"
+    personalized = bool(re.search(r"\b(?:i|me|my|mine)\b", message))
+    return {"category": category, "topic": user_message, "personalized": personalized}
+
+
+def _words(seed_text: str, count: int) -> str:
+    rng = np.random.default_rng(int(hashlib.md5(seed_text.encode("utf-8")).hexdigest()[:8], 16))
+    return " ".join(rng.choice(_WORDS, size=count)).capitalize() + "."
+
+
+def make_text_pdf(pages: List[List[str]]) -> bytes:
+    """
+    Build a minimal PDF with one text line per list entry on each page.
+
+    Args:
+        pages: Lines of text for each page
+
+    Returns:
+        The PDF file contents
+    """
+
+    def escape(text: str) -> str:
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    font_id = 3 + 2 * len(pages)
+    for i, lines in enumerate(pages):
+        text = " Tj T* ".join(f"({escape(line)})" for line in lines)
+        stream = f"BT /F1 11 Tf 14 TL 72 740 Td {text} Tj ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode("latin-1")
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode("latin-1")
+    return output
+
+
+def make_statement_pdf(page_count: int, seed: Optional[int] = None) -> bytes:
+    """A pension statement/payslip style PDF with ``page_count`` pages of extractable fields."""
+    rng = np.random.default_rng(seed)
+    pages = []
+    for page in range(page_count):
+        lines = [f"Pension statement - page {page + 1}"]
+        if page == 0:
+            lines += [
+                "Name: Test User",
+                f"Date of Birth: 19{rng.integers(60, 95)}-0{rng.integers(1, 9)}-15",
+                "Gender: Male",
+                "Marital Status: Married",
+            ]
+        lines += [
+            f"Basic pay: {rng.integers(40_000, 200_000)}",
+            f"Employer contribution: {rng.integers(2_000, 20_000)}",
+            f"NPS balance: {rng.integers(100_000, 5_000_000)}",
+        ]
+        lines += [" ".join(rng.choice(_WORDS, size=12)) for _ in range(30)]
+        pages.append(lines)
+    return make_text_pdf(pages)
@@ -0,0 +1,150 @@
+from typing import List, Dict, Any, Tuple, Optional
+
+from django.conf import settings
+
+from chatbot.prompts import ANSWER_USER_QUERY_PROMPT
+
+# Context for user-independent questions, whose answers are shared between users
+GENERAL_QUESTION_CONTEXT = (
+    "This is a general question; answer it without referring to any user's personal details."
+)
+
+# Rough English average for Gemini/SentencePiece tokenizers; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting (no tokenizer round-trip)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to roughly ``max_tokens`` tokens, marking the cut with an ellipsis."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[: max(max_chars - 3, 0)].rstrip() + "..."
+
+
+class PromptBuilder:
+    """
+    Assembles ANSWER_USER_QUERY_PROMPT with a token budget per context section.
+
+    Sections, in prompt order:
+    - profile: the user's profile block, truncated to its budget
+    - summary: rolling summary of older conversation, truncated to its budget
+    - history: the most recent raw messages that fit, newest kept first
+    - documents: RAG chunks in descending score order, while they fit
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None):
+        self.budgets = budgets or settings.CHATBOT_PROMPT_BUDGETS
+
+    def select_history(
+        self, messages: List[Tuple[int, str, str]], max_messages: int
+    ) -> List[Tuple[int, str, str]]:
+        """
+        Pick the most recent messages that fit the history budget.
+
+        Args:
+            messages: (chat_id, sender, content) tuples, oldest first
+            max_messages: Upper bound on the number of messages kept
+
+        Returns:
+            The selected messages, oldest first
+        """
+        budget = self.budgets["history"]
+        selected = []
+        for message in reversed(messages[-max_messages:] if max_messages else []):
+            cost = estimate_tokens(message[2] or "") + 2
+            if cost > budget:
+                break
+            selected.append(message)
+            budget -= cost
+        return list(reversed(selected))
+
+    def format_history(self, messages: List[Tuple[int, str, str]]) -> str:
+        history_parts = []
+        for _, sender, content in messages:
+            sender_label = "User" if sender == "user" else "Assistant"
+            history_parts.append(f"{sender_label}: {content}")
+        return "\n".join(history_parts)
+
+    def format_documents(self, matches: List[Dict[str, Any]]) -> str:
+        """Format the highest-scoring RAG chunks that fit the documents budget."""
+        budget = self.budgets["documents"]
+        context_parts = []
+        for match in sorted(matches, key=lambda m: m["score"], reverse=True):
+            content = match["metadata"].get("content", "")
+            source = match["metadata"].get("source", "document")
+            page = match["metadata"].get("page", "unknown")
+            part = f"From {source} (Page {page}):\n{content}\n"
+
+            cost = estimate_tokens(part)
+            if cost > budget:
+                if context_parts:
+                    break
+                # Always keep (part of) the best chunk
+                part = truncate_to_tokens(part, budget)
+                cost = budget
+            context_parts.append(part)
+            budget -= cost
+        return "\n".join(context_parts)
+
+    def build(
+        self,
+        user_message: str,
+        profile_context: str = "",
+        summary: str = "",
+        history: Optional[List[Tuple[int, str, str]]] = None,
+        rag_matches: Optional[List[Dict[str, Any]]] = None,
+    ) -> str:
+        """
+        Build the answer prompt.
+
+        Args:
+            user_message: The current user message
+            profile_context: Formatted profile block
+            summary: Rolling summary of older conversation
+            history: Recent messages already selected with ``select_history``
+            rag_matches: Vector-store matches ({"score", "metadata"})
+
+        Returns:
+            The formatted ANSWER_USER_QUERY_PROMPT
+        """
+        context_parts = []
+        if profile_context:
+            context_parts.append(
+                truncate_to_tokens(profile_context, self.budgets["profile"])
+            )
+
+        if summary:
+            context_parts.append(
+                "Earlier Conversation Summary:\n"
+                + truncate_to_tokens(summary, self.budgets["summary"])
+            )
+
+        history_context = self.format_history(history or [])
+        if history_context:
+            context_parts.append(f"Recent Conversation History:\n{history_context}")
+
+        rag_context = self.format_documents(rag_matches or [])
+        if rag_context:
+            context_parts.append(f"Relevant Document Information:\n{rag_context}")
+
+        # Merge context
+        context = (
+            "\n".join(context_parts)
+            if context_parts
+            else "No user income or retirement information available."
+        )
+
+        return ANSWER_USER_QUERY_PROMPT.format(
+            user_query=user_message.strip(), context=context
+        )
+
+    def build_general(self, user_message: str) -> str:
+        """Build the answer prompt for a user-independent question, without any user context."""
+        return ANSWER_USER_QUERY_PROMPT.format(
+            user_query=user_message.strip(), context=GENERAL_QUESTION_CONTEXT
+        )
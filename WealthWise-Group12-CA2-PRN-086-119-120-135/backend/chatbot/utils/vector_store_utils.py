@@ -0,0 +1,283 @@
+import os
+import json
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+import numpy as np
+from django.conf import settings
+
+
+class VectorStore:
+    """
+    Interface for the chatbot's document vector index.
+
+    Every operation is scoped to a single user, so backends can store each user's
+    vectors in their own partition instead of filtering on metadata.
+    """
+
+    # Label for the backend in metrics
+    backend = "unknown"
+
+    def upsert(self, user_id, vectors: List[Dict[str, Any]]) -> None:
+        """
+        Insert or replace vectors for a user.
+
+        Args:
+            user_id: Owner of the vectors
+            vectors: List of {"id", "values", "metadata"} dictionaries
+        """
+        raise NotImplementedError
+
+    def query(self, user_id, vector: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Find the vectors most similar to ``vector`` among the user's documents.
+
+        Args:
+            user_id: Owner of the vectors to search
+            vector: Query embedding
+            top_k: Number of matches to return
+
+        Returns:
+            List of {"id", "score", "metadata"} dictionaries, best match first
+        """
+        raise NotImplementedError
+
+
+class PineconeVectorStore(VectorStore):
+    """Remote Pinecone index shared by all users, partitioned with a user_id filter."""
+
+    backend = "pinecone"
+
+    def __init__(self, api_key: str, environment: str, index_name: str):
+        from pinecone import Pinecone, ServerlessSpec
+
+        self.pc = Pinecone(api_key=api_key)
+
+        # Check if index exists
+        existing_indexes = [index.name for index in self.pc.list_indexes()]
+
+        if index_name not in existing_indexes:
+            # Create index with appropriate dimensions for Google embeddings
+            self.pc.create_index(
+                name=index_name,
+                dimension=768,  # Google embedding-001 dimension
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region=environment),
+            )
+            print(f"Created Pinecone index: {index_name}")
+
+        # Connect to the index
+        self.index = self.pc.Index(index_name)
+
+    def upsert(self, user_id, vectors: List[Dict[str, Any]]) -> None:
+        self.index.upsert(vectors=vectors)
+
+    def query(self, user_id, vector: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+        search_results = self.index.query(
+            vector=vector,
+            top_k=top_k,
+            include_metadata=True,
+            filter={"user_id": str(user_id)},
+        )
+        return [
+            {"id": match.id, "score": match.score, "metadata": match.metadata or {}}
+            for match in search_results.matches
+        ]
+
+
+class LocalVectorStore(VectorStore):
+    """
+    On-disk vector index with one partition directory per user.
+
+    Each partition holds a float32 ``vectors.npy`` matrix of L2-normalized rows,
+    opened with ``mmap_mode="r"`` so worker processes share its pages, and a
+    ``metadata.json`` file with the vector IDs and metadata in the same row order.
+    Search is an exact cosine similarity scan, which stays well under a
+    millisecond for the few thousand chunks a single user typically uploads.
+    """
+
+    backend = "local"
+
+    def __init__(self, base_dir):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # user_id -> (metadata file mtime, ids, metadata, vectors)
+        self._partitions = {}
+
+    def _partition_dir(self, user_id) -> Path:
+        return self.base_dir / f"user_{user_id}"
+
+    @contextmanager
+    def _locked_partition(self, user_id):
+        """
+        Hold the partition's write lock across threads and processes.
+
+        Ingestion workers are separate processes writing the same partitions, so
+        besides the thread lock an exclusive ``flock`` is taken on the partition's
+        lock file for the whole read-modify-write.
+        """
+        partition_dir = self._partition_dir(user_id)
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(partition_dir / ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield partition_dir
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_partition(self, user_id, use_cache: bool = True):
+        partition_dir = self._partition_dir(user_id)
+        metadata_path = partition_dir / "metadata.json"
+        try:
+            mtime = metadata_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return [], [], None
+
+        cached = self._partitions.get(user_id)
+        if use_cache and cached and cached[0] == mtime:
+            return cached[1], cached[2], cached[3]
+
+        with open(metadata_path) as f:
+            data = json.load(f)
+        vectors = np.load(partition_dir / "vectors.npy", mmap_mode="r")
+        if len(vectors) != len(data["ids"]):
+            # A writer is midway through replacing the partition; skip caching
+            return [], [], None
+
+        self._partitions[user_id] = (mtime, data["ids"], data["metadata"], vectors)
+        return data["ids"], data["metadata"], vectors
+
+    def upsert(self, user_id, vectors: List[Dict[str, Any]]) -> None:
+        if not vectors:
+            return
+
+        with self._locked_partition(user_id) as partition_dir:
+            # Re-read under the lock: another process may have written since we cached
+            ids, metadata, matrix = self._load_partition(user_id, use_cache=False)
+            ids, metadata = list(ids), list(metadata)
+            rows = [] if matrix is None else list(np.asarray(matrix))
+            positions = {vector_id: i for i, vector_id in enumerate(ids)}
+
+            for vector in vectors:
+                values = np.asarray(vector["values"], dtype=np.float32)
+                norm = np.linalg.norm(values)
+                if norm:
+                    values = values / norm
+
+                position = positions.get(vector["id"])
+                if position is None:
+                    positions[vector["id"]] = len(ids)
+                    ids.append(vector["id"])
+                    metadata.append(vector.get("metadata", {}))
+                    rows.append(values)
+                else:
+                    metadata[position] = vector.get("metadata", {})
+                    rows[position] = values
+
+            # Write to temporary files and swap them in, vectors before metadata,
+            # so readers never see metadata that points past the end of the matrix
+            with tempfile.NamedTemporaryFile(
+                dir=partition_dir, suffix=".npy", delete=False
+            ) as f:
+                np.save(f, np.vstack(rows).astype(np.float32))
+            os.replace(f.name, partition_dir / "vectors.npy")
+
+            with tempfile.NamedTemporaryFile(
+                "w", dir=partition_dir, suffix=".json", delete=False
+            ) as f:
+                json.dump({"ids": ids, "metadata": metadata}, f)
+            os.replace(f.name, partition_dir / "metadata.json")
+
+            self._partitions.pop(user_id, None)
+
+    def query(self, user_id, vector: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+        ids, metadata, matrix = self._load_partition(user_id)
+        if matrix is None or not len(ids):
+            return []
+
+        query_vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if norm:
+            query_vector = query_vector / norm
+
+        scores = matrix @ query_vector
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+
+        return [
+            {"id": ids[i], "score": float(scores[i]), "metadata": metadata[i]}
+            for i in best
+        ]
+
+
+_vector_store = None
+_vector_store_failed_at = None
+_vector_store_lock = threading.Lock()
+
+
+def get_vector_store() -> Optional[VectorStore]:
+    """
+    Return the process-wide vector store selected by ``settings.CHATBOT_VECTOR_STORE``.
+
+    "pinecone" uses the remote index (requires PINECONE_API_KEY) and "local" uses
+    the on-disk index under ``settings.CHATBOT_VECTOR_STORE_DIR``. When the setting
+    is empty, Pinecone is used if an API key is configured and the local index otherwise.
+
+    The store is built once per process (wealthwise/asgi.py builds it at startup).
+    After a failed initialization, callers get None without another attempt until
+    ``settings.CHATBOT_VECTOR_STORE_RETRY_SECONDS`` have passed.
+
+    Returns:
+        The vector store, or None if the selected backend could not be initialized
+    """
+    global _vector_store, _vector_store_failed_at
+    if _vector_store is not None or _recently_failed():
+        return _vector_store
+
+    with _vector_store_lock:
+        if _vector_store is not None or _recently_failed():
+            return _vector_store
+
+        pinecone_api_key = os.getenv("PINECONE_API_KEY")
+        backend = settings.CHATBOT_VECTOR_STORE or (
+            "pinecone" if pinecone_api_key else "local"
+        )
+
+        try:
+            if backend == "pinecone":
+                _vector_store = PineconeVectorStore(
+                    api_key=pinecone_api_key,
+                    environment=os.getenv("PINECONE_ENVIRONMENT", "us-east-1"),
+                    index_name=os.getenv("PINECONE_INDEX_NAME", "pension-chatbot"),
+                )
+            elif backend == "local":
+                _vector_store = LocalVectorStore(settings.CHATBOT_VECTOR_STORE_DIR)
+            else:
+                print(f"Warning: unknown vector store backend '{backend}'.")
+        except Exception as e:
+            print(f"Error initializing {backend} vector store: {e}")
+
+        if _vector_store is None:
+            _vector_store_failed_at = time.monotonic()
+        return _vector_store
+
+
+def _recently_failed() -> bool:
+    return (
+        _vector_store_failed_at is not None
+        and time.monotonic() - _vector_store_failed_at
+        < settings.CHATBOT_VECTOR_STORE_RETRY_SECONDS
+    )
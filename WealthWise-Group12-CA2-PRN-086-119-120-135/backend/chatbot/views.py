@@ -1,19 +1,49 @@
 import json
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from chatbot.utils.chatbot_utils import ChatBot
+from chatbot.models import IngestionJob
 
 
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def chat_with_bot(request):
+async def _authenticate(request):
+    """
+    JWT-authenticate a plain Django request.
+
+    DRF's ``api_view`` can't wrap async views, so the chat view checks the token itself.
+
+    Returns:
+        The authenticated user or None
+    """
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+@csrf_exempt
+async def chat_with_bot(request):
+    """
+    Async chat endpoint: under ASGI (wealthwise/asgi.py) a worker keeps serving
+    other requests while this one waits on the LLM.
+    """
     if request.method != "POST":
         return JsonResponse({"error": "Only POST requests are allowed"}, status=405)
 
+    user = await _authenticate(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+
     try:
         chat_id = 1
-        user_id = request.user.id if request.user.is_authenticated else None
+        user_id = user.id
 
         # Extract message from form-data or JSON
         if request.content_type.startswith("multipart/form-data"):
@@ -25,11 +55,22 @@ def chat_with_bot(request):
                 {"error": "user_message or file is required"}, status=400
             )
 
-        # Create ChatBot instance
-        bot = ChatBot(chat_id=chat_id, user_id=user_id)
+        stream = request.POST.get("stream", request.GET.get("stream", "")).lower() in (
+            "1",
+            "true",
+        )
+
+        # Create ChatBot instance (its clients are built with blocking calls, so off the loop)
+        bot = await sync_to_async(ChatBot)(chat_id=chat_id, user_id=user_id)
 
         # Pass both text + file
-        response = bot.reply(user_message=user_message, file=uploaded_file)
+        response = await bot.areply(
+            user_message=user_message, file=uploaded_file, stream=stream
+        )
+
+        if stream:
+            use_sse = "text/event-stream" in request.headers.get("Accept", "")
+            return _stream_chat_response(bot, chat_id, user_id, response, use_sse)
 
         extracted_user_data = None
         external_resources = None
@@ -55,9 +96,86 @@ def chat_with_bot(request):
                 "user_id": user_id,
                 "extracted_user_data": extracted_user_data,
                 "external_resources": external_resources,
+                "ingestion_job_id": bot.ingestion_job_id,
                 "bot_reply": response,
             }
         )
 
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
+
+
+def _stream_chat_response(bot, chat_id, user_id, response, use_sse):
+    """
+    Stream a chat reply as NDJSON (default) or Server-Sent Events.
+
+    Each answer chunk is sent as a {"type": "token"} event as soon as the LLM
+    produces it, followed by a final {"type": "done"} event carrying the same
+    fields as the non-streaming response. Intents that don't stream (extraction,
+    resources) send only the "done" event.
+    """
+
+    def encode(event):
+        payload = json.dumps(event, default=str)
+        return f"data: {payload}\n\n" if use_sse else f"{payload}\n"
+
+    async def events():
+        extracted_user_data = None
+        external_resources = None
+        bot_reply = response
+
+        if isinstance(response, dict):
+            if "youtube_videos" in response or "blog_articles" in response:
+                external_resources = response
+                bot_reply = response.get("message", "Here are some resources for you:")
+            else:
+                extracted_user_data = response
+                bot_reply = f"I have extracted these information from your document ```json {extracted_user_data}```"
+        elif not isinstance(response, str):
+            answer_parts = []
+            async for token in response:
+                answer_parts.append(token)
+                yield encode({"type": "token", "content": token})
+            bot_reply = "".join(answer_parts)
+
+        yield encode(
+            {
+                "type": "done",
+                "success": True,
+                "chat_id": chat_id,
+                "user_id": user_id,
+                "extracted_user_data": extracted_user_data,
+                "external_resources": external_resources,
+                "ingestion_job_id": bot.ingestion_job_id,
+                "bot_reply": bot_reply,
+            }
+        )
+
+    streaming_response = StreamingHttpResponse(
+        events(),
+        content_type="text/event-stream" if use_sse else "application/x-ndjson",
+    )
+    streaming_response["Cache-Control"] = "no-cache"
+    streaming_response["X-Accel-Buffering"] = "no"
+    return streaming_response
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def ingestion_job_status(request, job_id):
+    job = IngestionJob.objects.filter(id=job_id, user=request.user).first()
+    if not job:
+        return JsonResponse({"error": "Ingestion job not found"}, status=404)
+
+    return JsonResponse(
+        {
+            "job_id": job.id,
+            "source": job.source,
+            "status": job.status,
+            "progress": job.progress,
+            "message": job.message,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+    )
@@ -0,0 +1,44 @@
+"""
+Prometheus metrics for calls from Django to the predictions (FastAPI) service.
+
+They are registered on prometheus_client's default registry, which the
+django_prometheus ``/metrics`` route already exports.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+PREDICTIONS_REQUEST_SECONDS = Histogram(
+    "predictions_client_request_duration_seconds",
+    "Latency of predictions service calls, including retries and hedges.",
+    ["endpoint", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+PREDICTIONS_ATTEMPTS = Counter(
+    "predictions_client_attempts_total",
+    "Individual HTTP attempts to the predictions service by result.",
+    ["endpoint", "result"],
+)
+
+PREDICTIONS_RETRIES = Counter(
+    "predictions_client_retries_total",
+    "Retried predictions service calls.",
+    ["endpoint"],
+)
+
+PREDICTIONS_HEDGES = Counter(
+    "predictions_client_hedges_total",
+    "Hedged (duplicate) requests sent because the first attempt was slow.",
+    ["endpoint"],
+)
+
+PREDICTIONS_CIRCUIT_OPEN = Gauge(
+    "predictions_client_circuit_open",
+    "1 while the circuit breaker to the predictions service is open.",
+)
+
+PREDICTIONS_CACHE_REQUESTS = Counter(
+    "predictions_client_cache_requests_total",
+    "Life expectancy prediction cache lookups by result (hit/miss).",
+    ["result"],
+)
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import math
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from users.metrics import PREDICTIONS_CACHE_REQUESTS
+
+# Latest model version reported by the predictions service. Kept without a timeout and
+# overwritten from the X-Model-Version header of every service response, so a model
+# rollout takes over at the first call that reaches the service
+MODEL_VERSION_KEY = "life_expectancy_model_version"
+
+# Field types of the predictions service's LifeExpectancyInput schema
+LIFE_EXPECTANCY_FIELDS = {
+    "Height": float,
+    "Weight": float,
+    "Gender": str,
+    "BMI": float,
+    "Physical_Activity": str,
+    "Smoking_Status": str,
+    "Alcohol_Consumption": str,
+    "Diet": str,
+    "Blood_Pressure": str,
+    "Cholesterol": float,
+    "Asthma": int,
+    "Diabetes": int,
+    "Heart_Disease": int,
+    "Hypertension": int,
+}
+
+
+def canonicalize_life_expectancy_input(data: Dict[str, Any]) -> Optional[str]:
+    """
+    Normalize life expectancy form data to the values the model is given.
+
+    Numbers are compared by value (so "170", 170 and 170.0 are the same input),
+    booleans and 0/1 flags match, and unrelated fields are ignored. Category strings
+    are kept as-is because the model treats them case-sensitively.
+
+    Returns:
+        A canonical JSON string, or None if the data isn't a valid model input
+        (the service is left to reject it)
+    """
+    canonical = {}
+    for field, kind in LIFE_EXPECTANCY_FIELDS.items():
+        value = data.get(field)
+        if kind is str:
+            if not isinstance(value, str):
+                return None
+            canonical[field] = value
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        if not math.isfinite(number) or (kind is int and not number.is_integer()):
+            return None
+        canonical[field] = int(number) if kind is int else number
+    return json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+
+
+def _prediction_key(model_version: str, canonical: str) -> str:
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"life_expectancy_prediction:{model_version}:{digest}"
+
+
+def get_cached_life_expectancy(data: Dict[str, Any]) -> Optional[float]:
+    """
+    Return the cached prediction for these inputs under the current model version.
+
+    Misses (including when no model version is known yet) fall through to the
+    predictions service, whose answer is stored by set_cached_life_expectancy.
+    """
+    canonical = canonicalize_life_expectancy_input(data)
+    model_version = cache.get(MODEL_VERSION_KEY)
+    if canonical is None or model_version is None:
+        PREDICTIONS_CACHE_REQUESTS.labels(result="miss").inc()
+        return None
+
+    prediction = cache.get(_prediction_key(model_version, canonical))
+    PREDICTIONS_CACHE_REQUESTS.labels(result="miss" if prediction is None else "hit").inc()
+    return prediction
+
+
+def set_cached_life_expectancy(
+    data: Dict[str, Any], prediction: float, model_version: Optional[str]
+) -> None:
+    """
+    Cache a prediction returned by the predictions service.
+
+    Args:
+        data: The inputs that were sent to the service
+        prediction: Its predicted life expectancy
+        model_version: The service's X-Model-Version header; nothing is cached without it
+    """
+    if not model_version:
+        return
+    if cache.get(MODEL_VERSION_KEY) != model_version:
+        cache.set(MODEL_VERSION_KEY, model_version, timeout=None)
+
+    canonical = canonicalize_life_expectancy_input(data)
+    if canonical is None:
+        return
+    cache.set(
+        _prediction_key(model_version, canonical),
+        prediction,
+        timeout=settings.PREDICTIONS_CACHE_TIMEOUT,
+    )
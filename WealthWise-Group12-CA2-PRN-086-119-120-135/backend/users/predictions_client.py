@@ -0,0 +1,270 @@
+import math
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from config import FASTAPI_URL
+from users.metrics import (
+    PREDICTIONS_ATTEMPTS,
+    PREDICTIONS_CIRCUIT_OPEN,
+    PREDICTIONS_HEDGES,
+    PREDICTIONS_REQUEST_SECONDS,
+    PREDICTIONS_RETRIES,
+)
+
+# Gateway errors mean the request never got a real answer, so it's safe to send again
+RETRYABLE_STATUSES = {502, 503, 504}
+
+
+class PredictionServiceUnavailable(Exception):
+    """The predictions service can't be reached: the circuit is open or every attempt failed."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> Optional[str]:
+        return str(math.ceil(self.retry_after)) if self.retry_after else None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker, shared by all threads of a process.
+
+    After ``failure_threshold`` failed calls in a row the circuit opens and calls
+    fail fast for ``reset_timeout`` seconds. Then a single trial call is let through
+    (half-open); its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(self.reset_timeout - (time.monotonic() - self._opened_at), 1.0)
+
+    def release_trial(self) -> None:
+        """Let another trial call through after one ended without a verdict on the service."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+        PREDICTIONS_CIRCUIT_OPEN.set(0)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is None and self._failures < self.failure_threshold:
+                return
+            self._opened_at = time.monotonic()
+        PREDICTIONS_CIRCUIT_OPEN.set(1)
+
+
+class PredictionsClient:
+    """
+    Client for the predictions (FastAPI) service.
+
+    - Keep-alive connections from a pooled requests session
+    - Short per-attempt timeouts inside an overall deadline, so a slow predictions
+      pod holds a Django worker for at most ``deadline`` seconds
+    - Bounded retries with full-jitter exponential backoff on connection errors,
+      timeouts and gateway errors
+    - Hedging: if an attempt hasn't answered after ``hedge_after`` seconds, an
+      identical request is sent and the first good response wins (the prediction
+      endpoints are pure functions of their input, so duplicates are harmless)
+    - A circuit breaker that fails fast while the service keeps failing
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int,
+        timeout: float,
+        connect_timeout: float,
+        deadline: float,
+        max_retries: int,
+        retry_backoff: float,
+        hedge_after: float,
+        breaker: CircuitBreaker,
+    ):
+        self.base_url = (base_url or "").rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.hedge_after = hedge_after
+        self.breaker = breaker
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Attempts run here so a slow one can be hedged; sized to the connection pool
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="predictions-client"
+        )
+
+    def post(self, path: str, payload: Dict[str, Any]) -> requests.Response:
+        """
+        POST a JSON payload to the predictions service.
+
+        Args:
+            path: Endpoint path, e.g. "/life-expectancy"
+            payload: JSON-serializable request body
+
+        Returns:
+            The first non-gateway-error response (the caller checks its status)
+
+        Raises:
+            PredictionServiceUnavailable: The circuit is open, or every attempt
+                failed before the deadline
+        """
+        if not self.breaker.allow():
+            PREDICTIONS_REQUEST_SECONDS.labels(endpoint=path, outcome="circuit_open").observe(0)
+            raise PredictionServiceUnavailable(
+                "Predictions service circuit is open", self.breaker.retry_after()
+            )
+
+        started = time.monotonic()
+        deadline = started + self.deadline
+        outcome = "unavailable"
+        last_error = None
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    delay = random.uniform(0, self.retry_backoff * 2 ** (attempt - 1))
+                    if time.monotonic() + delay >= deadline:
+                        break
+                    PREDICTIONS_RETRIES.labels(endpoint=path).inc()
+                    time.sleep(delay)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    response = self._hedged_post(path, payload, min(self.timeout, remaining))
+                except requests.RequestException as e:
+                    last_error = e
+                    continue
+                if response.status_code in RETRYABLE_STATUSES:
+                    last_error = f"HTTP {response.status_code}"
+                    continue
+
+                # Any other answer (including 4xx/500 for bad input) means the service is up
+                self.breaker.record_success()
+                outcome = "success" if response.ok else "error"
+                return response
+
+            self.breaker.record_failure()
+            raise PredictionServiceUnavailable(
+                f"Predictions service call to {path} failed: {last_error}",
+                self.breaker.retry_after() or None,
+            )
+        except PredictionServiceUnavailable:
+            raise
+        except Exception:
+            # Not the service's fault (e.g. an unserializable payload)
+            self.breaker.release_trial()
+            raise
+        finally:
+            PREDICTIONS_REQUEST_SECONDS.labels(endpoint=path, outcome=outcome).observe(
+                time.monotonic() - started
+            )
+
+    def _hedged_post(self, path: str, payload, timeout: float) -> requests.Response:
+        primary = self._executor.submit(self._attempt, path, payload, timeout)
+        if not self.hedge_after or self.hedge_after >= timeout:
+            return primary.result()
+
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        PREDICTIONS_HEDGES.labels(endpoint=path).inc()
+        hedge = self._executor.submit(
+            self._attempt, path, payload, timeout - self.hedge_after
+        )
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if (
+                    future.exception() is None
+                    and future.result().status_code not in RETRYABLE_STATUSES
+                ):
+                    return future.result()
+        # Both failed; report the primary's failure
+        return primary.result()
+
+    def _attempt(self, path: str, payload, timeout: float) -> requests.Response:
+        try:
+            response = self.session.post(
+                f"{self.base_url}{path}",
+                json=payload,
+                timeout=(min(self.connect_timeout, timeout), timeout),
+            )
+        except requests.RequestException:
+            PREDICTIONS_ATTEMPTS.labels(endpoint=path, result="exception").inc()
+            raise
+        PREDICTIONS_ATTEMPTS.labels(
+            endpoint=path, result=f"{response.status_code // 100}xx"
+        ).inc()
+        return response
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_predictions_client() -> PredictionsClient:
+    """Return the process-wide predictions service client configured from settings."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PredictionsClient(
+                    base_url=FASTAPI_URL,
+                    pool_size=settings.PREDICTIONS_POOL_SIZE,
+                    timeout=settings.PREDICTIONS_TIMEOUT,
+                    connect_timeout=settings.PREDICTIONS_CONNECT_TIMEOUT,
+                    deadline=settings.PREDICTIONS_DEADLINE,
+                    max_retries=settings.PREDICTIONS_MAX_RETRIES,
+                    retry_backoff=settings.PREDICTIONS_RETRY_BACKOFF,
+                    hedge_after=settings.PREDICTIONS_HEDGE_AFTER,
+                    breaker=CircuitBreaker(
+                        settings.PREDICTIONS_BREAKER_FAILURES,
+                        settings.PREDICTIONS_BREAKER_RESET_SECONDS,
+                    ),
+                )
+    return _client
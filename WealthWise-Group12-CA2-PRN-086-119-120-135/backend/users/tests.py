@@ -1,3 +1,379 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from .models import IncomeStatus, LifeExpectancy, RetirementInfo, UserData
+from .prediction_cache import (
+    canonicalize_life_expectancy_input,
+    get_cached_life_expectancy,
+    set_cached_life_expectancy,
+)
+from .predictions_client import CircuitBreaker, PredictionsClient, PredictionServiceUnavailable
+from .views import _predict_life_expectancy
+from .serializers import RetirementInfoSerializer
+
+USER_DATA = {"name": "Test User", "gender": "male", "numberOfDependants": 2}
+INCOME_STATUS = {
+    "currentSalary": "1800000.00",
+    "yearsOfService": 12,
+    "employerType": "Private",
+    "pensionScheme": "NPS",
+    "pensionBalance": "2450000.00",
+}
+RETIREMENT_INFO = {
+    "plannedRetirementAge": 60,
+    "retirementLifestyle": "comfortable",
+    "monthlyRetirementExpense": "80000.00",
+    "legacyGoal": "moderate-legacy",
+}
+LIFE_EXPECTANCY = {
+    "Height": 175,
+    "Weight": 70,
+    "Gender": "Male",
+    "BMI": 22.9,
+    "Physical_Activity": "Moderate",
+    "Smoking_Status": "Never",
+    "Alcohol_Consumption": "Low",
+    "Diet": "Balanced",
+    "Blood_Pressure": "Normal",
+    "Cholesterol": 180,
+}
+
+
+async def _read_stream(response) -> bytes:
+    # The listing streams from an async generator (for ASGI); collect it here
+    return b"".join([chunk async for chunk in response.streaming_content])
+
+
+class OnboardingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="onboarding", password="x")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("onboard_user")
+
+    def assertNothingSaved(self):
+        for model in (UserData, IncomeStatus, RetirementInfo, LifeExpectancy):
+            self.assertFalse(model.objects.filter(user=self.user).exists(), model.__name__)
+
+    @mock.patch("users.views._predict_life_expectancy", return_value=(77.39, None))
+    def test_all_sections_are_saved(self, predict):
+        response = self.client.post(
+            self.url,
+            {
+                "user_data": USER_DATA,
+                "income_status": INCOME_STATUS,
+                "retirement_info": RETIREMENT_INFO,
+                "life_expectancy": LIFE_EXPECTANCY,
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(UserData.objects.get(user=self.user).numberOfDependants, 2)
+        self.assertEqual(IncomeStatus.objects.get(user=self.user).pensionScheme, "NPS")
+        self.assertEqual(RetirementInfo.objects.get(user=self.user).plannedRetirementAge, 60)
+        life_expectancy = LifeExpectancy.objects.get(user=self.user)
+        self.assertEqual(float(life_expectancy.predicted_life_expectancy), 77.39)
+        self.assertFalse(life_expectancy.is_skipped)
+
+    def test_invalid_section_saves_nothing(self):
+        response = self.client.post(
+            self.url,
+            {
+                "user_data": USER_DATA,
+                "income_status": {**INCOME_STATUS, "yearsOfService": "many"},
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data), ["income_status"])
+        self.assertNothingSaved()
+
+    def test_failed_write_rolls_back_earlier_sections(self):
+        with mock.patch.object(
+            RetirementInfoSerializer, "save", side_effect=RuntimeError("database went away")
+        ):
+            response = self.client.post(
+                self.url,
+                {
+                    "user_data": USER_DATA,
+                    "income_status": INCOME_STATUS,
+                    "retirement_info": RETIREMENT_INFO,
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertNothingSaved()
+
+    def test_unavailable_prediction_still_saves_the_sections(self):
+        unavailable = Response(
+            {"error": "Prediction service is temporarily unavailable"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        unavailable["Retry-After"] = "30"
+        LifeExpectancy.objects.create(
+            user=self.user, **LIFE_EXPECTANCY, predicted_life_expectancy=70
+        )
+
+        with mock.patch(
+            "users.views._predict_life_expectancy", return_value=(None, unavailable)
+        ):
+            response = self.client.post(
+                self.url,
+                {"user_data": USER_DATA, "life_expectancy": {**LIFE_EXPECTANCY, "Weight": 80}},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["prediction_error"], "Prediction service is temporarily unavailable"
+        )
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertTrue(UserData.objects.filter(user=self.user).exists())
+        life_expectancy = LifeExpectancy.objects.get(user=self.user)
+        self.assertEqual(life_expectancy.Weight, 80)
+        # The earlier prediction was for other inputs
+        self.assertIsNone(life_expectancy.predicted_life_expectancy)
+
+    def test_existing_records_are_updated(self):
+        UserData.objects.create(user=self.user, name="Old Name")
+
+        response = self.client.post(
+            self.url, {"user_data": {"name": "New Name"}}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(UserData.objects.get(user=self.user).name, "New Name")
+
+
+def _http_response(status_code, body=None, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body or {}).encode()
+    response.headers.update(headers or {})
+    return response
+
+
+MODEL_INPUT = {**LIFE_EXPECTANCY, "Asthma": 0, "Diabetes": 0, "Heart_Disease": 0, "Hypertension": 0}
+
+
+class PredictionCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_equivalent_inputs_share_a_canonical_form(self):
+        same = {
+            **MODEL_INPUT,
+            "Height": "175",
+            "Cholesterol": 180.0,
+            "Asthma": False,
+            "unrelated": "ignored",
+        }
+
+        self.assertEqual(
+            canonicalize_life_expectancy_input(same),
+            canonicalize_life_expectancy_input(MODEL_INPUT),
+        )
+        self.assertNotEqual(
+            canonicalize_life_expectancy_input({**MODEL_INPUT, "Diet": "balanced"}),
+            canonicalize_life_expectancy_input(MODEL_INPUT),
+        )
+
+    def test_invalid_inputs_have_no_canonical_form(self):
+        self.assertIsNone(canonicalize_life_expectancy_input({**MODEL_INPUT, "Height": "tall"}))
+        self.assertIsNone(canonicalize_life_expectancy_input({**MODEL_INPUT, "Asthma": 0.5}))
+        self.assertIsNone(canonicalize_life_expectancy_input({**MODEL_INPUT, "Gender": None}))
+
+    def test_predictions_are_cached_per_model_version(self):
+        self.assertIsNone(get_cached_life_expectancy(MODEL_INPUT))
+
+        set_cached_life_expectancy(MODEL_INPUT, 77.39, None)
+        self.assertIsNone(get_cached_life_expectancy(MODEL_INPUT))
+
+        set_cached_life_expectancy(MODEL_INPUT, 77.39, "v1")
+        self.assertEqual(get_cached_life_expectancy({**MODEL_INPUT, "Weight": "70"}), 77.39)
+
+        # A new model version reported by the service retires earlier predictions
+        set_cached_life_expectancy({**MODEL_INPUT, "Weight": 71}, 77.1, "v2")
+        self.assertIsNone(get_cached_life_expectancy(MODEL_INPUT))
+
+    def test_repeated_prediction_skips_the_service(self):
+        client = mock.Mock()
+        client.post.return_value = _http_response(
+            200, {"predicted_life_expectancy": 77.39}, {"X-Model-Version": "v1"}
+        )
+
+        with mock.patch("users.views.get_predictions_client", return_value=client):
+            self.assertEqual(_predict_life_expectancy(dict(MODEL_INPUT)), (77.39, None))
+            self.assertEqual(_predict_life_expectancy(dict(MODEL_INPUT)), (77.39, None))
+
+        self.assertEqual(client.post.call_count, 1)
+
+
+class PredictionsClientTests(SimpleTestCase):
+    def make_client(self, **options):
+        settings = {
+            "base_url": "http://predictions",
+            "pool_size": 4,
+            "timeout": 1.0,
+            "connect_timeout": 0.5,
+            "deadline": 2.0,
+            "max_retries": 2,
+            "retry_backoff": 0.001,
+            "hedge_after": 0,
+            "breaker": CircuitBreaker(failure_threshold=2, reset_timeout=0.2),
+            **options,
+        }
+        return PredictionsClient(**settings)
+
+    def test_gateway_errors_are_retried(self):
+        client = self.make_client()
+        with mock.patch.object(
+            client.session, "post", side_effect=[_http_response(503), _http_response(200)]
+        ) as post:
+            response = client.post("/life-expectancy", {})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(post.call_count, 2)
+
+    def test_client_errors_are_returned_without_retrying(self):
+        client = self.make_client()
+        with mock.patch.object(
+            client.session, "post", return_value=_http_response(422)
+        ) as post:
+            response = client.post("/life-expectancy", {})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(post.call_count, 1)
+        self.assertTrue(client.breaker.allow())
+
+    def test_circuit_opens_after_repeated_failures_then_recovers(self):
+        client = self.make_client()
+        with mock.patch.object(
+            client.session, "post", side_effect=requests.ConnectionError
+        ) as post:
+            for _ in range(2):
+                with self.assertRaises(PredictionServiceUnavailable):
+                    client.post("/life-expectancy", {})
+            self.assertEqual(post.call_count, 6)
+
+            # Open: fail fast without a request
+            with self.assertRaises(PredictionServiceUnavailable) as raised:
+                client.post("/life-expectancy", {})
+            self.assertEqual(post.call_count, 6)
+            self.assertEqual(raised.exception.retry_after_header, "1")
+
+        time.sleep(0.25)
+        with mock.patch.object(client.session, "post", return_value=_http_response(200)):
+            self.assertEqual(client.post("/life-expectancy", {}).status_code, 200)
+        self.assertTrue(client.breaker.allow())
+
+    def test_half_open_circuit_lets_one_trial_through(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertTrue(breaker.allow())
+
+    def test_slow_attempt_is_hedged(self):
+        client = self.make_client(hedge_after=0.05)
+        first_call = threading.Event()
+
+        def post(*args, **kwargs):
+            if not first_call.is_set():
+                first_call.set()
+                time.sleep(0.5)
+            return _http_response(200)
+
+        started = time.monotonic()
+        with mock.patch.object(client.session, "post", side_effect=post) as session_post:
+            response = client.post("/life-expectancy", {})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(session_post.call_count, 2)
+        self.assertLess(time.monotonic() - started, 0.4)
+
+
+class IncomeStatusListTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(
+            [User(username=f"income{i}", email=f"income{i}@example.com") for i in range(250)]
+        )
+        IncomeStatus.objects.bulk_create(
+            [IncomeStatus(user=user, **INCOME_STATUS) for user in users]
+        )
+        cls.viewer = users[0]
+
+    def setUp(self):
+        self.client.force_authenticate(self.viewer)
+        self.url = reverse("list_income_status")
+
+    def test_cursor_pages_cover_every_record_once(self):
+        ids, url, pages = [], self.url, 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [record["id"] for record in response.data["results"]]
+            url = response.data["next"]
+            pages += 1
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids, list(IncomeStatus.objects.order_by("id").values_list("id", flat=True)))
+
+    def test_page_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"page_size": 50})
+
+        self.assertEqual(len(response.data["results"]), 50)
+        self.assertEqual(response.data["results"][0]["user"]["username"], "income0")
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(self.url, {"page_size": 5000})
+
+        self.assertEqual(len(response.data["results"]), 250)
+
+    def test_deleted_records_do_not_shift_later_pages(self):
+        first = self.client.get(self.url, {"page_size": 100})
+        # With offset pagination this would skip a row on the next page
+        IncomeStatus.objects.filter(id=first.data["results"][0]["id"]).delete()
+
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(
+            second.data["results"][0]["id"], first.data["results"][-1]["id"] + 1
+        )
+
+    def test_stream_ndjson(self):
+        response = self.client.get(self.url, {"stream": "ndjson"})
+
+        rows = [json.loads(line) for line in async_to_sync(_read_stream)(response).splitlines()]
+        self.assertEqual(len(rows), 250)
+        self.assertEqual(rows[0]["pensionScheme"], "NPS")
+
+    def test_stream_csv(self):
+        response = self.client.get(self.url, {"stream": "csv"})
+
+        lines = async_to_sync(_read_stream)(response).decode().splitlines()
+        self.assertEqual(len(lines), 251)
+        self.assertTrue(lines[0].startswith("id,user_id,username"))
+
+    def test_unknown_stream_format_is_rejected(self):
+        response = self.client.get(self.url, {"stream": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -23,4 +23,5 @@ urlpatterns = [
     path('user/get/', views.get_user_data, name='get_user_data'),
     path("life-expectancy/add/", views.add_life_expectancy, name="add_life_expectancy"),
     path('life-expectancy/skip/', views.skip_life_expectancy, name='skip_life_expectancy'),
+    path("onboarding/", views.onboard_user, name="onboard_user"),
 ]
\ No newline at end of file
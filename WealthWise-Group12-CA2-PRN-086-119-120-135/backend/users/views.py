@@ -1,14 +1,20 @@
 import os
+import csv
 import json
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import transaction
 from django.shortcuts import redirect
 from django.contrib.auth import authenticate, login, logout
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework_simplejwt.tokens import RefreshToken
 from allauth.socialaccount.models import SocialApp, SocialAccount, SocialToken
 from django.urls import reverse
@@ -23,8 +29,15 @@ from .models import UserData
 from .serializers import UserDataSerializer, UserRegistrationSerializer, UserLoginSerializer
 from .models import LifeExpectancy
 from .serializers import LifeExpectancySerializer
+from .predictions_client import get_predictions_client, PredictionServiceUnavailable
+from .prediction_cache import get_cached_life_expectancy, set_cached_life_expectancy
 
-from config import SITE_URL, FASTAPI_URL
+from config import SITE_URL
+
+# Runs the onboarding prediction call while the rest of the request is validated
+_prediction_executor = ThreadPoolExecutor(
+    max_workers=settings.PREDICTIONS_POOL_SIZE, thread_name_prefix="onboarding-prediction"
+)
 
 def get_google_data(user):
     """Get basic data from Google OAuth (no People API calls)"""
@@ -210,13 +223,85 @@ def add_income_status(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class IncomeStatusCursorPagination(CursorPagination):
+    """Stable pages by id: new records never shift or repeat rows between pages."""
+    ordering = "id"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+# Rows fetched per database round trip when streaming
+INCOME_STATUS_STREAM_CHUNK_SIZE = 2000
+
+INCOME_STATUS_CSV_FIELDS = [
+    "id", "user_id", "username", "email", "currentSalary", "yearsOfService",
+    "employerType", "pensionScheme", "pensionBalance", "employerContribution",
+    "yourContribution",
+]
+
+
+class _Echo:
+    """File-like object whose write returns the value, so csv.writer produces lines to stream."""
+
+    def write(self, value):
+        return value
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def list_income_status(request):
-    """List all income status records (for all users)"""
-    records = IncomeStatus.objects.all()
-    serializer = IncomeStatusSerializer(records, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    """
+    List income status records (for all users).
+
+    Cursor-paginated by default (?cursor=..., ?page_size= up to 1000). With
+    ?stream=ndjson or ?stream=csv every record is streamed instead, fetched in
+    chunks so memory stays flat however many users there are.
+    """
+    # The nested user serializer reads record.user; join it instead of one query per row
+    records = IncomeStatus.objects.select_related("user").order_by("id")
+
+    stream_format = request.query_params.get("stream")
+    if stream_format in ("ndjson", "csv"):
+        return _stream_income_status(records, stream_format)
+    if stream_format:
+        return Response(
+            {"error": "stream must be 'ndjson' or 'csv'"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    paginator = IncomeStatusCursorPagination()
+    page = paginator.paginate_queryset(records, request)
+    serializer = IncomeStatusSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+def _stream_income_status(records, stream_format):
+    # Async so the ASGI server streams it; a sync iterator would be read fully first
+    async def ndjson_rows():
+        async for record in records.aiterator(chunk_size=INCOME_STATUS_STREAM_CHUNK_SIZE):
+            data = IncomeStatusSerializer(record).data
+            yield json.dumps(data, cls=JSONEncoder) + "\n"
+
+    async def csv_rows():
+        writer = csv.writer(_Echo())
+        yield writer.writerow(INCOME_STATUS_CSV_FIELDS)
+        async for record in records.aiterator(chunk_size=INCOME_STATUS_STREAM_CHUNK_SIZE):
+            yield writer.writerow(
+                [
+                    record.id, record.user_id, record.user.username, record.user.email,
+                    record.currentSalary, record.yearsOfService, record.employerType,
+                    record.pensionScheme, record.pensionBalance,
+                    record.employerContribution, record.yourContribution,
+                ]
+            )
+
+    if stream_format == "csv":
+        response = StreamingHttpResponse(csv_rows(), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="income_status.csv"'
+    else:
+        response = StreamingHttpResponse(ndjson_rows(), content_type="application/x-ndjson")
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 # ==========================
@@ -316,24 +401,10 @@ def add_life_expectancy(request):
         # Step 1: Get data from frontend
         input_data = request.data.copy()
 
-        # Step 2: Call FastAPI service
-        fastapi_url = f"{FASTAPI_URL}/life-expectancy"
-        response = requests.post(fastapi_url, json=input_data, timeout=10)
-
-        if response.status_code != 200:
-            return Response(
-                {"error": "Failed to fetch prediction from FastAPI"},
-                status=status.HTTP_502_BAD_GATEWAY,
-            )
-
-        prediction = response.json()
-        predicted_value = prediction.get("predicted_life_expectancy")
-
-        if predicted_value is None:
-            return Response(
-                {"error": "FastAPI did not return prediction"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        # Step 2: Get the prediction (cached or from FastAPI)
+        predicted_value, error_response = _predict_life_expectancy(input_data)
+        if error_response is not None:
+            return error_response
 
         # Step 3: Save/update in LifeExpectancy model
         instance = LifeExpectancy.objects.filter(user=request.user).first()
@@ -356,7 +427,155 @@ def add_life_expectancy(request):
 
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
+
+
+def _predict_life_expectancy(input_data):
+    """
+    Predict life expectancy for form data.
+
+    Reuses the prediction for identical inputs under the current model, otherwise
+    calls FastAPI service (pooled, retried, hedged, circuit-broken).
+
+    Returns:
+        (predicted value, None) on success, or (None, error Response)
+    """
+    predicted_value = get_cached_life_expectancy(input_data)
+    if predicted_value is not None:
+        return predicted_value, None
+
+    try:
+        response = get_predictions_client().post("/life-expectancy", input_data)
+    except PredictionServiceUnavailable as e:
+        unavailable = Response(
+            {"error": "Prediction service is temporarily unavailable"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        if e.retry_after_header:
+            unavailable["Retry-After"] = e.retry_after_header
+        return None, unavailable
+
+    if response.status_code != 200:
+        return None, Response(
+            {"error": "Failed to fetch prediction from FastAPI"},
+            status=status.HTTP_502_BAD_GATEWAY,
+        )
+
+    prediction = response.json()
+    predicted_value = prediction.get("predicted_life_expectancy")
+
+    if predicted_value is None:
+        return None, Response(
+            {"error": "FastAPI did not return prediction"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    set_cached_life_expectancy(
+        input_data, predicted_value, response.headers.get("X-Model-Version")
+    )
+    return predicted_value, None
+
+
+# ==========================
+# ONBOARDING API
+# ==========================
+
+# Request section -> (related name on User, serializer); each section is optional
+ONBOARDING_SECTIONS = {
+    "user_data": ("user_data", UserDataSerializer),
+    "income_status": ("income_status", IncomeStatusSerializer),
+    "retirement_info": ("retirement_info", RetirementInfoSerializer),
+    "life_expectancy": ("life_expectancy", LifeExpectancySerializer),
+}
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def onboard_user(request):
+    """
+    Save personal details, income status, retirement info and life expectancy
+    inputs in one request.
+
+    Body: {"user_data": {...}, "income_status": {...}, "retirement_info": {...},
+    "life_expectancy": {...}} with any subset of the sections. All sections are
+    validated together and saved in one transaction, or none is saved. The life
+    expectancy prediction runs while the other sections are validated; if the
+    prediction service fails, the sections are still saved with an empty
+    prediction and the response carries ``prediction_error`` (the client can
+    request the prediction later through add_life_expectancy).
+    """
+    sections = {
+        name: request.data[name] for name in ONBOARDING_SECTIONS if name in request.data
+    }
+    if not sections:
+        return Response(
+            {"error": f"Provide at least one of: {', '.join(ONBOARDING_SECTIONS)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    invalid = [name for name, data in sections.items() if not isinstance(data, dict)]
+    if invalid:
+        return Response(
+            {name: ["Expected an object."] for name in invalid},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    prediction = None
+    if "life_expectancy" in sections:
+        prediction = _prediction_executor.submit(
+            _predict_life_expectancy, dict(sections["life_expectancy"])
+        )
+
+    try:
+        # Existing records for every section in one query
+        user = User.objects.select_related(
+            *(related_name for related_name, _ in ONBOARDING_SECTIONS.values())
+        ).get(pk=request.user.pk)
+
+        serializers, errors = {}, {}
+        for name, data in sections.items():
+            related_name, serializer_class = ONBOARDING_SECTIONS[name]
+            instance = getattr(user, related_name, None)
+            serializer = serializer_class(instance, data=data, partial=instance is not None)
+            if serializer.is_valid():
+                serializers[name] = serializer
+            else:
+                errors[name] = serializer.errors
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        extra_fields, error_response = {}, None
+        if prediction is not None:
+            predicted_value, error_response = prediction.result()
+            prediction = None
+            # An unavailable prediction leaves the value empty (and any earlier one
+            # cleared, since it was made for other inputs) instead of failing onboarding
+            extra_fields["life_expectancy"] = {
+                "predicted_life_expectancy": predicted_value,
+                "is_skipped": False,  # Mark as not skipped since user filled the form
+            }
+
+        with transaction.atomic():
+            for name, serializer in serializers.items():
+                serializer.save(user=user, **extra_fields.get(name, {}))
+
+        body = {
+            "message": "Onboarding data saved!",
+            "data": {name: serializer.data for name, serializer in serializers.items()},
+        }
+        if error_response is not None:
+            body["prediction_error"] = error_response.data.get("error")
+        response = Response(body, status=status.HTTP_200_OK)
+        if error_response is not None and error_response.has_header("Retry-After"):
+            response["Retry-After"] = error_response["Retry-After"]
+        return response
+
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    finally:
+        # Don't leave a prediction running for a request that already failed
+        if prediction is not None:
+            prediction.cancel()
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def skip_life_expectancy(request):
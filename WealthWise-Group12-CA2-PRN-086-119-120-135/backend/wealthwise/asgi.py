@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "wealthwise.settings")
 
 application = get_asgi_application()
+
+# Build the chatbot's vector store (Pinecone lists its indexes on connect) while the
+# worker starts, rather than on the event loop inside the first chat request
+from chatbot.utils.vector_store_utils import get_vector_store  # noqa: E402
+
+get_vector_store()
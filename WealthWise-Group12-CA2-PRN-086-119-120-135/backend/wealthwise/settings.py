@@ -116,6 +116,10 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 
+# Media files (chat uploads awaiting background ingestion)
+MEDIA_URL = "media/"
+MEDIA_ROOT = BASE_DIR / "media"
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -185,6 +189,87 @@ REST_FRAMEWORK = {
 # Email Backend (for development)
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# Chatbot: hand PDF ingestion to the background worker (manage.py run_ingestion_worker).
+# Off by default: only enable it where that worker is deployed next to the web server
+CHATBOT_ASYNC_INGESTION = os.getenv("CHATBOT_ASYNC_INGESTION", "false").lower() == "true"
+# A running job whose worker hasn't sent a heartbeat for this long is re-queued
+CHATBOT_INGESTION_LEASE_SECONDS = int(os.getenv("CHATBOT_INGESTION_LEASE_SECONDS", 600))
+# A job claimed this many times without finishing (its worker kept crashing) is failed
+CHATBOT_INGESTION_MAX_ATTEMPTS = int(os.getenv("CHATBOT_INGESTION_MAX_ATTEMPTS", 3))
+
+# Chatbot: parsed PDF page texts kept in memory per worker, keyed by content hash
+CHATBOT_PDF_TEXT_CACHE_MAX_CHARS = 20_000_000
+
+# Chatbot: documents larger than one group of pages are extracted map-reduce style
+CHATBOT_EXTRACTION_GROUP_CHARS = 12_000
+CHATBOT_EXTRACTION_MAX_PAGES = 40
+CHATBOT_EXTRACTION_MAX_WORKERS = 4
+
+# Chatbot: RAG vector store backend ("pinecone" or "local"; empty picks pinecone when PINECONE_API_KEY is set)
+CHATBOT_VECTOR_STORE = os.getenv("CHATBOT_VECTOR_STORE", "").lower()
+CHATBOT_VECTOR_STORE_DIR = os.getenv("CHATBOT_VECTOR_STORE_DIR") or BASE_DIR / "vector_store"
+# Seconds before retrying a vector store that failed to initialize
+CHATBOT_VECTOR_STORE_RETRY_SECONDS = int(os.getenv("CHATBOT_VECTOR_STORE_RETRY_SECONDS", 300))
+
+# Chatbot: query-embedding and RAG result cache
+CHATBOT_QUERY_CACHE_TIMEOUT = int(os.getenv("CHATBOT_QUERY_CACHE_TIMEOUT", 60 * 60 * 24))
+CHATBOT_QUERY_CACHE_MIN_SIMILARITY = 0.98
+CHATBOT_QUERY_CACHE_BUCKET_SIZE = 4
+# Cached index version per user; ingestion clears it, the timeout bounds staleness
+# in other processes when the cache isn't shared
+CHATBOT_INDEX_VERSION_TIMEOUT = int(os.getenv("CHATBOT_INDEX_VERSION_TIMEOUT", 60))
+
+# Chatbot: model that writes answers (also namespaces the shared answer cache)
+CHATBOT_ANSWER_MODEL = os.getenv("CHATBOT_ANSWER_MODEL", "gemini-2.5-flash")
+
+# Chatbot: shared answers to user-independent questions ("What is EPS?"), matched by
+# embedding similarity; purge with manage.py purge_answer_cache (needs a shared cache)
+CHATBOT_ANSWER_CACHE = os.getenv("CHATBOT_ANSWER_CACHE", "true").lower() == "true"
+CHATBOT_ANSWER_CACHE_TIMEOUT = int(os.getenv("CHATBOT_ANSWER_CACHE_TIMEOUT", 60 * 60 * 24))
+CHATBOT_ANSWER_CACHE_MIN_SIMILARITY = 0.95
+CHATBOT_ANSWER_CACHE_BUCKET_SIZE = 8
+
+# Chatbot: external resource searches and generated search queries, cached by topic
+CHATBOT_RESOURCE_CACHE_TIMEOUT = int(os.getenv("CHATBOT_RESOURCE_CACHE_TIMEOUT", 60 * 60 * 24 * 7))
+
+# Chatbot: per-user profile block and rolling history window
+CHATBOT_CONTEXT_CACHE_TIMEOUT = int(os.getenv("CHATBOT_CONTEXT_CACHE_TIMEOUT", 60 * 30))
+# Profile block lifetime when the cache is per process: bounds how long another
+# process's profile update goes unseen
+CHATBOT_LOCAL_CONTEXT_CACHE_TIMEOUT = int(os.getenv("CHATBOT_LOCAL_CONTEXT_CACHE_TIMEOUT", 60))
+CHATBOT_HISTORY_WINDOW_SIZE = 20
+
+# Chatbot: approximate token budget per answer-prompt section, and how many
+# messages that fell out of the raw history are summarized at once
+CHATBOT_PROMPT_BUDGETS = {
+    "profile": 400,
+    "summary": 300,
+    "history": 1200,
+    "documents": 1500,
+}
+CHATBOT_SUMMARY_BATCH_SIZE = 6
+
+# Chatbot: messages older than this are moved to compressed files by manage.py archive_chat_history
+CHATBOT_CHAT_RETENTION_DAYS = int(os.getenv("CHATBOT_CHAT_RETENTION_DAYS", 180))
+CHATBOT_CHAT_ARCHIVE_DIR = os.getenv("CHATBOT_CHAT_ARCHIVE_DIR") or BASE_DIR / "chat_archive"
+
+# Django -> predictions service client (users/predictions_client.py): keep-alive pool,
+# per-attempt timeout inside an overall deadline, jittered retries, hedging after
+# PREDICTIONS_HEDGE_AFTER seconds (0 disables) and a circuit breaker
+PREDICTIONS_POOL_SIZE = 16
+PREDICTIONS_TIMEOUT = float(os.getenv("PREDICTIONS_TIMEOUT", 3))
+PREDICTIONS_CONNECT_TIMEOUT = 1.0
+PREDICTIONS_DEADLINE = float(os.getenv("PREDICTIONS_DEADLINE", 5))
+PREDICTIONS_MAX_RETRIES = 2
+PREDICTIONS_RETRY_BACKOFF = 0.2
+PREDICTIONS_HEDGE_AFTER = float(os.getenv("PREDICTIONS_HEDGE_AFTER", 0.5))
+PREDICTIONS_BREAKER_FAILURES = 5
+PREDICTIONS_BREAKER_RESET_SECONDS = 30
+
+# Life expectancy predictions cached by canonical inputs and model version
+# (users/prediction_cache.py)
+PREDICTIONS_CACHE_TIMEOUT = int(os.getenv("PREDICTIONS_CACHE_TIMEOUT", 60 * 60 * 24 * 7))
+
 # Cache Configuration
 CACHES = {
     "default": {
@@ -193,6 +278,13 @@ CACHES = {
     }
 }
 
+# Share the cache between workers (and the ingestion worker) when Redis is available
+if os.getenv("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+    }
+
 # Logging
 LOGGING = {
     "version": 1,
@@ -1,8 +1,39 @@
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
 import pandas as pd
-from fastapi import FastAPI
-from pydantic import BaseModel
-from models.life_expectancy import predict_life_expectancy
-from models.inflation_prediction import predict_inflation
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+from batching import MicroBatcher
+from inference import InferencePool, InferencePoolSaturated
+from models.life_expectancy import get_model_version, predict_life_expectancy_batch
+from models.inflation_prediction import (
+    MAX_HORIZON_YEARS,
+    current_forecast_month,
+    predict_inflation,
+)
+from models.retirement_projection import project_retirement
+from registry import registry
+
+# Concurrent /life-expectancy requests arriving within BATCH_MAX_WAIT_MS share one model call
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 64))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", 5))
+MAX_BATCH_RECORDS = 1000
+MAX_SCENARIO_RATES = 25
+
+# Load every model in parallel as soon as the worker starts (0: load each on first use)
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "1") == "1"
+
+# Life expectancy inference runs in INFERENCE_PROCESSES forked worker processes
+# (0: the event loop's thread pool); past INFERENCE_MAX_PENDING queued model calls
+# requests get 429 instead of waiting
+INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", 0))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", 32))
 
 
 # Define input schema
@@ -23,35 +54,154 @@ class LifeExpectancyInput(BaseModel):
     Hypertension: int
 
 
+class LifeExpectancyBatchInput(BaseModel):
+    records: List[LifeExpectancyInput] = Field(min_length=1, max_length=MAX_BATCH_RECORDS)
+
+
 class YearRequest(BaseModel):
     year: int
 
 
+class RetirementProjectionInput(BaseModel):
+    current_age: int = Field(ge=0, le=120)
+    retirement_age: int = Field(ge=0, le=120)
+    life_expectancy: float = Field(gt=0, le=120)
+    current_savings: float = Field(ge=0)
+    monthly_contribution: float = Field(default=0, ge=0)
+    monthly_expense: float = Field(ge=0)
+    # Annual percentages; every return rate is combined with every inflation rate
+    return_rates: List[float] = Field(
+        default=[6.0, 8.0, 10.0], min_length=1, max_length=MAX_SCENARIO_RATES
+    )
+    inflation_rates: Optional[List[float]] = Field(
+        default=None, min_length=1, max_length=MAX_SCENARIO_RATES
+    )
+    post_retirement_return_drop: float = Field(default=2.0, ge=0, le=50)
+    contribution_growth_rate: float = Field(default=0.0, ge=-50, le=50)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global inference_pool
+    if INFERENCE_PROCESSES > 0:
+        # The pool forks, so load the models first and let the pool workers share them
+        await asyncio.to_thread(registry.load_all)
+        inference_pool = InferencePool(INFERENCE_PROCESSES, INFERENCE_MAX_PENDING)
+        life_expectancy_batcher.pool = inference_pool
+    elif PRELOAD_MODELS:
+        # In the background so the worker answers /ready (503) while models load;
+        # requests that need a model before then load it themselves
+        threading.Thread(target=registry.load_all, name="model-preload", daemon=True).start()
+    yield
+    inference_pool.shutdown()
+
+
 # Initialize FastAPI
-app = FastAPI(title="Life Expectancy Prediction API")
+app = FastAPI(title="Life Expectancy Prediction API", lifespan=lifespan)
+
+inference_pool = InferencePool(max_pending=INFERENCE_MAX_PENDING)
+
+life_expectancy_batcher = MicroBatcher(
+    predict_life_expectancy_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait=BATCH_MAX_WAIT_MS / 1000,
+    pool=inference_pool,
+)
+
+# Serialized /predict-inflation responses by (forecast month, year), for the current month only
+inflation_responses = {}
+
+
+async def model_version() -> str:
+    """The life expectancy model version, without blocking the event loop on a model load."""
+    if registry.is_loaded("life_expectancy"):
+        return get_model_version()
+    return await asyncio.to_thread(get_model_version)
+
+
+@app.exception_handler(InferencePoolSaturated)
+async def inference_saturated_handler(request: Request, exc: InferencePoolSaturated):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Prediction queue is full, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.post("/life-expectancy")
-def get_life_expectancy(data: LifeExpectancyInput):
+async def get_life_expectancy(data: LifeExpectancyInput, response: Response):
     """
     Takes health & lifestyle inputs and returns predicted life expectancy.
     """
-    # Convert to DataFrame for model input
     user_data = data.model_dump()
+    # Lets clients key their own prediction caches by model version
+    response.headers["X-Model-Version"] = await model_version()
 
-    # Make prediction
-    prediction = predict_life_expectancy(user_data)
+    # Make prediction (micro-batched with other in-flight requests)
+    prediction = await life_expectancy_batcher.submit(user_data)
 
     return {"predicted_life_expectancy": round(float(prediction), 2)}
 
 
+@app.post("/life-expectancy/batch")
+async def get_life_expectancy_batch(data: LifeExpectancyBatchInput, response: Response):
+    """
+    Predicts life expectancy for many records with one vectorized model call.
+    """
+    inference_pool.check_capacity()
+    response.headers["X-Model-Version"] = await model_version()
+    records = [record.model_dump() for record in data.records]
+    predictions = await inference_pool.run(predict_life_expectancy_batch, records)
+
+    return {"predicted_life_expectancy": predictions}
+
+
+@app.post("/retirement-projection")
+def get_retirement_projection(data: RetirementProjectionInput):
+    """
+    Projects the retirement corpus to the predicted life expectancy for a grid of
+    return/inflation scenarios. Inflation scenarios default to the inflation forecast.
+    """
+    if any(rate <= -50 or rate > 100 for rate in data.return_rates + (data.inflation_rates or [])):
+        raise HTTPException(status_code=422, detail="Rates must be between -50 and 100 percent")
+
+    # Already plain JSON types; skips FastAPI's per-value jsonable_encoder walk
+    return JSONResponse(content=project_retirement(**data.model_dump()))
+
+
+@app.get("/ready")
+def readiness():
+    """
+    Readiness probe: 200 once the models are loaded (or, without preloading, while
+    none has failed to load), 503 otherwise. Reports each model's load time.
+    """
+    ready = not registry.failed and (registry.loaded or not PRELOAD_MODELS)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "models": registry.status()},
+    )
+
+
 @app.post("/predict-inflation")
 def get_inflation_data(req: YearRequest):
+    month = current_forecast_month()
+    key = (month, req.year)
+    body = inflation_responses.get(key)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+
     future_dates, forecast = predict_inflation(req.year)
 
     # Build response
     results = pd.DataFrame({"Date": future_dates, "Predicted_Inflation": forecast})
-    return results.to_dict(orient="records")
+    response = JSONResponse(content=jsonable_encoder(results.to_dict(orient="records")))
+
+    # Years within the precomputed horizon are few, so caching them stays bounded
+    if req.year - month[0] <= MAX_HORIZON_YEARS:
+        if any(cached_month != month for cached_month, _ in list(inflation_responses)):
+            inflation_responses.clear()
+        inflation_responses[key] = response.body
+    return response
 
 
 if __name__ == "__main__":
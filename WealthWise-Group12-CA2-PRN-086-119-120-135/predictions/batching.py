@@ -0,0 +1,88 @@
+import asyncio
+from typing import Any, Callable, List, Optional
+
+from inference import InferencePool
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single predictions into one batched model call.
+
+    The first request to arrive opens a batch; requests arriving within
+    ``max_wait`` seconds join it, up to ``max_batch_size``. The batch function then
+    runs once, in a worker thread (or the given inference pool) so the event loop
+    keeps accepting requests, and each caller gets its own result back.
+
+    With a pool, ``submit`` raises ``InferencePoolSaturated`` instead of queuing
+    when the pool is already full.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        pool: Optional[InferencePool] = None,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.pool = pool
+        self._pending = []
+        self._full: Optional[asyncio.Event] = None
+        # The event loop only keeps weak references to tasks; hold the flush tasks until they finish
+        self._flush_tasks = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Add one input to the current batch and wait for its result."""
+        if self.pool is not None:
+            self.pool.check_capacity()
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) == 1:
+            self._full = asyncio.Event()
+            self._start_flush(self._full)
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+
+        return await future
+
+    def _start_flush(self, full: asyncio.Event) -> None:
+        task = asyncio.create_task(self._flush_after_wait(full))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_after_wait(self, full: asyncio.Event) -> None:
+        try:
+            await asyncio.wait_for(full.wait(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            pass
+
+        batch, self._pending = (
+            self._pending[: self.max_batch_size],
+            self._pending[self.max_batch_size :],
+        )
+        if self._pending:
+            # Overflow starts the next batch straight away
+            self._full = asyncio.Event()
+            if len(self._pending) >= self.max_batch_size:
+                self._full.set()
+            self._start_flush(self._full)
+
+        items = [item for item, _ in batch]
+        try:
+            if self.pool is not None:
+                results = await self.pool.run(self.batch_fn, items)
+            else:
+                results = await asyncio.to_thread(self.batch_fn, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,20 @@
+# Production serving: gunicorn -c gunicorn.conf.py app:app
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8001')}"
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Import the app in the master and load the models there (when_ready runs before
+# any worker is forked), so workers share the model memory copy-on-write instead
+# of each unpickling its own copy
+preload_app = True
+
+
+def when_ready(server):
+    from registry import registry
+
+    registry.load_all()
+    # Keep the garbage collector from touching (and so copying) the preloaded objects
+    gc.freeze()
@@ -0,0 +1,55 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class InferencePoolSaturated(Exception):
+    """Too many model calls are already queued; the client should back off and retry."""
+
+
+class InferencePool:
+    """
+    Runs CPU-bound model calls off the event loop, with a bounded queue.
+
+    With ``processes`` > 0 calls go to a pool of worker processes, so inference
+    scales across cores instead of contending for one interpreter's GIL. The pool
+    is forked, so it must be created after the models are loaded: the workers then
+    share the loaded models' memory copy-on-write. With ``processes`` = 0 calls run
+    in the event loop's default thread pool.
+
+    ``saturated`` turns true once ``max_pending`` calls are queued or running;
+    callers check it before queuing more work and answer 429 instead.
+    """
+
+    def __init__(self, processes: int = 0, max_pending: int = 32):
+        self.processes = processes
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        if processes > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context("fork")
+            )
+
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.max_pending
+
+    def check_capacity(self) -> None:
+        if self.saturated:
+            raise InferencePoolSaturated(
+                f"{self.pending} model calls already queued (limit {self.max_pending})"
+            )
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` in the pool; ``fn`` and its arguments must be picklable for processes."""
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,10 +1,56 @@
-import joblib
+import os
+import threading
+
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+from registry import registry
+
+# Trained ARMA model, loaded on first use (or at service startup)
+registry.register("inflation", "arma_inflation.pkl")
+
+# Years past the current one covered by the precomputed forecast; later years are forecast on demand
+MAX_HORIZON_YEARS = int(os.getenv("INFLATION_MAX_HORIZON_YEARS", 50))
+
+_horizon_lock = threading.Lock()
+_horizon_table = None
+
+
+def current_forecast_month():
+    """The (year, month) forecasts are made from; it changes once a month."""
+    now = datetime.now()
+    return now.year, now.month
+
 
-# Load trained model
-model = joblib.load("models/arma_inflation.pkl")
+def get_horizon_table():
+    """
+    Return the forecast from the current month up to MAX_HORIZON_YEARS ahead.
+
+    The forecast only depends on the month it starts from, so it is computed once
+    per month and every request slices it.
+
+    Returns:
+        (forecast month, monthly dates, forecast values)
+    """
+    global _horizon_table
+    month = current_forecast_month()
+    table = _horizon_table
+    if table is not None and table[0] == month:
+        return table
+
+    with _horizon_lock:
+        if _horizon_table is None or _horizon_table[0] != month:
+            current_year, current_month = month
+            future_dates = pd.date_range(
+                start=datetime(current_year, current_month, 1),
+                end=f"{current_year + MAX_HORIZON_YEARS}-12-01",
+                freq="MS",  # Month Start
+            )
+            model = registry.get("inflation")
+            forecast = np.asarray(model.forecast(steps=len(future_dates)))
+            _horizon_table = (month, future_dates, forecast)
+        return _horizon_table
 
 
 def predict_inflation(year):
@@ -12,6 +58,16 @@ def predict_inflation(year):
     current_month = datetime.now().month
 
     try:
+        if year <= current_year + MAX_HORIZON_YEARS:
+            (current_year, current_month), future_dates, forecast = get_horizon_table()
+
+            # Months from the current one to the requested year end
+            steps = (year - current_year) * 12 + 13 - current_month
+            if steps <= 0:
+                raise ValueError("Requested year is in the past.")
+
+            return future_dates[:steps], forecast[:steps]
+
         # Generate future dates till requested year end
         end_date = f"{year}-12-01"
         future_dates = pd.date_range(
@@ -23,11 +79,7 @@ def predict_inflation(year):
         # Forecast horizon
         steps = len(future_dates)
 
-        # Check if model is defined
-        if "model" not in globals():
-            raise ValueError("Model is not defined.")
-
-        forecast = model.forecast(steps=steps)
+        forecast = registry.get("inflation").forecast(steps=steps)
 
         return future_dates, forecast
     except Exception as e:
@@ -1,8 +1,158 @@
-import joblib
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Hashable, List, NamedTuple, Optional
+
+import numpy as np
 import pandas as pd
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from caching import LRUCache
+from registry import load_pickle, registry
+
+# Predictions by canonical model input, so repeated inputs never reach the model
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 10000))
+prediction_cache = LRUCache(PREDICTION_CACHE_SIZE)
+
+# Check the compiled path against the pipeline on PARITY_SAMPLES rows at load time
+# (tests/test_life_expectancy.py covers parity; this guards a swapped-in model file)
+VERIFY_COMPILED_MODEL = os.getenv("VERIFY_COMPILED_MODEL", "0") == "1"
+PARITY_SAMPLES = 256
+
+
+class CompiledLifeExpectancyModel:
+    """
+    The life-expectancy pipeline compiled down to plain NumPy and the XGBoost booster.
+
+    At load time the ColumnTransformer's fitted parameters are read out (scaler
+    mean/scale for the numeric columns, one-hot category positions for the
+    categorical ones). At predict time the input dicts are encoded straight into
+    one preallocated feature matrix and passed to ``Booster.inplace_predict``,
+    skipping DataFrame construction and the sklearn transformer stack.
+    """
+
+    def __init__(self, pipeline):
+        preprocessor, regressor = pipeline[0], pipeline[-1]
+        if len(pipeline) != 2 or preprocessor.remainder != "drop":
+            raise ValueError("Unsupported pipeline layout")
+
+        self.numeric_slots = []  # (column, output index, mean, scale)
+        self.categorical_slots = []  # (column, {category: output index})
+        offset = 0
+        for _, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop":
+                continue
+            if isinstance(transformer, StandardScaler):
+                mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+                scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+                for i, column in enumerate(columns):
+                    self.numeric_slots.append((column, offset + i, mean[i], scale[i]))
+                offset += len(columns)
+            elif (
+                isinstance(transformer, OneHotEncoder)
+                and transformer.drop_idx_ is None
+                and transformer.handle_unknown == "ignore"
+            ):
+                for column, categories in zip(columns, transformer.categories_):
+                    self.categorical_slots.append(
+                        (column, {c: offset + i for i, c in enumerate(categories)})
+                    )
+                    offset += len(categories)
+            else:
+                raise ValueError(f"Unsupported transformer: {transformer!r}")
+
+        self.n_features = offset
+        self.numeric_index = np.array([slot[1] for slot in self.numeric_slots])
+        self.numeric_mean = np.array([slot[2] for slot in self.numeric_slots])
+        self.numeric_scale = np.array([slot[3] for slot in self.numeric_slots])
+
+        self.booster = regressor.get_booster()
+        if self.booster.num_features() != self.n_features:
+            raise ValueError("Booster and preprocessor feature counts differ")
+        best_iteration = getattr(regressor, "best_iteration", None)
+        self.iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+
+    def encode(self, records: List[dict]) -> np.ndarray:
+        # float64 like the ColumnTransformer output; XGBoost narrows to float32 itself
+        features = np.zeros((len(records), self.n_features))
+        for row, record in zip(features, records):
+            for column, index, _, _ in self.numeric_slots:
+                row[index] = record[column]
+            for column, positions in self.categorical_slots:
+                # Unknown categories leave every indicator at 0 (handle_unknown="ignore")
+                index = positions.get(record[column])
+                if index is not None:
+                    row[index] = 1.0
+        numeric = features[:, self.numeric_index]
+        features[:, self.numeric_index] = (numeric - self.numeric_mean) / self.numeric_scale
+        return features
+
+    def predict(self, records: List[dict]) -> np.ndarray:
+        return self.predict_features(self.encode(records))
+
+    def predict_features(self, features: np.ndarray) -> np.ndarray:
+        return self.booster.inplace_predict(features, iteration_range=self.iteration_range)
+
+
+def parity_records(compiled: CompiledLifeExpectancyModel, n: int) -> List[dict]:
+    """Synthetic inputs covering every category, plus an unseen one, for parity checks."""
+    rng = np.random.default_rng(0)
+    records = []
+    for i in range(n):
+        record = {}
+        for column, _, mean, scale in compiled.numeric_slots:
+            record[column] = float(round(rng.normal(mean, scale or 1.0), 1))
+        for column, positions in compiled.categorical_slots:
+            categories = list(positions) + ["Unknown"]
+            record[column] = categories[i % len(categories)]
+        records.append(record)
+    return records
+
+
+def _compile_model(pipeline) -> Optional[CompiledLifeExpectancyModel]:
+    """Compile the pipeline, or return None to keep using it as-is."""
+    try:
+        compiled = CompiledLifeExpectancyModel(pipeline)
+        if VERIFY_COMPILED_MODEL:
+            records = parity_records(compiled, PARITY_SAMPLES)
+            expected = pipeline.predict(pd.DataFrame.from_records(records))
+            if not np.array_equal(compiled.predict(records), expected):
+                raise ValueError("Compiled predictions differ from the pipeline")
+        return compiled
+    except Exception as e:
+        print(f"Life expectancy fast path disabled, using the sklearn pipeline: {e}")
+        return None
 
-# Load model
-loaded_model = joblib.load("models/life_expectancy_xgb_pipeline.pkl")
+
+class LifeExpectancyModel(NamedTuple):
+    pipeline: Any
+    compiled: Optional[CompiledLifeExpectancyModel]
+    # Identifies the model file; callers that cache predictions put it in their keys
+    version: str
+
+
+def _load_life_expectancy_model(path: Path) -> LifeExpectancyModel:
+    pipeline = load_pickle(path)
+    with open(path, "rb") as model_file:
+        version = hashlib.sha256(model_file.read()).hexdigest()[:16]
+    return LifeExpectancyModel(pipeline, _compile_model(pipeline), version)
+
+
+registry.register(
+    "life_expectancy", "life_expectancy_xgb_pipeline.pkl", _load_life_expectancy_model
+)
+
+
+def get_model_version() -> str:
+    return registry.get("life_expectancy").version
+
+
+def _canonical_record(record: dict) -> Hashable:
+    """Cache key for a raw input: numbers compare by value, so 170 and 170.0 match."""
+    return tuple(
+        (field, float(value) if isinstance(value, (int, float)) else value)
+        for field, value in sorted(record.items())
+    )
 
 
 def predict_life_expectancy(user_data: dict) -> float:
@@ -27,10 +177,52 @@ def predict_life_expectancy(user_data: dict) -> float:
         "Hypertension": 0,
     }
     """
-    # Convert to DataFrame for pipeline compatibility
-    df = pd.DataFrame([user_data])
+    return predict_life_expectancy_batch([user_data])[0]
+
+
+def predict_life_expectancy_batch(records: List[dict]) -> List[float]:
+    """
+    Predict life expectancy for many people with a single model call.
+
+    Uses the compiled NumPy/booster path when the pipeline could be compiled
+    (it is checked against the pipeline at load time); otherwise one DataFrame is
+    built and the pipeline runs once for the whole batch. Only records missing
+    from the prediction cache reach the model.
+
+    Args:
+        records: Input dictionaries with the fields shown in predict_life_expectancy
+
+    Returns:
+        Predicted life expectancies, in input order
+    """
+    if not records:
+        return []
+
+    model = registry.get("life_expectancy")
+    if model.compiled is not None:
+        # Key on exactly what the booster sees: scaled float32 features, unknown
+        # categories already collapsed to all-zero indicators
+        features = model.compiled.encode(records)
+        keys = [row.tobytes() for row in features.astype(np.float32)]
+    else:
+        features = None
+        keys = [_canonical_record(record) for record in records]
+
+    predictions = [prediction_cache.get(key) for key in keys]
+    misses = [i for i, prediction in enumerate(predictions) if prediction is None]
+    if not misses:
+        return predictions
+
+    if features is not None:
+        computed = model.compiled.predict_features(features[misses])
+    else:
+        # Convert to DataFrame for pipeline compatibility
+        df = pd.DataFrame.from_records([records[i] for i in misses])
 
-    # Predict
-    prediction = loaded_model.predict(df)[0]
+        # Predict
+        computed = model.pipeline.predict(df)
 
-    return round(float(prediction), 2)
+    for i, prediction in zip(misses, computed):
+        predictions[i] = round(float(prediction), 2)
+        prediction_cache.set(keys[i], predictions[i])
+    return predictions
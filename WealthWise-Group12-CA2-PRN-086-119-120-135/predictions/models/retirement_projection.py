@@ -0,0 +1,130 @@
+from typing import List, Optional
+
+import numpy as np
+
+from models.inflation_prediction import get_horizon_table
+
+# Spread of the default inflation scenarios around the forecast mean (percentage points)
+DEFAULT_INFLATION_SPREAD = 1.0
+
+
+def default_inflation_rates(years: int) -> List[float]:
+    """
+    Low/base/high annual inflation scenarios from the ARMA forecast.
+
+    The base case is the mean forecast rate over the next ``years`` years.
+    """
+    _, _, forecast = get_horizon_table()
+    base = float(np.mean(forecast[: max(years, 1) * 12]))
+    return [
+        round(base - DEFAULT_INFLATION_SPREAD, 2),
+        round(base, 2),
+        round(base + DEFAULT_INFLATION_SPREAD, 2),
+    ]
+
+
+def project_retirement(
+    current_age: int,
+    retirement_age: int,
+    life_expectancy: float,
+    current_savings: float,
+    monthly_contribution: float,
+    monthly_expense: float,
+    return_rates: List[float],
+    inflation_rates: Optional[List[float]] = None,
+    post_retirement_return_drop: float = 2.0,
+    contribution_growth_rate: float = 0.0,
+) -> dict:
+    """
+    Project the retirement corpus year by year for every (return, inflation) scenario.
+
+    Each year the corpus grows at the scenario's return (lowered by
+    ``post_retirement_return_drop`` points once retired). Before retirement the
+    year's contributions are added. From retirement the year's expenses are
+    withdrawn, inflated from today's ``monthly_expense``. The projection runs to
+    the predicted life expectancy.
+
+    All scenarios and years are computed in one NumPy pass: with per-year growth
+    factors g and net flows f, corpus_t = G_t * (corpus_0 + sum_{k<t} f_k / G_{k+1})
+    where G_t is the cumulative product of g up to t.
+
+    Args:
+        current_age: Age today
+        retirement_age: Planned retirement age
+        life_expectancy: Predicted life expectancy (years)
+        current_savings: Current pension/retirement balance
+        monthly_contribution: Total monthly contribution until retirement (own + employer)
+        monthly_expense: Monthly retirement expense in today's money
+        return_rates: Annual pre-retirement return scenarios (%)
+        inflation_rates: Annual inflation scenarios (%); defaults to the inflation forecast
+        post_retirement_return_drop: Points the return drops by after retirement
+        contribution_growth_rate: Annual growth of contributions (%), e.g. salary growth
+
+    Returns:
+        Ages, plus per scenario: corpus at retirement, corpus required at retirement
+        to fund expenses to life expectancy, shortfall, depletion age (None if the
+        corpus lasts) and the yearly corpus
+    """
+    end_age = max(int(np.floor(life_expectancy)), current_age)
+    ages = np.arange(current_age, end_age + 1)
+    if inflation_rates is None:
+        inflation_rates = default_inflation_rates(end_age - current_age)
+
+    # One row per scenario, one column per year
+    returns, inflations = np.meshgrid(
+        np.asarray(return_rates, dtype=float) / 100,
+        np.asarray(inflation_rates, dtype=float) / 100,
+        indexing="ij",
+    )
+    returns = returns.reshape(-1, 1)
+    inflations = inflations.reshape(-1, 1)
+
+    years = np.arange(len(ages) - 1)
+    working = ages[:-1] < retirement_age
+    growth = 1 + np.where(working, returns, returns - post_retirement_return_drop / 100)
+    contributions = np.where(
+        working, 12 * monthly_contribution * (1 + contribution_growth_rate / 100) ** years, 0.0
+    )
+    expenses = np.where(working, 0.0, 12 * monthly_expense * (1 + inflations) ** years)
+
+    scenarios = len(returns)
+    cumulative_growth = np.ones((scenarios, len(ages)))
+    np.cumprod(growth, axis=1, out=cumulative_growth[:, 1:])
+    discounted_flows = np.zeros((scenarios, len(ages)))
+    np.cumsum(
+        (contributions - expenses) / cumulative_growth[:, 1:],
+        axis=1,
+        out=discounted_flows[:, 1:],
+    )
+    corpus = cumulative_growth * (current_savings + discounted_flows)
+
+    # Only withdrawals follow retirement, so a corpus that goes negative stays depleted
+    depleted = corpus < 0
+    corpus[depleted] = 0.0
+    depletion_ages = np.where(depleted.any(axis=1), ages[depleted.argmax(axis=1)], -1)
+
+    retirement_index = min(max(retirement_age - current_age, 0), len(ages) - 1)
+    at_retirement = corpus[:, retirement_index]
+    required = cumulative_growth[:, retirement_index] * np.sum(
+        expenses / cumulative_growth[:, 1:], axis=1
+    )
+    shortfall = np.maximum(required - at_retirement, 0.0)
+
+    corpus_paths = np.round(corpus, 2).tolist()
+    results = []
+    for s, (return_rate, inflation_rate) in enumerate(
+        zip(returns[:, 0].tolist(), inflations[:, 0].tolist())
+    ):
+        results.append(
+            {
+                "return_rate": round(return_rate * 100, 4),
+                "inflation_rate": round(inflation_rate * 100, 4),
+                "corpus_at_retirement": round(float(at_retirement[s]), 2),
+                "required_corpus": round(float(required[s]), 2),
+                "shortfall": round(float(shortfall[s]), 2),
+                "depletion_age": int(depletion_ages[s]) if depletion_ages[s] >= 0 else None,
+                "corpus": corpus_paths[s],
+            }
+        )
+
+    return {"ages": ages.tolist(), "scenarios": results}
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import joblib
+
+# Model files live next to this package unless MODELS_DIR points elsewhere, so the
+# service can be started from any working directory
+MODELS_DIR = Path(os.getenv("MODELS_DIR") or Path(__file__).resolve().parent / "models")
+
+
+def load_pickle(path: Path) -> Any:
+    """
+    Load a joblib pickle with its NumPy arrays memory-mapped from the file.
+
+    Copy-on-write ("c") rather than read-only: the pages are shared by every worker
+    through the OS page cache, but statsmodels needs writable buffers.
+    """
+    return joblib.load(path, mmap_mode="c")
+
+
+class ModelEntry:
+    def __init__(self, name: str, path: Path, loader: Callable[[Path], Any]):
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.value = None
+        self.loaded = False
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class ModelRegistry:
+    """
+    Loads each model once per process, on first use or all in parallel at startup.
+
+    Models register a file name (resolved against ``models_dir``) and a loader.
+    ``get`` loads a model the first time it's needed, ``load_all`` loads every
+    registered model at once, and ``status`` reports what's loaded and how long
+    each load took for the readiness endpoint.
+    """
+
+    def __init__(self, models_dir: Path):
+        self.models_dir = Path(models_dir)
+        self._entries: Dict[str, ModelEntry] = {}
+
+    def register(
+        self, name: str, filename: str, loader: Callable[[Path], Any] = load_pickle
+    ) -> None:
+        self._entries[name] = ModelEntry(name, self.models_dir / filename, loader)
+
+    def get(self, name: str) -> Any:
+        """Return a loaded model, loading it first if needed."""
+        entry = self._entries[name]
+        if entry.loaded:
+            return entry.value
+
+        with entry.lock:
+            if not entry.loaded:
+                started = time.perf_counter()
+                try:
+                    entry.value = entry.loader(entry.path)
+                except Exception as e:
+                    entry.error = str(e)
+                    raise
+                entry.load_seconds = time.perf_counter() - started
+                entry.error = None
+                entry.loaded = True
+        return entry.value
+
+    def is_loaded(self, name: str) -> bool:
+        return self._entries[name].loaded
+
+    def load_all(self, max_workers: Optional[int] = None) -> None:
+        """Load every registered model in parallel; failures are kept for ``status``."""
+
+        def load(name):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Error loading model {name}: {e}")
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(self._entries) or 1) as pool:
+            list(pool.map(load, self._entries))
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "loaded": entry.loaded,
+                "load_seconds": entry.load_seconds,
+                "error": entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
+
+    @property
+    def loaded(self) -> bool:
+        return all(entry.loaded for entry in self._entries.values())
+
+    @property
+    def failed(self) -> bool:
+        return any(entry.error for entry in self._entries.values())
+
+
+registry = ModelRegistry(MODELS_DIR)
@@ -0,0 +1,54 @@
+import asyncio
+import gc
+import unittest
+
+from batching import MicroBatcher
+
+
+class MicroBatcherTests(unittest.TestCase):
+    def test_concurrent_submissions_share_one_batch(self):
+        calls = []
+
+        def double(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        async def run():
+            batcher = MicroBatcher(double, max_batch_size=8, max_wait=0.01)
+            return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        self.assertEqual(asyncio.run(run()), [0, 2, 4, 6, 8])
+        self.assertEqual(calls, [[0, 1, 2, 3, 4]])
+
+    def test_overflow_is_flushed_in_a_second_batch(self):
+        calls = []
+
+        def identity(items):
+            calls.append(len(items))
+            return list(items)
+
+        async def run():
+            batcher = MicroBatcher(identity, max_batch_size=3, max_wait=0.01)
+            return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        self.assertEqual(asyncio.run(run()), [0, 1, 2, 3, 4])
+        self.assertEqual(calls, [3, 2])
+
+    def test_flush_task_is_held_until_it_finishes(self):
+        async def run():
+            batcher = MicroBatcher(lambda items: list(items), max_wait=0.05)
+            submission = asyncio.ensure_future(batcher.submit(1))
+            await asyncio.sleep(0)
+            # Only the batcher references the pending flush task
+            gc.collect()
+            self.assertEqual(len(batcher._flush_tasks), 1)
+
+            result = await asyncio.wait_for(submission, timeout=1)
+            await asyncio.sleep(0)
+            return result, len(batcher._flush_tasks)
+
+        self.assertEqual(asyncio.run(run()), (1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+
+from caching import LRUCache
+
+
+class LRUCacheTests(unittest.TestCase):
+    def test_least_recently_used_key_is_evicted(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_zero_size_disables_caching(self):
+        cache = LRUCache(max_size=0)
+        cache.set("a", 1)
+
+        self.assertEqual(cache.get("a", "missing"), "missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from models.life_expectancy import (
+    parity_records,
+    predict_life_expectancy,
+    predict_life_expectancy_batch,
+    prediction_cache,
+)
+from registry import registry
+
+SAMPLE_RECORD = {
+    "Height": 170,
+    "Weight": 65,
+    "Gender": "Male",
+    "BMI": 24.5,
+    "Physical_Activity": "Moderate",
+    "Smoking_Status": "Never",
+    "Alcohol_Consumption": "Low",
+    "Diet": "Balanced",
+    "Blood_Pressure": "Normal",
+    "Cholesterol": 180,
+    "Asthma": 0,
+    "Diabetes": 0,
+    "Heart_Disease": 0,
+    "Hypertension": 0,
+}
+
+
+class CompiledLifeExpectancyModelTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.model = registry.get("life_expectancy")
+
+    def setUp(self):
+        prediction_cache.clear()
+
+    def test_pipeline_compiles(self):
+        self.assertIsNotNone(self.model.compiled)
+
+    def test_parity_with_sklearn_pipeline(self):
+        records = parity_records(self.model.compiled, 1000) + [SAMPLE_RECORD]
+        expected = self.model.pipeline.predict(pd.DataFrame.from_records(records))
+        np.testing.assert_array_equal(self.model.compiled.predict(records), expected)
+
+    def test_encoding_matches_column_transformer(self):
+        records = parity_records(self.model.compiled, 50)
+        expected = self.model.pipeline[0].transform(pd.DataFrame.from_records(records))
+        np.testing.assert_array_equal(self.model.compiled.encode(records), expected)
+
+    def test_unknown_category_sets_no_indicator(self):
+        record = dict(SAMPLE_RECORD, Diet="Unknown")
+        expected = self.model.pipeline.predict(pd.DataFrame.from_records([record]))
+        np.testing.assert_array_equal(self.model.compiled.predict([record]), expected)
+
+    def test_batch_matches_single_predictions(self):
+        records = parity_records(self.model.compiled, 20)
+        batch = predict_life_expectancy_batch(records)
+        prediction_cache.clear()
+        self.assertEqual(batch, [predict_life_expectancy(record) for record in records])
+
+    def test_sample_prediction(self):
+        self.assertEqual(predict_life_expectancy(SAMPLE_RECORD), 77.39)
+
+    def test_repeated_inputs_are_served_from_the_cache(self):
+        predict_life_expectancy(SAMPLE_RECORD)
+        same_input = dict(SAMPLE_RECORD, Height=170.0, Cholesterol=180.0)
+
+        with mock.patch.object(
+            self.model.compiled, "predict_features", side_effect=AssertionError
+        ):
+            self.assertEqual(predict_life_expectancy(same_input), 77.39)
+
+
+if __name__ == "__main__":
+    unittest.main()